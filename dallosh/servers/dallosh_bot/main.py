@@ -1,7 +1,7 @@
 import dotenv
+import os
 import socket
 import logging
-from src.server import app
 
 dotenv.load_dotenv(override=True)
 
@@ -23,10 +23,21 @@ if __name__ == "__main__":
     logger.info(f"  - Network: http://{local_ip}:7860")
     logger.info(f"  - External: http://0.0.0.0:7860")
     
-    # Start server binding to all interfaces
-    uvicorn.run(
-        app, 
-        host="0.0.0.0",  # Bind to all interfaces
-        port=7860,
-        log_level="info"
-    )
\ No newline at end of file
+    # Number of bot worker processes, each runs its sessions on its own core
+    workers = int(os.getenv("BOT_WORKERS", "1"))
+    
+    if workers > 1:
+        from src.dispatcher import run_cluster
+        
+        logger.info(f"Starting {workers} bot workers behind the dispatcher")
+        run_cluster(workers, host="0.0.0.0", port=7860)
+    else:
+        from src.server import app
+        
+        # Start server binding to all interfaces
+        uvicorn.run(
+            app, 
+            host="0.0.0.0",  # Bind to all interfaces
+            port=7860,
+            log_level="info"
+        )
\ No newline at end of file
@@ -24,6 +24,8 @@ Run the bot using::
 import io
 import os
 import json
+import asyncio
+from typing import Dict, List, Optional
 
 from loguru import logger
 
@@ -85,11 +87,8 @@ from pipecat.adapters.schemas.tools_schema import AdapterType, ToolsSchema
 from mcp import StdioServerParameters
 from pipecat.services.mcp_service import MCPClient
 
-from pipecat.utils.text.markdown_text_filter import MarkdownTextFilter
 from pipecat.processors.filters.function_filter import FunctionFilter
 
-from pipecat.utils.text.pattern_pair_aggregator import PatternMatch, PatternPairAggregator
-
 from pipecat.audio.interruptions.min_words_interruption_strategy import MinWordsInterruptionStrategy
 # from pipecat.audio.interruptions.volume_interruption_strategy import VolumeInterruptionStrategy
 
@@ -109,6 +108,7 @@ from pipecat.services.google.llm_openai import GoogleLLMOpenAIBetaService
 
 
 from pipecat.services.rime.tts import RimeTTSService
+from websockets.asyncio.client import connect as websocket_connect
 from pipecat.transcriptions.language import Language
 
 from pipecat.audio.filters.noisereduce_filter import NoisereduceFilter
@@ -117,7 +117,15 @@ from pipecat.audio.turn.smart_turn.base_smart_turn import SmartTurnParams
 # from pipecat.audio.turn.smart_turn.local_smart_turn_v2 import LocalSmartTurnAnalyzerV2
 
 
-from .tools import get_tools_schema, set_tools_functions
+from .tools import get_tools_schema, set_tools_functions, prefetch_tools_data, TOOL_CALL_BUDGET_MS
+from src.lib.sodular.utils import set_turn_budget
+from src.services.metrics import instrument_processors, instrument_audio_filter, instrument_vad
+from src.services.audio_offload import get_audio_pool, OffloadedNoiseFilter, OffloadedSileroVADAnalyzer
+from src.services.vad_batching import get_vad_service, BatchedSileroVADAnalyzer, VAD_BATCH_WINDOW_MS
+from src.services.audio_offload import AUDIO_OFFLOAD_WORKERS
+from src.services import component_pool, upstream_pool
+from src.services.text_sanitizer import StreamingTextSanitizer
+from src.services.upstream_pool import UPSTREAM_POOL_SIZE, is_open
 
 
 #Define voice IDs
@@ -142,28 +150,148 @@ VOICE_IDS = {
 #     },
 # }
 
-current_language = list(VOICE_IDS.keys())[0]
-
-# Advanced handler with retry logic
-async def handle_user_idle(processor, retry_count):
-    if retry_count == 1:
-        # First attempt - gentle reminder
-        messages.append({"role": "system", "content": f"This is a First attempt - gentle reminder message, try to ask if the user is still there (max 10 words). Your responses should be in  {VOICE_IDS[current_language]['language']}."})
-        await task.push_frames([context_aggregator.assistant().get_context_frame()])
-        return True  # Continue monitoring
-    elif retry_count == 2:
-        # Second attempt - more direct prompt
-        messages.append({"role": "system", "content": f"This is the Second attempt - more direct prompt message, try to ask if the user is still there (max 10 words). Your responses should be in  {VOICE_IDS[current_language]['language']}."})
-        await task.push_frames([context_aggregator.assistant().get_context_frame()])
-        return True  # Continue monitoring
-    else:
-        # Third attempt - end conversation
-        messages.append({"role": "system", "content": f"This is theThird attempt - end conversation, say goodbye and end the conversation. Your response should be in  {VOICE_IDS[current_language]['language']}."})
-        await task.push_frames([context_aggregator.assistant().get_context_frame()])
-        
-        await task.push_frame(EndFrame(), FrameDirection.UPSTREAM)
-        
-        return False  # Stop monitoring
+# Language of new sessions, switched per session
+DEFAULT_LANGUAGE = list(VOICE_IDS.keys())[0]
+
+
+class BotSession:
+    """
+    State and handlers of one voice session
+
+    Each WebRTC connection gets its own, registered by pc_id in `sessions`,
+    so that the pipelines running side by side in a worker never share a
+    task, context or language.
+    """
+
+    def __init__(self, pcId: Optional[str], messages: list, language: str = DEFAULT_LANGUAGE):
+        self.pcId = pcId
+        self.messages = messages  # LLM context messages
+        self.currentLanguage = language
+        self.task: Optional[PipelineTask] = None
+        self.pipeline: Optional[Pipeline] = None
+        self.rtvi: Optional[RTVIProcessor] = None
+        self.tts = None
+        self.llm = None
+        self.contextAggregator = None
+        # Images uploaded to Google during the conversation, deleted when it ends
+        self.tempImages: List[str] = []
+        # Tool data resolved while the pipeline starts
+        self.prefetchTask: Optional[asyncio.Task] = None
+
+    @property
+    def language(self):
+        return VOICE_IDS[self.currentLanguage]["language"]
+
+    async def instruct(self, content: str):
+        """Record an instruction in the session's messages and have the bot answer it"""
+        self.messages.append({"role": "system", "content": content})
+        # Gemini Live reads a context frame only once and skips system turns: append it as a user turn
+        await self.task.queue_frames([LLMMessagesAppendFrame([{"role": "user", "content": content}])])
+
+    async def close(self):
+        """Release what the session still holds once its pipeline ended"""
+        if self.prefetchTask and not self.prefetchTask.done():
+            self.prefetchTask.cancel()
+        if self.prefetchTask:
+            await asyncio.gather(self.prefetchTask, return_exceptions=True)
+
+    def registerHandlers(self, transport: BaseTransport, transcript: TranscriptProcessor):
+        transport.add_event_handler("on_client_connected", self.onClientConnected)
+        transport.add_event_handler("on_participant_left", self.onParticipantLeft)
+        transport.add_event_handler("on_client_disconnected", self.onClientDisconnected)
+        # TranscriptProcessor is a factory, not a processor: it only has the decorator
+        transcript.event_handler("on_transcript_update")(self.onTranscriptUpdate)
+        self.llm.add_event_handler("on_function_calls_started", self.onFunctionCallsStarted)
+        self.llm.add_event_handler("on_function_calls_completed", self.onFunctionCallsCompleted)
+        self.task.add_event_handler("on_idle_timeout", self.onIdleTimeout)
+
+    # Advanced handler with retry logic
+    async def handleUserIdle(self, processor, retry_count):
+        if retry_count == 1:
+            # First attempt - gentle reminder
+            await self.instruct(f"This is a First attempt - gentle reminder message, try to ask if the user is still there (max 10 words). Your responses should be in  {self.language}.")
+            return True  # Continue monitoring
+        elif retry_count == 2:
+            # Second attempt - more direct prompt
+            await self.instruct(f"This is the Second attempt - more direct prompt message, try to ask if the user is still there (max 10 words). Your responses should be in  {self.language}.")
+            return True  # Continue monitoring
+        else:
+            # Third attempt - end conversation
+            await self.instruct(f"This is theThird attempt - end conversation, say goodbye and end the conversation. Your response should be in  {self.language}.")
+
+            await processor.push_frame(EndFrame(), FrameDirection.UPSTREAM)
+
+            return False  # Stop monitoring
+
+    async def onClientConnected(self, transport, client):
+        logger.info(f"Client connected")
+        # Kick off the conversation.
+        if self.task is not None:
+            if len(self.messages) == 0:
+                await self.instruct(f"Say hello and briefly introduce yourself. Your initial response should be in  {self.language}.")
+
+    async def onTranscriptUpdate(self, processor, frame):
+        # Each message contains role (user/assistant), content, and timestamp
+        for message in frame.messages:
+            print(f"[{message.timestamp}] {message.role}: {message.content}")
+
+    # Optional: Add function call feedback
+    async def onFunctionCallsStarted(self, service, function_calls):
+        # Check if any of the function calls are NOT switch_language
+        if self.task is not None:
+            for function_call in function_calls:
+                function_name = getattr(function_call, 'function_name', "")
+                logger.info(f"Processing function call: {function_name}")
+
+    async def onFunctionCallsCompleted(self, service, function_calls, results):
+        logger.info(f"Function calls completed: {function_calls} with results: {results}")
+
+        for i, function_call in enumerate(function_calls):
+            function_name = getattr(function_call, 'function_name', "")
+            if function_name == "switch_language":
+                logger.info(f"Language switching function completed")
+                if i < len(results):
+                    logger.info(f"Switch result: {results[i]}")
+            else:
+                logger.info(f"Other function completed: {function_name}")
+
+    # Handle participant disconnection
+    async def onParticipantLeft(self, transport, participant, reason):
+        await self.task.cancel()
+
+    async def onClientDisconnected(self, transport, client):
+        logger.info(f"Client disconnected")
+        if self.task is not None:
+            # We delete the images from the temporary list
+            for file_name in self.tempImages:
+                # Step 3: Clean up - delete the uploaded file
+                print(f"🗑️ Cleaning up uploaded file: {file_name}")
+                try:
+                    await self.llm.file_api.delete_file(file_name)
+                    print(f"✅ File deleted successfully: {file_name}")
+                except Exception as delete_error:
+                    print(f"⚠️ Warning: Failed to delete file {file_name}: {delete_error}")
+
+            await self.task.cancel()
+
+    async def onIdleTimeout(self, task):
+        logger.info("Pipeline has been idle for too long")
+        # Perform any custom cleanup or logging
+        # Note: If cancel_on_idle_timeout=True, the pipeline will be cancelled after this handler runs
+
+        # Add a farewell message
+        await self.instruct(f"The client has been idle based on the timeout for the session. Say goodbye and end the conversation. Your response should be in  {self.language}.")
+
+        # Then end the conversation gracefully
+        await task.stop_when_done()
+
+
+# Live sessions of this process by pc_id
+sessions: Dict[str, BotSession] = {}
+
+
+def get_session(pc_id: str) -> Optional[BotSession]:
+    return sessions.get(pc_id)
 
 
 
@@ -190,6 +318,63 @@ class TranscriptionLogger(FrameProcessor):
             print(f"Transcription: {frame.text}")
 
 
+def reset_noise_filter(audio_filter: NoisereduceFilter):
+    audio_filter._filtering = True
+    # Drop the per-session CPU instrumentation (see src/services/metrics.py)
+    vars(audio_filter).pop("filter", None)
+
+
+def reset_vad_analyzer(vad_analyzer: SileroVADAnalyzer):
+    vad_analyzer._model.reset_states()
+    vad_analyzer._vad_buffer = b""
+    vars(vad_analyzer).pop("analyze_audio", None)
+
+
+class PooledRimeTTSService(RimeTTSService):
+    """RimeTTSService taking an already open websocket from the upstream pool when one is ready"""
+
+    def upstream_target(self):
+        params = "&".join(f"{k}={v}" for k, v in self._settings.items())
+        return f"{self._url}?{params}", self._api_key
+
+    async def _connect_websocket(self):
+        pool = upstream_pool.pools.get("rime")
+        if pool and not is_open(self._websocket):
+            websocket = pool.claim(self.upstream_target())
+            if websocket:
+                self._websocket = websocket
+        # Keeps an open websocket, connects otherwise
+        await super()._connect_websocket()
+
+
+async def connect_rime(target):
+    url, api_key = target
+    return await websocket_connect(url, additional_headers={"Authorization": f"Bearer {api_key}"})
+
+
+VAD_PARAMS = VADParams(
+    stop_secs=0.2,
+    temperature=0.0
+)
+
+# Per-session components built ahead of time, so that offers don't wait for them
+component_pool.register_pool("transcript", TranscriptProcessor)
+component_pool.register_pool("rtvi", lambda: RTVIProcessor(config=RTVIConfig(config=[])))
+# Removes tags, comments, code blocks and markdown before TTS
+component_pool.register_pool("text_sanitizer", StreamingTextSanitizer)
+if not AUDIO_OFFLOAD_WORKERS:
+    # Stateless per frame, reused by the next session
+    component_pool.register_pool("noise_filter", NoisereduceFilter, reset=reset_noise_filter)
+if not AUDIO_OFFLOAD_WORKERS and not VAD_BATCH_WINDOW_MS:
+    # Loads the Silero model, reused by the next session once its state is reset
+    component_pool.register_pool("silero_vad", lambda: SileroVADAnalyzer(params=VAD_PARAMS),
+                                 reset=reset_vad_analyzer, threaded=True)
+
+if UPSTREAM_POOL_SIZE:
+    # Rime websockets opened ahead of time, claimed by each session's TTS on its first connect
+    upstream_pool.register_pool("rime", connect_rime)
+
+
 
 # languages_list = "\n".join([f"- Language Code: {voice}, Language: {VOICE_IDS[voice]['language']}" for voice in VOICE_IDS])
 
@@ -197,7 +382,7 @@ SYSTEM_INSTRUCTIONS = f"""
 You are a helpful AI assistant.
 
 The language response for you must absolutely speak fluenty with the user is:
-- {VOICE_IDS[current_language]['language']}
+- {VOICE_IDS[DEFAULT_LANGUAGE]['language']}
 
 
 IMPORTANT RULES:
@@ -209,8 +394,9 @@ IMPORTANT RULES:
 
 async def run_bot(transport: BaseTransport, data = {}):
 
-    # Create the task
-    global task
+    session = BotSession(data.get("pc_id"), [])
+    if session.pcId:
+        sessions[session.pcId] = session
 
     try:
         session_messages = data.get("messages", None)
@@ -225,7 +411,7 @@ async def run_bot(transport: BaseTransport, data = {}):
         transcription_logger = TranscriptionLogger()
 
         # Create a single transcript processor instance
-        transcript = TranscriptProcessor()
+        transcript = component_pool.acquire("transcript")
 
         # Configure with one or more strategies
         stt_mute_processor = STTMuteFilter(
@@ -240,55 +426,8 @@ async def run_bot(transport: BaseTransport, data = {}):
             ),
         )
 
-        # Create the filter
-        md_filter = MarkdownTextFilter()
-
-        # Create pattern aggregator
-        pattern_aggregator = PatternPairAggregator()
-
-        # Add pattern for voice tags
-        # pattern_aggregator.add_pattern_pair(
-        #     pattern_id="voice_tag",
-        #     start_pattern="<voice>",
-        #     end_pattern="</voice>",
-        #     remove_match=True # remove the voice tag from the text
-        # )
-
-        pattern_aggregator.add_pattern_pair(
-            pattern_id="think_tag",
-            start_pattern="<think>",
-            end_pattern="</think>",
-            remove_match=True # remove the voice tag from the text
-        )
-
-        pattern_aggregator.add_pattern_pair(
-            pattern_id="assistant_header_tag",
-            start_pattern="<|start_header_id|>",
-            end_pattern="</|start_header_id|>",
-            remove_match=True # remove the voice tag from the text
-        )
-
-        pattern_aggregator.add_pattern_pair(
-            pattern_id="assistant_header_tag2",
-            start_pattern="<start_header_id>",
-            end_pattern="</start_header_id>",
-            remove_match=True # remove the voice tag from the text
-        )
-
-        pattern_aggregator.add_pattern_pair(
-            pattern_id="comment_tag",
-            start_pattern="(",
-            end_pattern=")",
-            remove_match=True # remove the voice tag from the text
-        )
-
-        pattern_aggregator.add_pattern_pair(
-            pattern_id="comment_tag2",
-            start_pattern="```",
-            end_pattern=" ```",
-            remove_match=True # remove the voice tag from the text
-        )
-
+        # Create the text sanitizer (tags, comments, code blocks and markdown)
+        text_sanitizer = component_pool.acquire("text_sanitizer")
 
         # Register handler for voice switching
         # async def on_voice_tag(match: PatternMatch):
@@ -314,10 +453,9 @@ async def run_bot(transport: BaseTransport, data = {}):
 
         # pattern_aggregator.on_pattern_match("voice_tag", on_voice_tag)
         
-        global tts_french
-
-        tts_french = RimeTTSService(
+        session.tts = PooledRimeTTSService(
             api_key=os.getenv("RIME_API_KEY"),
+            url=os.getenv("RIME_URL", "wss://users.rime.ai/ws2"),
             voice_id=VOICE_IDS['fr_fr']["voice"],
             model="mistv2",
             params=RimeTTSService.InputParams(
@@ -327,8 +465,7 @@ async def run_bot(transport: BaseTransport, data = {}):
                 pause_between_brackets=True,
                 phonemize_between_brackets=False
             ),
-            text_filters=[md_filter],
-            text_aggregator=pattern_aggregator
+            text_aggregator=text_sanitizer
         )
 
         # tts_french = OpenAITTSService(
@@ -370,8 +507,11 @@ async def run_bot(transport: BaseTransport, data = {}):
         system_instructions = system_instructions if system_instructions else SYSTEM_INSTRUCTIONS
         system_instructions += f"\n\nThe user information is: {user}"
 
+        # Host and path of the Live websocket, pipecat's own default unless overridden (benchmarks)
+        gemini_live_url = os.getenv("GEMINI_LIVE_BASE_URL")
         llm = GeminiMultimodalLiveLLMService(
             api_key=gemini_api_key,
+            **({"base_url": gemini_live_url} if gemini_live_url else {}),
             # voice_id="Zephyr",  # Aoede, Charon, Fenrir, Kore, Puck, Zephyr
             # visit: https://ai.google.dev/gemini-api/docs/models
             # model="gemini-2.0-flash-live-001", # 'gemini-live-2.5-flash-preview', 'gemini-2.0-flash-live-001'
@@ -387,13 +527,20 @@ async def run_bot(transport: BaseTransport, data = {}):
             ),
             tools=get_tools_schema(data),
         )
+        session.llm = llm
 
         
 
+        # Latency budget of each tool call, inherited by the pipeline tasks created below
+        set_turn_budget(data.get("tool_call_budget") or TOOL_CALL_BUDGET_MS)
+
         # regiter the tool function according to their schema
         # llm.register_function("switch_language", switch_language)
         set_tools_functions(llm, data)
 
+        # Resolve tool lookups (requests table ID) while the pipeline starts
+        session.prefetchTask = asyncio.create_task(prefetch_tools_data(data))
+
 
         # For LLM context 
         
@@ -407,6 +554,7 @@ async def run_bot(transport: BaseTransport, data = {}):
             ]
         else:
             messages = session_messages
+        session.messages = messages
 
         # messages = [
         #     {
@@ -422,44 +570,42 @@ async def run_bot(transport: BaseTransport, data = {}):
         )
 
         context_aggregator = llm.create_context_aggregator(context)
+        session.contextAggregator = context_aggregator
 
         # For user idle
         user_idle = UserIdleProcessor(
-            callback=handle_user_idle,  # Your callback function
+            callback=session.handleUserIdle,  # Your callback function
             timeout=40.0,               # Seconds of inactivity before triggering
         )
 
-        global rtvi
-
         # For realtime using websocket event for client side
-        rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
-    
-        global pipeline
-
-        pipeline = Pipeline(
-            [
-                transport.input(),  # Transport user input
-                rtvi,  # RTVI processor
-                # stt_mute_processor,
-                # transcription_logger,
-                # user_idle,
-                transcript.user(),              # Captures user transcripts
-                context_aggregator.user(),  # User responses
-                llm,  # LLM Live Gemini API
-                tts_french, # TTS with Rime API
-                transport.output(),  # Transport bot output
-                transcript.assistant(),         # Captures assistant transcripts
-                context_aggregator.assistant(),  # Assistant spoken responses
-            ]
-        )    
+        session.rtvi = component_pool.acquire("rtvi")
+
+        processors = [
+            transport.input(),  # Transport user input
+            session.rtvi,  # RTVI processor
+            # stt_mute_processor,
+            # transcription_logger,
+            # user_idle,
+            transcript.user(),              # Captures user transcripts
+            context_aggregator.user(),  # User responses
+            llm,  # LLM Live Gemini API
+            session.tts, # TTS with Rime API
+            transport.output(),  # Transport bot output
+            transcript.assistant(),         # Captures assistant transcripts
+            context_aggregator.assistant(),  # Assistant spoken responses
+        ]
+        # CPU time per processor and session, exported on /metrics
+        instrument_processors(data.get("pc_id"), processors)
+        session.pipeline = Pipeline(processors)
 
         min_words_strategy = MinWordsInterruptionStrategy(min_words=3)
         # volume_strategy = VolumeInterruptionStrategy(min_volume=0.8)
 
         
 
-        task = PipelineTask(
-            pipeline,
+        session.task = PipelineTask(
+            session.pipeline,
             idle_timeout_secs=90,  # 1.5 minute timeout, Timeout in seconds before considering the pipeline idle. 
             cancel_on_idle_timeout=False,  # Notify the pipeline that it should cancel itself when idle.
             params=PipelineParams(
@@ -473,7 +619,7 @@ async def run_bot(transport: BaseTransport, data = {}):
             ),
             
             enable_turn_tracking=True,
-            observers=[RTVIObserver(rtvi)],
+            observers=[RTVIObserver(session.rtvi)],
         )
 
 
@@ -485,9 +631,7 @@ async def run_bot(transport: BaseTransport, data = {}):
         #     # Initialize the conversation
         #     await task.queue_frames([context_aggregator.user().get_context_frame()])
 
-        # We will register temporary the images from googel after the conversation is done
-        temp_images = []
-
+        # Images uploaded to Google are registered in session.tempImages and deleted after the conversation
         
         # Handle custom message from client
         # @rtvi.event_handler("on_client_message")
@@ -702,93 +846,19 @@ async def run_bot(transport: BaseTransport, data = {}):
                 
                 
 
-        @transport.event_handler("on_client_connected")
-        async def on_client_connected(transport, client):
-            logger.info(f"Client connected")
-            # Kick off the conversation.
-            if task is not None:
-                if len(messages) == 0:
-                    messages.append({"role": "system", "content": f"Say hello and briefly introduce yourself. Your initial response should be in  {VOICE_IDS[current_language]['language']}."})
-                    await task.queue_frames([context_aggregator.assistant().get_context_frame()])
-
-        @transcript.event_handler("on_transcript_update")
-        async def handle_transcript_update(processor, frame):
-            # Each message contains role (user/assistant), content, and timestamp
-            for message in frame.messages:
-                print(f"[{message.timestamp}] {message.role}: {message.content}")
-        
-        # Optional: Add function call feedback
-        @llm.event_handler("on_function_calls_started")
-        async def on_function_calls_started(service, function_calls):
-            # Check if any of the function calls are NOT switch_language
-            if task is not None:
-                did_speak = False
-                for function_call in function_calls:
-                    function_name = getattr(function_call, 'function_name', "")
-                    logger.info(f"Processing function call: {function_name}")
-                    
-                    # if not did_speak:
-                    #     messages.append({"role": "system", "content": f"You are doing background processing, say something short( max 5 words) to the user to wait for a moment. Your response should be in  {VOICE_IDS[current_language]['language']}."})
-                    #     await task.queue_frames([context_aggregator.assistant().get_context_frame()])
-                    #     did_speak = True
-                    #     break
-        
-        @llm.event_handler("on_function_calls_completed")
-        async def on_function_calls_completed(service, function_calls, results):
-            logger.info(f"Function calls completed: {function_calls} with results: {results}")
-            
-            for i, function_call in enumerate(function_calls):
-                function_name = getattr(function_call, 'function_name', "")
-                if function_name == "switch_language":
-                    logger.info(f"Language switching function completed")
-                    if i < len(results):
-                        logger.info(f"Switch result: {results[i]}")
-                else:
-                    logger.info(f"Other function completed: {function_name}")
-            
-                
-        # Handle participant disconnection
-        @transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason):
-            await task.cancel()
-            
-        @transport.event_handler("on_client_disconnected")
-        async def on_client_disconnected(transport, client):
-            logger.info(f"Client disconnected")
-            if task is not None:
-                # We delete the images from the temporary list
-                if len(temp_images) > 0:
-                    for file_name in temp_images:
-                        # Step 3: Clean up - delete the uploaded file
-                        print(f"🗑️ Cleaning up uploaded file: {file_name}")
-                        try:
-                            await llm.file_api.delete_file(file_name)
-                            print(f"✅ File deleted successfully: {file_name}")
-                        except Exception as delete_error:
-                            print(f"⚠️ Warning: Failed to delete file {file_name}: {delete_error}")
-                        
-                await task.cancel()
-
-        @task.event_handler("on_idle_timeout")
-        async def on_idle_timeout(task):
-            logger.info("Pipeline has been idle for too long")
-            # Perform any custom cleanup or logging
-            # Note: If cancel_on_idle_timeout=True, the pipeline will be cancelled after this handler runs
-            
-            # Add a farewell message
-            messages.append({"role": "system", "content": f"The client has been idle based on the timeout for the session. Say goodbye and end the conversation. Your response should be in  {VOICE_IDS[current_language]['language']}."})
-            await task.queue_frame(context_aggregator.assistant().get_context_frame())
-
-            # Then end the conversation gracefully
-            await task.stop_when_done()
+        # Connection, transcript, function call and idle handlers of this session
+        session.registerHandlers(transport, transcript)
 
         runner = PipelineRunner(handle_sigint=False)
 
-        await runner.run(task)
+        await runner.run(session.task)
     except Exception as e:
         logger.error(f"Error in run_bot: {e}")
-        if task is not None:
-            await task.cancel()
+        if session.task is not None:
+            await session.task.cancel()
+    finally:
+        await session.close()
+        sessions.pop(session.pcId, None)
 
     
 
@@ -800,17 +870,25 @@ async def run_agent(webrtc_connection, data = {}):
     #smart_turn_model_path = os.getenv("LOCAL_SMART_TURN_MODEL_PATH")
     #model_path_exists = os.path.exists(smart_turn_model_path)
 
+    pc_id = webrtc_connection.pc_id
+    # Noise reduction and VAD run in the shared audio worker processes when enabled,
+    # VAD batched across sessions when enabled
+    audio_pool = get_audio_pool()
+    vad_service = get_vad_service()
+    audio_filter = OffloadedNoiseFilter(audio_pool) if audio_pool else component_pool.acquire("noise_filter")
+    if vad_service:
+        vad_analyzer = BatchedSileroVADAnalyzer(vad_service, params=VAD_PARAMS)
+    elif audio_pool:
+        vad_analyzer = OffloadedSileroVADAnalyzer(audio_pool, params=VAD_PARAMS)
+    else:
+        vad_analyzer = component_pool.acquire("silero_vad")
+
     transport = SmallWebRTCTransport(
         params=TransportParams(
-            audio_in_filter=NoisereduceFilter(), # Enable noise reduction
+            audio_in_filter=instrument_audio_filter(pc_id, audio_filter), # Enable noise reduction
             audio_in_enabled=True,
             audio_out_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(
-                params=VADParams(
-                    stop_secs=0.2,
-                    temperature=0.0
-                )
-            ),
+            vad_analyzer=instrument_vad(pc_id, vad_analyzer),
             transcription_enabled=True,
             audio_out_10ms_chunks=3,
             # turn_analyzer=LocalSmartTurnAnalyzerV2(
@@ -826,5 +904,13 @@ async def run_agent(webrtc_connection, data = {}):
         webrtc_connection=webrtc_connection,
     )
 
-    await run_bot(transport, data)
+    try:
+        await run_bot(transport, {**data, "pc_id": pc_id})
+    finally:
+        if vad_service or audio_pool:
+            vad_analyzer.close()
+        else:
+            component_pool.release("silero_vad", vad_analyzer)
+        if not audio_pool:
+            component_pool.release("noise_filter", audio_filter)
 
@@ -2,7 +2,9 @@ import dotenv
 import os
 import asyncio
 import time
+import uuid
 import requests
+from collections import OrderedDict
 from typing import Dict, Any
 from mcp import StdioServerParameters
 from pipecat.services.mcp_service import MCPClient
@@ -12,9 +14,82 @@ from pipecat.adapters.schemas.tools_schema import AdapterType, ToolsSchema
 
 from pipecat.services.llm_service import FunctionCallParams
 from src.services.client import getSodularClient
+from src.services.write_queue import WriteQueue
+from src.lib.sodular.utils import deadline_scope, remaining_ms
 
 dotenv.load_dotenv(override=True)
 
+# Name of the table user requests are written to
+REQUESTS_TABLE_NAME = "requests"
+
+# "sync": send_user_request answers once the request is stored
+# "async": it answers right away and a background write queue stores the request
+SEND_REQUEST_MODE = os.getenv("SEND_REQUEST_MODE", "sync")
+
+# Where queued requests are spilled while the backend is unreachable
+REQUEST_SPILL_PATH = os.getenv("REQUEST_SPILL_PATH", "pending_requests.jsonl")
+
+# How long (ms) a stored request name is remembered per chat to answer duplicates locally
+RECENT_REQUEST_TTL_MS = int(os.getenv("RECENT_REQUEST_TTL_MS", "600000"))
+RECENT_REQUEST_MAX = 1024
+
+# Recently stored requests: {(chat_id, name): expires_at}, least recently used first
+_recent_requests = OrderedDict()
+
+# Latency budget (ms) of one tool call, the caller is waiting mid-conversation
+TOOL_CALL_BUDGET_MS = int(os.getenv("TOOL_CALL_BUDGET_MS", "4000"))
+
+# Returned to the LLM when a tool call ran out of its budget
+DEADLINE_EXCEEDED_RESULT = {
+    "error": "Request system is slow right now",
+    "degraded": True,
+    "message": "The request could not be saved in time, ask the user to try again in a moment."
+}
+
+
+def deadline_exceeded(response = None):
+    """Whether a Sodular response (or the current tool call) ran out of its budget"""
+    if isinstance(response, dict) and response.get("deadlineExceeded"):
+        return True
+    remaining = remaining_ms()
+    return remaining is not None and remaining <= 0
+
+
+def _recent_request_key(request_data):
+    return (request_data.get("chatId"), request_data.get("name", "").strip().lower())
+
+
+def remember_request(request_data):
+    """Remember a stored request name for its chat"""
+    key = _recent_request_key(request_data)
+    _recent_requests[key] = time.monotonic() + RECENT_REQUEST_TTL_MS / 1000
+    _recent_requests.move_to_end(key)
+    while len(_recent_requests) > RECENT_REQUEST_MAX:
+        _recent_requests.popitem(last=False)
+
+
+def was_recently_requested(request_data):
+    """Whether this chat stored a request with the same name a moment ago"""
+    key = _recent_request_key(request_data)
+    expires_at = _recent_requests.get(key)
+    if expires_at is None:
+        return False
+    if expires_at <= time.monotonic():
+        del _recent_requests[key]
+        return False
+    _recent_requests.move_to_end(key)
+    return True
+
+
+def with_turn_deadline(handler):
+    """Run a tool function under the turn's latency budget (see set_turn_budget)"""
+
+    async def handler_with_deadline(params: FunctionCallParams):
+        with deadline_scope():
+            await handler(params)
+
+    return handler_with_deadline
+
 
 def get_request_tool_schema():
     """
@@ -54,6 +129,118 @@ def get_request_tool_schema():
     )
 
 
+async def persist_user_request(database_id, token, request_data):
+    """Store a user request (unless one with the same name exists), returns the tool result"""
+    # Get Sodular client from the service
+    print("🔌 Getting Sodular client from service...")
+    sodular_client = await getSodularClient()
+    
+    if not sodular_client:
+        print("❌ Failed to get Sodular client from service")
+        return {"error": "Missing technical configuration"}
+    
+    print("✅ Sodular client obtained successfully")
+    
+    # Scope the shared client to this session's database and token,
+    # so concurrent sessions never overwrite each other's context
+    print(f"🎯 Scoping client to database: {database_id}, token: {token[:10]}...")
+    sodular_client = sodular_client.scoped(database_id, token)
+    print("✅ Database context and token set")
+    
+    # Resolve the requests table ID (cached per database by the tables API)
+    print(f"🔍 Resolving requests table in database: {database_id}")
+    request_table_id = await sodular_client.tables.resolveId(REQUESTS_TABLE_NAME)
+    
+    if not request_table_id and deadline_exceeded():
+        print("⏱️ Tool call budget exceeded while resolving the requests table")
+        return DEADLINE_EXCEEDED_RESULT
+    
+    if not request_table_id:
+        print("❌ No requests table found in database")
+        return {"error": "No requests table found in database"}
+    
+    print(f"🎯 Using table ID: {request_table_id}")
+    
+    # Create the request using the ref API
+    print(f"🔗 Creating ref API for table: {request_table_id}")
+    ref_api = getattr(sodular_client.ref, 'from')(request_table_id)
+    print(f"✅ Ref API created successfully")
+    
+    # Validate ref API was created
+    if not ref_api:
+        print("❌ Failed to create ref API")
+        return {"error": "Failed to create ref API for table operations"}
+
+    # Create the request unless one with the same name exists
+    print(f"🚀 Creating request in database unless it exists: {request_data['name']}")
+    create_response = await ref_api.createIfAbsent({
+        "data": request_data
+    }, ["data.name"])
+    
+    print(f"📊 Create response: {create_response}")
+    
+    # A retried create may find the ref its own first attempt stored: that is ours
+    if create_response.get('existed') and not create_response.get('retried'):
+        print("❌ Request already exists")
+        remember_request(request_data)
+        return {"success": "Request already exists, wait for the agent to instruct your request."}
+    
+    if create_response.get('data'):
+        request_id =  create_response['data'].get('uid') 
+        print(f"✅ Request created successfully with ID: {request_id}")
+        remember_request(request_data)
+        return {"success": "Request created successfully", "requestName": request_data.get("name")}
+    elif deadline_exceeded(create_response):
+        print("⏱️ Tool call budget exceeded while creating the request")
+        return DEADLINE_EXCEEDED_RESULT
+    
+    error_msg = create_response.get('error', 'Unknown error')
+    print(f"❌ Failed to create request: {error_msg}")
+    
+    status = create_response.get('status')
+    if status is None or status >= 500:
+        # Backend unreachable: keep the request in the local write-ahead log,
+        # it is sent once the backend is back, unless this attempt was stored after all
+        logged_response = await ref_api.createIfAbsent({"data": request_data}, ["data.name"], durable=True)
+        if logged_response.get('data'):
+            print(f"💾 Request logged locally: {logged_response['data'].get('idempotencyKey')}")
+            return {"success": "Request saved, it will be synchronized shortly", "requestName": request_data.get("name")}
+    
+    # The table may have been deleted or renamed, resolve it again next time
+    sodular_client.tables.invalidateId(REQUESTS_TABLE_NAME, database_id)
+    return {"error": "Technical error"}
+
+
+async def persist_request_job(job):
+    """Write queue job handler, False makes the queue retry the job"""
+    result = await persist_user_request(job["database_id"], job["token"], job["data"])
+    return "success" in result
+
+
+_request_write_queue = None
+
+
+async def get_request_write_queue():
+    """Get the background write queue of send_user_request, starting it on first use"""
+    global _request_write_queue
+    if _request_write_queue is None:
+        _request_write_queue = WriteQueue(
+            persist_request_job,
+            spillPath=REQUEST_SPILL_PATH,
+            maxSize=int(os.getenv("REQUEST_QUEUE_SIZE", "1000")),
+        )
+        await _request_write_queue.start()
+    return _request_write_queue
+
+
+async def close_request_write_queue():
+    """Stop the write queue, spilling requests not written yet"""
+    global _request_write_queue
+    if _request_write_queue is not None:
+        await _request_write_queue.stop()
+        _request_write_queue = None
+
+
 def get_send_user_request_function(data = {}):
     """Get the send_user_request function with proper error handling"""
 
@@ -99,104 +286,6 @@ def get_send_user_request_function(data = {}):
             else:
                 print(f"✅ User data provided: {user.get('uid')}")
             
-            # Get Sodular client from the service
-            print("🔌 Getting Sodular client from service...")
-            sodular_client = await getSodularClient()
-            
-            if not sodular_client:
-                print("❌ Failed to get Sodular client from service")
-                await params.result_callback(
-                    {"error": "Missing technical configuration"}
-                )
-                return
-            
-            print("✅ Sodular client obtained successfully")
-            
-            # Set database context and authentication token
-            print(f"🎯 Setting database context: {database_id}")
-            sodular_client.use(database_id)
-            print(f"🔑 Setting authentication token: {token[:10]}...")
-            sodular_client.setToken(token)
-            print("✅ Database context and token set")
-            
-            # Get the requests table ID by querying the tables
-            # We'll look for a table with name "requests" or similar
-            print(f"🔍 Searching for requests table in database: {database_id}")
-            
-            # Use tables.get like in JavaScript implementation with correct filter
-            tables_response = await sodular_client.tables.get({
-                'filter': {
-                    'data.name': 'requests'  # Correct nested structure for table name
-                }
-            })
-            
-            print(f"📊 Tables response: {tables_response}")
-            
-            if tables_response.get('data'):
-                # Handle single table response (not array)
-                if isinstance(tables_response['data'], dict):
-                    table_data = tables_response['data']
-                    request_table_id = table_data.get('uid')
-                    table_name = table_data.get('data', {}).get('name', 'unnamed')
-                    print(f"✅ Found requests table: {table_name} (ID: {request_table_id})")
-                # Handle array response
-                elif isinstance(tables_response['data'], list) and len(tables_response['data']) > 0:
-                    request_table_id = tables_response['data'][0].get('uid') 
-                    table_name = tables_response['data'][0].get('data', {}).get('name', 'unnamed')
-                    print(f"✅ Found requests table: {table_name} (ID: {request_table_id})")
-                else:
-                    print("❌ No valid table data found")
-                    await params.result_callback(
-                        {"error": "No valid table data found"}
-                    )
-                    return
-                
-                # Validate that we actually got a table ID
-                if not request_table_id:
-                    print("❌ Could not determine table ID from response")
-                    await params.result_callback(
-                        {"error": "Could not determine table ID from response"}
-                    )
-                    return
-            else:
-                print("❌ No requests table found in database")
-                await params.result_callback(
-                    {"error": "No requests table found in database"}
-                )
-                return
-            
-            print(f"🎯 Using table ID: {request_table_id}")
-            
-            # Create the request using the ref API
-            print(f"🔗 Creating ref API for table: {request_table_id}")
-            ref_api = getattr(sodular_client.ref, 'from')(request_table_id)
-            print(f"✅ Ref API created successfully")
-            
-            # Validate ref API was created
-            if not ref_api:
-                print("❌ Failed to create ref API")
-                await params.result_callback(
-                    {"error": "Failed to create ref API for table operations"}
-                )
-                return
-
-            # Check if the request already exists
-            print(f"🔍 Checking if request already exists: {params.arguments['name']}")
-            existing_request = await ref_api.get({
-                "filter": {
-                    "data.name": params.arguments["name"]
-                }
-            })
-
-            print(f"📊 Existing request: {existing_request}")
-
-            if existing_request.get('data') and existing_request['data'].get('uid'):
-                print("❌ Request already exists")
-                await params.result_callback(
-                    {"success": "Request already exists, wait for the agent to instruct your request."}
-                )
-                return
-            
             # Prepare request data
             request_data = {
                "chatId": session_id,
@@ -211,26 +300,34 @@ def get_send_user_request_function(data = {}):
             
             print(f"📝 Request data to create: {request_data}")
             
-            # Create the request in the database
-            print("🚀 Creating request in database...")
-            create_response = await ref_api.create({
-                "data": request_data
-            })
-            
-            print(f"📊 Create response: {create_response}")
-            
-            if create_response.get('data'):
-                request_id =  create_response['data'].get('uid') 
-                print(f"✅ Request created successfully with ID: {request_id}")
+            # The LLM often repeats a call it just made, answer it without any round trip
+            if was_recently_requested(request_data):
+                print("❌ Request already exists (recently created in this chat)")
                 await params.result_callback(
-                        {"success": "Request created successfully", "requestName": request_data.get("name")}
+                    {"success": "Request already exists, wait for the agent to instruct your request."}
                 )
-            else:
-                error_msg = create_response.get('error', 'Unknown error')
-                print(f"❌ Failed to create request: {error_msg}")
+                return
+            
+            if SEND_REQUEST_MODE == "async":
+                # Answer right away, the write queue persists the request in the background
+                request_id = str(uuid.uuid4())
+                write_queue = await get_request_write_queue()
+                write_queue.submit({
+                    "id": request_id,
+                    "database_id": database_id,
+                    "token": token,
+                    "data": request_data,
+                })
+                remember_request(request_data)
+                print(f"📬 Request queued with provisional ID: {request_id}")
                 await params.result_callback(
-                    {"error": "Technical error"}
+                    {"success": "Request accepted", "requestName": request_data.get("name"), "requestId": request_id}
                 )
+                return
+            
+            await params.result_callback(
+                await persist_user_request(database_id, token, request_data)
+            )
             
             # Note: Don't close the client as it's managed by the service
             print("🎉 send_user_request completed successfully!")
@@ -249,6 +346,26 @@ def get_send_user_request_function(data = {}):
 
 
 
+async def prefetch_tools_data(data = {}):
+    """Resolve the requests table ID ahead of the first tool call"""
+    database_id = data.get("database_id", None)
+    token = data.get("token", None)
+
+    if not database_id or not token:
+        return
+
+    try:
+        sodular_client = await getSodularClient()
+        if not sodular_client:
+            return
+
+        sodular_client = sodular_client.scoped(database_id, token)
+        request_table_id = await sodular_client.tables.resolveId(REQUESTS_TABLE_NAME)
+        print(f"✅ Prefetched requests table ID: {request_table_id}")
+    except Exception as error:
+        print(f"⚠️ Failed to prefetch requests table: {error}")
+
+
 def get_tools_schema(data = {}):
 
     search_tool = {"google_search": {}}
@@ -281,7 +398,8 @@ def set_tools_functions(llm, data = {}, task = None):
         
         # Register the function with the LLM
         print("📝 Registering send_user_request function with LLM...")
-        llm.register_function("send_user_request", send_user_request_func)
+        # Sodular calls made by the function share the turn's latency budget
+        llm.register_function("send_user_request", with_turn_deadline(send_user_request_func))
         print("✅ send_user_request function registered successfully")
         
         print("🎉 All tool functions registered successfully!")
@@ -0,0 +1,268 @@
+"""
+Benchmark the bot's time to first audio
+Starts the bot server against local Gemini Live and Rime stand-ins, connects
+scripted WebRTC clients through /api/offer that wait for the greeting, speak
+a prerecorded utterance and wait for the answer, and reports p50/p95/p99 of
+each stage after the end of the utterance, at several concurrency levels
+
+Run from the bot root with::
+
+    python -m src.bench_ttfa [--sessions 1,10,50,100] [--wav utterance.wav]
+
+Needs aiortc (installed with pipecat's webrtc extra), openssl, and NLTK's
+punkt_tab data, which the bot's sentence splitting loads
+(``python -m nltk.downloader punkt_tab``).
+"""
+
+import argparse
+import asyncio
+import fractions
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+from aiortc import MediaStreamTrack, RTCPeerConnection, RTCSessionDescription
+from aiortc.mediastreams import MediaStreamError
+from av import AudioFrame
+
+from src.fake_upstreams import FakeGeminiLiveServer, FakeRimeServer, make_self_signed_cert
+
+RATE = 16000
+FRAME = 320  # Samples per 20 ms frame
+LOUD = 500  # Peak of a received frame counted as bot audio
+STAGES = ("stand_in_vad_stop", "first_llm_token", "first_tts_byte", "first_audio_packet")
+SESSION_TIMEOUT = 60  # seconds
+
+
+def load_utterance(path: Optional[str]) -> bytes:
+    """16 kHz mono 16-bit PCM of the utterance, synthetic speech-like bursts when no file is given"""
+    if path:
+        with wave.open(path, "rb") as wav:
+            if wav.getframerate() != RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise SystemExit(f"{path} must be 16 kHz mono 16-bit PCM")
+            return wav.readframes(wav.getnframes())
+    rng = np.random.default_rng(0)
+    t = np.arange(int(1.5 * RATE)) / RATE
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)  # 4 syllables per second
+    voice = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t) + 0.2 * rng.standard_normal(len(t))
+    return (6000 * syllables * voice).astype(np.int16).tobytes()
+
+
+class UtteranceTrack(MediaStreamTrack):
+    """Microphone stand-in: silence, and the utterance once `speak()` is called"""
+
+    kind = "audio"
+
+    def __init__(self, utterance: bytes):
+        super().__init__()
+        self.utterance = utterance
+        self.pending = b""
+        self.speechEnd: Optional[float] = None
+        self.spoken = asyncio.Event()
+        self._start: Optional[float] = None
+        self._pts = 0
+
+    def speak(self):
+        self.pending = self.utterance
+
+    async def recv(self):
+        if self._start is None:
+            self._start = time.time()
+        wait = self._start + self._pts / RATE - time.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        chunk, self.pending = self.pending[:FRAME * 2], self.pending[FRAME * 2:]
+        if chunk and not self.pending:
+            self.speechEnd = time.time() + len(chunk) / 2 / RATE
+            self.spoken.set()
+        frame = AudioFrame(format="s16", layout="mono", samples=FRAME)
+        frame.planes[0].update(chunk.ljust(FRAME * 2, b"\0"))
+        frame.sample_rate = RATE
+        frame.pts = self._pts
+        frame.time_base = fractions.Fraction(1, RATE)
+        self._pts += FRAME
+        return frame
+
+
+async def run_session(index: int, botUrl: str, utterance: bytes, http: aiohttp.ClientSession) -> Dict[str, float]:
+    """One scripted call, returns stage timestamps seen by the client"""
+    pc = RTCPeerConnection()
+    microphone = UtteranceTrack(utterance)
+    pc.addTrack(microphone)
+    result: Dict[str, float] = {}
+    answered = asyncio.Event()
+    greeted = asyncio.Event()
+
+    async def listen(track):
+        last_loud = None
+        while True:
+            try:
+                frame = await track.recv()
+            except MediaStreamError:
+                # The call ended
+                return
+            if np.abs(frame.to_ndarray()).max() < LOUD:
+                # Speak once the greeting has been quiet for a second
+                if last_loud and not microphone.pending and not microphone.spoken.is_set() \
+                        and time.time() - last_loud > 1.0:
+                    microphone.speak()
+                continue
+            now = time.time()
+            if not greeted.is_set():
+                result["greeting_audio"] = now
+                greeted.set()
+            if microphone.speechEnd and now > microphone.speechEnd:
+                result["first_audio_packet"] = now
+                answered.set()
+                return
+            last_loud = now
+
+    @pc.on("track")
+    def on_track(track):
+        if track.kind == "audio":
+            asyncio.ensure_future(listen(track))
+
+    try:
+        await pc.setLocalDescription(await pc.createOffer())
+        result["offer"] = time.time()
+        async with http.post(f"{botUrl}/api/offer", json={
+            "sdp": pc.localDescription.sdp,
+            "type": pc.localDescription.type,
+            "agent_type": "gemini",
+            "bot_settings": {"system_instructions": None},
+            "messages": [],
+            "user": {"name": f"bench-{index}"},
+        }) as response:
+            answer = await response.json()
+        if "sdp" not in answer:
+            raise RuntimeError(answer.get("error", answer))
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=answer["sdp"], type=answer["type"]))
+        await asyncio.wait_for(answered.wait(), SESSION_TIMEOUT)
+        result["speech_end"] = microphone.speechEnd
+    finally:
+        await pc.close()
+    return result
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+async def run_level(sessions: int, botUrl: str, utterance: bytes, gemini: FakeGeminiLiveServer,
+                    rime: FakeRimeServer):
+    gemini.events.clear()
+    rime.events.clear()
+    async with aiohttp.ClientSession() as http:
+        results = await asyncio.gather(
+            *(run_session(i, botUrl, utterance, http) for i in range(sessions)), return_exceptions=True
+        )
+
+    latencies: Dict[str, List[float]] = {stage: [] for stage in ("greeting",) + STAGES}
+    failures: Dict[str, int] = {}
+    for index, result in enumerate(results):
+        if isinstance(result, BaseException):
+            reason = f"{type(result).__name__}: {result}" if str(result) else type(result).__name__
+            failures[reason] = failures.get(reason, 0) + 1
+            continue
+        stages = {**gemini.events.get(str(index), {}), **rime.events.get(str(index), {}), **result}
+        latencies["greeting"].append(stages["greeting_audio"] - stages["offer"])
+        for stage in STAGES:
+            if stage in stages:
+                latencies[stage].append(stages[stage] - stages["speech_end"])
+
+    print(f"\n{sessions} concurrent session(s), {sum(failures.values())} failed")
+    for reason, count in failures.items():
+        print(f"  {count} x {reason}")
+    print(f"{'stage (ms)':<36} | {'p50':>7} | {'p95':>7} | {'p99':>7} | {'n':>4}")
+    for stage, values in latencies.items():
+        label = "offer -> greeting audio" if stage == "greeting" else f"utterance end -> {stage}"
+        if not values:
+            print(f"{label:<36} | {'-':>7} | {'-':>7} | {'-':>7} | {0:>4}")
+            continue
+        p50, p95, p99 = (percentile(values, p) * 1000 for p in (50, 95, 99))
+        print(f"{label:<36} | {p50:>7.0f} | {p95:>7.0f} | {p99:>7.0f} | {len(values):>4}")
+
+
+def check_nltk_data():
+    """The bot splits LLM text into sentences with NLTK: without punkt_tab it never speaks"""
+    import nltk
+    try:
+        nltk.data.find("tokenizers/punkt_tab")
+    except LookupError:
+        raise SystemExit("NLTK punkt_tab data is missing, install it with: python -m nltk.downloader punkt_tab")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's time to first audio")
+    parser.add_argument("--sessions", default="1,10,50,100", help="Concurrency levels, comma-separated")
+    parser.add_argument("--wav", help="Utterance, 16 kHz mono 16-bit PCM WAV (synthetic if omitted)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Stand-in Gemini seconds to first token")
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="Stand-in Rime seconds to first audio")
+    parser.add_argument("--port", type=int, default=7899, help="Port of the bot server under test")
+    args = parser.parse_args()
+
+    check_nltk_data()
+    utterance = load_utterance(args.wav)
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_self_signed_cert(tmp)
+        gemini = FakeGeminiLiveServer(latency=args.llm_latency)
+        rime = FakeRimeServer(latency=args.tts_latency)
+        await gemini.start(cert, key)
+        await rime.start()
+
+        env = {
+            **os.environ,
+            "GEMINI_API_KEY": "bench",
+            "GEMINI_LIVE_BASE_URL": gemini.baseUrl,
+            "RIME_API_KEY": "bench",
+            "RIME_URL": rime.url,
+            # Trust the stand-in's certificate
+            "SSL_CERT_FILE": cert,
+            "BOT_WORKER_CAPACITY": str(max(int(n) for n in args.sessions.split(",")) + 10),
+            "SODULAR_WAL_PATH": f"{tmp}/wal.db",
+        }
+        bot = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.server:app", "--host", "127.0.0.1", "--port", str(args.port),
+             "--log-level", "warning"],
+            env=env,
+        )
+        bot_url = f"http://127.0.0.1:{args.port}"
+        try:
+            async with aiohttp.ClientSession() as http:
+                for _ in range(120):
+                    try:
+                        async with http.get(f"{bot_url}/api/worker") as response:
+                            if response.status == 200:
+                                break
+                    except aiohttp.ClientError:
+                        pass
+                    await asyncio.sleep(0.5)
+                else:
+                    raise SystemExit("Bot server did not start")
+
+            print(f"Stand-in latency: LLM {args.llm_latency * 1000:.0f} ms, TTS {args.tts_latency * 1000:.0f} ms")
+            for sessions in (int(n) for n in args.sessions.split(",")):
+                await run_level(sessions, bot_url, utterance, gemini, rime)
+        finally:
+            bot.terminate()
+            try:
+                bot.wait(10)
+            except subprocess.TimeoutExpired:
+                bot.kill()
+                bot.wait()
+            await gemini.stop()
+            await rime.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,238 @@
+"""
+Dispatcher of the multi-process deployment
+Runs N bot workers (each a src.server process with its own event loop and
+GIL) and forwards /api/offer to them: renegotiations go to the worker owning
+the pc_id, new offers to the worker with the most free capacity. Metrics of
+all workers are merged at /metrics and /api/metrics
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple
+
+import aiohttp
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from src.services import metrics
+from src.services.session_registry import SessionRegistry
+
+# Seconds without heartbeat after which a worker is considered dead
+WORKER_TIMEOUT = 10
+
+# Worker response headers passed on to the client (Retry-After of a full worker)
+FORWARDED_HEADERS = ("Content-Type", "Retry-After", "Cache-Control")
+
+registry: Optional[SessionRegistry] = None
+http_session: Optional[aiohttp.ClientSession] = None
+
+# New offers sent to each worker since its last heartbeat, by worker id: (heartbeatAt, count).
+# The session count of that heartbeat does not include them yet
+pending_offers: Dict[str, Tuple[float, int]] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global registry, http_session
+    registry = SessionRegistry()
+    http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+    yield
+    await http_session.close()
+    registry.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins="*",
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def pending_sessions(worker: Dict[str, Any]) -> int:
+    """Offers sent to a worker that its last heartbeat does not count yet"""
+    heartbeat_at, count = pending_offers.get(worker["workerId"], (None, 0))
+    return count if heartbeat_at == worker["heartbeatAt"] else 0
+
+
+def add_pending(worker: Dict[str, Any], count: int):
+    pending_offers[worker["workerId"]] = (worker["heartbeatAt"], max(0, pending_sessions(worker) + count))
+
+
+def pick_worker(workers: List[Dict[str, Any]], exclude: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+    """Worker with the most free capacity (counting offers sent since its heartbeat), None when all are full"""
+    load = {w["workerId"]: w["sessions"] + pending_sessions(w) for w in workers}
+    candidates = [w for w in workers if w["workerId"] not in exclude and load[w["workerId"]] < w["capacity"]]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda w: (w["capacity"] - load[w["workerId"]], -load[w["workerId"]]))
+
+
+async def forward_offer(worker: Dict[str, Any], body: Dict[str, Any],
+                        query: str) -> Optional[Tuple[int, bytes, Dict[str, str]]]:
+    """Status, body and forwarded headers of a worker's answer, None when it is unreachable"""
+    url = f"{worker['url']}/api/offer"
+    if query:
+        url = f"{url}?{query}"
+    try:
+        async with http_session.post(url, json=body) as response:
+            content = await response.read()
+            headers = {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+            return response.status, content, headers
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ Worker {worker['workerId']} unreachable: {e}")
+        return None
+
+
+@app.post("/api/offer")
+async def dispatch_offer(request: Request):
+    """Forward a WebRTC offer to the worker that owns (or will own) the session"""
+    body = await request.json()
+    workers = {w["workerId"]: w for w in await asyncio.to_thread(registry.workers, WORKER_TIMEOUT)}
+
+    pc_id = body.get("pc_id")
+    owner_id = await asyncio.to_thread(registry.owner, pc_id) if pc_id else None
+    worker = workers.get(owner_id) if owner_id else None
+    if owner_id and worker is None:
+        # The owning worker died, its peer connection is gone: start over
+        print(f"⚠️ Worker {owner_id} owning {pc_id} is gone")
+        await asyncio.to_thread(registry.unregister, pc_id)
+
+    if worker is not None:
+        result = await forward_offer(worker, body, request.url.query)
+    else:
+        # A new session: a worker that is full or unreachable gets one retry on the next best
+        tried: Tuple[str, ...] = ()
+        for _ in range(2):
+            candidate = pick_worker(list(workers.values()), tried)
+            if candidate is None:
+                break
+            worker = candidate
+            add_pending(worker, 1)
+            result = await forward_offer(worker, body, request.url.query)
+            if result is not None and result[0] == 200:
+                break
+            add_pending(worker, -1)
+            if result is not None and result[0] != 503:
+                break
+            tried += (worker["workerId"],)
+        if worker is None:
+            return JSONResponse({"error": "All bot workers are at capacity"}, status_code=503,
+                                headers={"Retry-After": "5"})
+
+    if result is None:
+        return JSONResponse({"error": "Bot worker unreachable"}, status_code=502)
+    status, content, headers = result
+
+    try:
+        answer = json.loads(content) if status == 200 else None
+    except ValueError:
+        answer = None
+    if isinstance(answer, dict) and answer.get("pc_id"):
+        # The worker registers it too, doing it here makes the next renegotiation race-free
+        await asyncio.to_thread(registry.register, answer["pc_id"], worker["workerId"])
+    # Passed on unchanged, including a full worker's 503 and Retry-After
+    return Response(content, status_code=status, headers=headers)
+
+
+@app.get("/api/workers")
+async def list_workers():
+    """Load of every live worker"""
+    workers = await asyncio.to_thread(registry.workers, WORKER_TIMEOUT)
+    return {
+        "workers": workers,
+        "sessions": sum(w["sessions"] for w in workers),
+        "capacity": sum(w["capacity"] for w in workers),
+    }
+
+
+async def fetch_from_workers(path: str) -> Dict[str, str]:
+    """Body of GET `path` on every live worker, by worker id (workers that fail are left out)"""
+    workers = await asyncio.to_thread(registry.workers, WORKER_TIMEOUT)
+
+    async def fetch(worker):
+        try:
+            async with http_session.get(f"{worker['url']}{path}", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status == 200:
+                    return worker["workerId"], await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Worker {worker['workerId']} metrics unavailable: {e}")
+        return worker["workerId"], None
+
+    results = await asyncio.gather(*(fetch(worker) for worker in workers))
+    return {worker_id: text for worker_id, text in results if text is not None}
+
+
+@app.get("/api/metrics")
+async def worker_metrics():
+    """Admission counters, pools and load of every live worker"""
+    texts = await fetch_from_workers("/api/metrics")
+    return {"workers": {worker_id: json.loads(text) for worker_id, text in texts.items()}}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics of every live worker, with a `worker` label"""
+    texts = await fetch_from_workers("/metrics")
+    return PlainTextResponse(metrics.merge_rendered(texts), media_type="text/plain; version=0.0.4")
+
+
+def worker_path(path: str, index: int) -> str:
+    """Per-worker variant of a local file path: sodular_wal.db -> sodular_wal.worker-0.db"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker-{index}{extension}"
+
+
+def run_worker(index: int, host: str, port: int):
+    """Process entry point of one bot worker"""
+    import uvicorn
+
+    os.environ["BOT_WORKER_ID"] = f"worker-{index}"
+    os.environ["BOT_WORKER_URL"] = f"http://{host}:{port}"
+    # The write-ahead log and the request spill file are drained by their owner only:
+    # each worker gets its own, found again by the worker with the same index on restart
+    os.environ["SODULAR_WAL_PATH"] = worker_path(os.getenv("SODULAR_WAL_PATH", "sodular_wal.db"), index)
+    os.environ["REQUEST_SPILL_PATH"] = worker_path(os.getenv("REQUEST_SPILL_PATH", "pending_requests.jsonl"), index)
+    uvicorn.run("src.server:app", host=host, port=port, log_level="info")
+
+
+def run_cluster(workers: int, host: str = "0.0.0.0", port: int = 7860, worker_port: int = 7870):
+    """
+    Start `workers` bot workers on 127.0.0.1:worker_port+i and the dispatcher on host:port
+
+    WebRTC media flows directly between the browser and the worker owning
+    the peer connection, only signaling goes through the dispatcher.
+    """
+    import uvicorn
+
+    SessionRegistry().reset()
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for index in range(workers):
+        process = context.Process(target=run_worker, args=(index, "127.0.0.1", worker_port + index),
+                                  name=f"bot-worker-{index}")
+        process.start()
+        processes.append(process)
+
+    # Give the workers time to send their first heartbeat
+    deadline = time.monotonic() + 30
+    registry_view = SessionRegistry()
+    while len(registry_view.workers(WORKER_TIMEOUT)) < workers and time.monotonic() < deadline:
+        time.sleep(0.5)
+    registry_view.close()
+
+    try:
+        uvicorn.run(app, host=host, port=port, log_level="info")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(5)
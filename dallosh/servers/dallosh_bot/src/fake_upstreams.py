@@ -0,0 +1,221 @@
+"""
+Local stand-ins for the bot's upstream services, for benchmarks
+Speak enough of the Gemini Live (BidiGenerateContent) and Rime TTS (ws2)
+websocket protocols to run the bot pipeline, with configurable latency, and
+record when each session reaches each stage
+"""
+
+import asyncio
+import base64
+import json
+import math
+import re
+import ssl
+import subprocess
+import time
+from typing import Dict, Any, Optional
+
+import numpy as np
+from aiohttp import web, WSMsgType
+
+# Sessions are told apart by a "bench-<n>" tag in the user info of the system instruction
+TAG_PATTERN = re.compile(r"bench-(\d+)")
+
+
+def make_self_signed_cert(directory: str):
+    """Write cert.pem/key.pem for localhost (Gemini Live is only reached over wss), returns their paths"""
+    cert, key = f"{directory}/cert.pem", f"{directory}/key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+         "-days", "1", "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+class _Server:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        # Stage timestamps (time.time()) by session tag
+        self.events: Dict[str, Dict[str, float]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def record(self, tag: Optional[str], stage: str):
+        if tag is not None:
+            self.events.setdefault(tag, {}).setdefault(stage, time.time())
+
+    async def _serve(self, app: web.Application, sslContext: Optional[ssl.SSLContext] = None):
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port, ssl_context=sslContext)
+        await site.start()
+        # Pick up the actual port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class FakeGeminiLiveServer(_Server):
+    """
+    Gemini Live stand-in answering text turns
+
+    Replies to context turns (the greeting) and, using a simple energy
+    detector on the streamed audio, to each user utterance. Replies start
+    with "Hello bench-<n>." or "Answer bench-<n>." so the Rime stand-in
+    can tell sessions and turns apart.
+
+    Stages recorded: greeting_token, stand_in_vad_stop, first_llm_token.
+    stand_in_vad_stop is when this stand-in's energy detector saw
+    `silenceMs` of silence, not when the bot's Silero VAD emitted its
+    UserStoppedSpeakingFrame.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.3,
+                 tokenInterval: float = 0.03, silenceMs: int = 300, threshold: int = 500):
+        super().__init__(host, port)
+        self.latency = latency  # Seconds to the first token
+        self.tokenInterval = tokenInterval  # Seconds between tokens
+        self.silenceMs = silenceMs  # Audio below threshold that ends an utterance
+        self.threshold = threshold  # RMS of 16-bit samples counted as speech
+
+    @property
+    def baseUrl(self) -> str:
+        """Value for GEMINI_LIVE_BASE_URL: host and path of the websocket, as pipecat's base_url"""
+        return f"localhost:{self.port}/ws/google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent"
+
+    async def start(self, certFile: str, keyFile: str):
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certFile, keyFile)
+        app = web.Application()
+        app.router.add_get('/ws/{method}', self._session)
+        await self._serve(app, context)
+
+    async def _session(self, request: web.Request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        tag = None
+        speaking = False
+        silence = 0.0  # ms of quiet audio since the last speech
+        replies = set()
+
+        async def reply(kind: str, stage: str):
+            await asyncio.sleep(self.latency)
+            words = f"{kind} bench-{tag}. This is a test answer from the local stand-in.".split(" ")
+            self.record(tag, stage)
+            for word in words:
+                await ws.send_json({"serverContent": {"modelTurn": {"parts": [{"text": word + " "}]}}})
+                await asyncio.sleep(self.tokenInterval)
+            await ws.send_json({"serverContent": {"turnComplete": True}})
+
+        def spawn(coro):
+            task = asyncio.create_task(coro)
+            replies.add(task)
+            task.add_done_callback(replies.discard)
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT and msg.type != WSMsgType.BINARY:
+                continue
+            raw = msg.data if isinstance(msg.data, str) else msg.data.decode()
+            event = json.loads(raw)
+            if "setup" in event:
+                match = TAG_PATTERN.search(raw)
+                tag = match.group(1) if match else None
+                await ws.send_json({"setupComplete": {}})
+            elif "clientContent" in event or "client_content" in event:
+                content = event.get("clientContent") or event.get("client_content")
+                if content.get("turnComplete") or content.get("turn_complete"):
+                    spawn(reply("Hello", "greeting_token"))
+            elif "realtimeInput" in event or "realtime_input" in event:
+                for pcm, rate in self._audioChunks(event.get("realtimeInput") or event.get("realtime_input")):
+                    samples = np.frombuffer(pcm, dtype=np.int16)
+                    if not len(samples):
+                        continue
+                    rms = math.sqrt(np.mean(samples.astype(np.float32) ** 2))
+                    if rms >= self.threshold:
+                        speaking, silence = True, 0.0
+                    elif speaking:
+                        silence += len(samples) * 1000 / rate
+                        if silence >= self.silenceMs:
+                            speaking = False
+                            self.record(tag, "stand_in_vad_stop")
+                            spawn(reply("Answer", "first_llm_token"))
+        for task in list(replies):
+            task.cancel()
+        return ws
+
+    @staticmethod
+    def _audioChunks(realtime: Dict[str, Any]):
+        chunks = realtime.get("mediaChunks") or realtime.get("media_chunks") or []
+        if realtime.get("audio"):
+            chunks = [realtime["audio"]]
+        for chunk in chunks:
+            mime = chunk.get("mimeType") or chunk.get("mime_type") or ""
+            match = re.search(r"rate=(\d+)", mime)
+            yield base64.b64decode(chunk.get("data", "")), int(match.group(1)) if match else 16000
+
+
+class FakeRimeServer(_Server):
+    """
+    Rime TTS (ws2) stand-in streaming a tone for each text
+
+    Stages recorded: greeting_tts, first_tts_byte.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.15,
+                 secondsPerWord: float = 0.25):
+        super().__init__(host, port)
+        self.latency = latency  # Seconds to the first audio chunk
+        self.secondsPerWord = secondsPerWord
+
+    @property
+    def url(self) -> str:
+        """Value for RIME_URL"""
+        return f"ws://{self.host}:{self.port}/ws2"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws2', self._session)
+        await self._serve(app)
+
+    async def _session(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        rate = int(request.query.get("samplingRate") or 24000) or 24000
+        pending: Dict[str, str] = {}
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            event = json.loads(msg.data)
+            context_id = event.get("contextId")
+            if "text" in event:
+                pending[context_id] = pending.get(context_id, "") + event["text"]
+            if event.get("operation") in ("flush", "eos") or ("text" in event and event["text"].rstrip().endswith(".")):
+                text = pending.pop(context_id, "").strip()
+                if text:
+                    await self._speak(ws, context_id, text, rate)
+            elif event.get("operation") == "clear":
+                pending.clear()
+        return ws
+
+    async def _speak(self, ws: web.WebSocketResponse, contextId: str, text: str, rate: int):
+        match = TAG_PATTERN.search(text)
+        tag = match.group(1) if match else None
+        await asyncio.sleep(self.latency)
+        self.record(tag, "greeting_tts" if text.startswith("Hello") else "first_tts_byte")
+
+        words = text.split()
+        samples = int(len(words) * self.secondsPerWord * rate)
+        tone = (8000 * np.sin(2 * np.pi * 440 * np.arange(samples) / rate)).astype(np.int16)
+        chunk = rate // 10  # 100 ms
+        for start in range(0, samples, chunk):
+            data = base64.b64encode(tone[start:start + chunk].tobytes()).decode()
+            await ws.send_json({"type": "chunk", "data": data, "contextId": contextId})
+        ends = [(i + 1) * self.secondsPerWord for i in range(len(words))]
+        await ws.send_json({"type": "timestamps", "contextId": contextId, "word_timestamps": {
+            "words": words, "start": [end - self.secondsPerWord for end in ends], "end": ends}})
+        await ws.send_json({"type": "done", "contextId": contextId})
@@ -3,11 +3,11 @@ Sodular Python Client Library
 Exact Python equivalent of the JavaScript/TypeScript implementation
 """
 
-from .api.base_client import BaseClient
+from .api.base_client import BaseClient, ScopedClient
 from .api.auth import AuthAPI
 from .api.database import DatabaseAPI
 from .api.tables import TablesAPI
-from .api.ref import RefAPI
+from .api.ref import RefAPI, RefBatcher
 from .api.storage import StorageAPI
 from .api.buckets import BucketsAPI
 from .api.files import FilesAPI
@@ -19,10 +19,12 @@ from typing import Optional
 __all__ = [
     'SodularClient',
     'BaseClient',
+    'ScopedClient',
     'AuthAPI',
     'DatabaseAPI',
     'TablesAPI',
     'RefAPI',
+    'RefBatcher',
     'StorageAPI',
     'BucketsAPI',
     'FilesAPI',
@@ -35,6 +37,7 @@ class SodularClientInstance:
     
     def __init__(self, base_client: BaseClient, ai_api=None):
         self._base_client = base_client # Store base_client as a private attribute
+        self._ai_api = ai_api
         self.auth = AuthAPI(base_client)
         self.database = DatabaseAPI(base_client)
         self.tables = TablesAPI(base_client)
@@ -52,6 +55,13 @@ class SodularClientInstance:
         self.on = base_client.on
         self.off = base_client.off
         self.close = base_client.close # Expose close method
+        self.getPoolStats = base_client.getPoolStats
+        self.getCacheStats = base_client.getCacheStats
+        self.invalidateCache = base_client.invalidateCache
+        self.setCoalescing = base_client.setCoalescing
+        self.getCoalesceStats = base_client.getCoalesceStats
+        self.getCircuitStats = base_client.getCircuitStats
+        self.getWalStats = base_client.getWalStats
 
         # AI module if configured
         if ai_api:
@@ -68,6 +78,18 @@ class SodularClientInstance:
     def accessToken(self):
         """Get access token"""
         return self._base_client.accessToken
+    
+    def scoped(self, databaseId: Optional[str] = None, accessToken: Optional[str] = None,
+               refreshToken: Optional[str] = None) -> 'SodularClientInstance':
+        """
+        Get a client instance bound to its own database and auth context
+        
+        The returned instance shares this client's connection pool and caches,
+        so it is cheap to create per session or per call.
+        """
+        scope = self._base_client.scoped(databaseId, accessToken, refreshToken)
+        ai_api = AIAPI(scope, self._ai_api.baseUrl) if self._ai_api else None
+        return SodularClientInstance(scope, ai_api)
 
 
 def createClientInstance(base_client: BaseClient, ai_config=None):
@@ -97,7 +119,33 @@ def SodularClient(config):
         base_config = SodularClientConfig(
             base_url=config['baseUrl'],
             timeout=config.get('timeout', 30000),
-            enable_socket=config.get('enableSocket', True)
+            enable_socket=config.get('enableSocket', True),
+            table_cache_ttl=config.get('tableCacheTtl', 300000),
+            connector_limit=config.get('connectorLimit', 100),
+            connector_limit_per_host=config.get('connectorLimitPerHost', 0),
+            keepalive_timeout=config.get('keepaliveTimeout', 30000),
+            dns_cache_ttl=config.get('dnsCacheTtl', 300000),
+            token_refresh_margin=config.get('tokenRefreshMargin', 30000),
+            ref_batch_window=config.get('refBatchWindow', 0),
+            ref_batch_size=config.get('refBatchSize', 100),
+            json_thread_threshold=config.get('jsonThreadThreshold', 1048576),
+            json_codec=config.get('jsonCodec', 'auto'),
+            response_cache_ttl=config.get('responseCacheTtl', 0),
+            response_cache_size=config.get('responseCacheSize', 256),
+            response_cache_paths=config.get('responseCachePaths'),
+            coalesce_requests=config.get('coalesceRequests', False),
+            retries=config.get('retries', 2),
+            retry_base_delay=config.get('retryBaseDelay', 100),
+            retry_max_delay=config.get('retryMaxDelay', 2000),
+            circuit_failure_threshold=config.get('circuitFailureThreshold', 5),
+            circuit_reset_timeout=config.get('circuitResetTimeout', 10000),
+            endpoint_timeouts=config.get('endpointTimeouts'),
+            wal_path=config.get('walPath'),
+            wal_batch_size=config.get('walBatchSize', 100),
+            wal_flush_interval=config.get('walFlushInterval', 200),
+            unique_creates=config.get('uniqueCreates', False),
+            bulk_writes=config.get('bulkWrites'),
+            idempotency_keys=config.get('idempotencyKeys', False)
         )
         
         # Create base client
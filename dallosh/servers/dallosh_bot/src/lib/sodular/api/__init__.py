@@ -1,20 +1,24 @@
 # Export all API modules
-from .base_client import BaseClient
+from .base_client import BaseClient, ScopedClient
 from .auth import AuthAPI
 from .database import DatabaseAPI
 from .tables import TablesAPI
-from .ref import RefAPI
+from .ref import RefAPI, RefBatcher
 from .storage import StorageAPI
 from .buckets import BucketsAPI
 from .files import FilesAPI
+from .wal import WriteAheadLog
 
 __all__ = [
     'BaseClient',
+    'ScopedClient',
     'AuthAPI', 
     'DatabaseAPI',
     'TablesAPI',
     'RefAPI',
+    'RefBatcher',
     'StorageAPI',
     'BucketsAPI',
-    'FilesAPI'
+    'FilesAPI',
+    'WriteAheadLog'
 ]
@@ -4,7 +4,6 @@ Exact Python equivalent of ai/index.ts
 """
 
 import asyncio
-import json
 from typing import Dict, Any, Optional, Callable
 from ..base_client import BaseClient
 
@@ -51,14 +50,14 @@ class AIAPI:
             
             async with self.client.session.post(url, json=request_data, headers=headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await response.json(loads=self.client.codec.loads)
                 elif response.status == 401:
                     # Try to refresh token
-                    refreshed = await self._refreshToken()
+                    refreshed = await self._refreshToken(headers)
                     if refreshed:
                         headers['Authorization'] = f"Bearer {self.client.accessToken}"
                         async with self.client.session.post(url, json=request_data, headers=headers) as retry_response:
-                            return await retry_response.json()
+                            return await retry_response.json(loads=self.client.codec.loads)
                     else:
                         return {"error": "Authentication failed"}
                 else:
@@ -88,14 +87,14 @@ class AIAPI:
             
             async with self.client.session.post(url, json=request_data, headers=headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await response.json(loads=self.client.codec.loads)
                 elif response.status == 401:
                     # Try to refresh token
-                    refreshed = await self._refreshToken()
+                    refreshed = await self._refreshToken(headers)
                     if refreshed:
                         headers['Authorization'] = f"Bearer {self.client.accessToken}"
                         async with self.client.session.post(url, json=request_data, headers=headers) as retry_response:
-                            return await retry_response.json()
+                            return await retry_response.json(loads=self.client.codec.loads)
                     else:
                         return {"error": "Authentication failed"}
                 else:
@@ -126,7 +125,7 @@ class AIAPI:
                     await self._processStream(response, callbacks)
                 elif response.status == 401:
                     # Try to refresh token
-                    refreshed = await self._refreshToken()
+                    refreshed = await self._refreshToken(headers)
                     if refreshed:
                         headers['Authorization'] = f"Bearer {self.client.accessToken}"
                         async with self.client.session.post(url, json=request_data, headers=headers) as retry_response:
@@ -148,11 +147,11 @@ class AIAPI:
             async for line in response.content:
                 if line:
                     try:
-                        data = json.loads(line.decode('utf-8'))
+                        data = self.client.codec.loads(line)
                         if callbacks.onData:
                             # JavaScript calls onData(parsed.data)
                             callbacks.onData(data.get('data', data))
-                    except json.JSONDecodeError:
+                    except ValueError:
                         # Skip invalid JSON lines
                         continue
             
@@ -163,11 +162,13 @@ class AIAPI:
             if callbacks.onError:
                 callbacks.onError(str(error) or "Stream processing failed")
     
-    async def _refreshToken(self) -> bool:
-        """Refresh access token - EXACTLY like JavaScript"""
+    async def _refreshToken(self, headers: Dict[str, str]) -> bool:
+        """Refresh access token through the client's single-flight coordinator"""
         try:
-            if hasattr(self.client, 'performTokenRefresh'):
-                return await self.client.performTokenRefresh()
+            # Token the rejected request was sent with
+            failed_token = headers.get('Authorization', '')[len('Bearer '):] or None
+            if hasattr(self.client, 'refreshAccessToken'):
+                return await self.client.refreshAccessToken(failed_token)
             return False
         except Exception:
             return False
@@ -4,22 +4,95 @@ Exact Python equivalent of base-client.ts
 """
 
 import asyncio
+import contextvars
 import json
 import re
-from typing import Optional, Dict, Any, List, Callable, Literal
+import time
+from typing import Optional, Dict, Any, List, Callable, Literal, AsyncIterator, Union
 import aiohttp
 import socketio
 from ..types.schema import ApiResponse, AuthTokens
-from ..utils import build_query_params, build_api_url, storage, TOKEN_KEYS
+from .cache import ResponseCache, resource_of, is_cacheable
+from .resilience import RetryPolicy, CircuitBreaker, IDEMPOTENT_METHODS, RETRYABLE_STATUSES, endpoint_timeout
+from .streaming import JsonArrayStreamParser
+from .wal import WriteAheadLog
+from ..utils import build_query_params, build_api_url, decode_jwt_payload, storage, TOKEN_KEYS
+from ..utils.codec import JsonCodec, get_codec
+from ..utils.deadline import remaining_ms
+
+# Refresh endpoint, never refreshed/replayed itself
+REFRESH_TOKEN_PATH = '/auth/refresh-token'
+
+# Socket events announcing data changes, they invalidate the response cache
+CHANGE_EVENTS = ('replaced', 'patched', 'deleted')
 
 
 class SodularClientConfig:
     """Configuration class for Sodular client"""
     
-    def __init__(self, base_url: str, timeout: int = 30000, enable_socket: bool = True):
+    def __init__(self, base_url: str, timeout: int = 30000, enable_socket: bool = True,
+                 table_cache_ttl: int = 300000, connector_limit: int = 100,
+                 connector_limit_per_host: int = 0, keepalive_timeout: int = 30000,
+                 dns_cache_ttl: int = 300000, token_refresh_margin: int = 30000,
+                 ref_batch_window: int = 0, ref_batch_size: int = 100,
+                 json_thread_threshold: int = 1048576, json_codec: Union[str, JsonCodec] = 'auto',
+                 response_cache_ttl: int = 0, response_cache_size: int = 256,
+                 response_cache_paths: Optional[List[str]] = None, coalesce_requests: bool = False,
+                 retries: int = 2, retry_base_delay: int = 100, retry_max_delay: int = 2000,
+                 circuit_failure_threshold: int = 5, circuit_reset_timeout: int = 10000,
+                 endpoint_timeouts: Optional[Dict[str, int]] = None, wal_path: Optional[str] = None,
+                 wal_batch_size: int = 100, wal_flush_interval: int = 200, unique_creates: bool = False,
+                 bulk_writes: Optional[bool] = None, idempotency_keys: bool = False):
         self.baseUrl = base_url
         self.timeout = timeout
         self.enableSocket = enable_socket
+        # How long (ms) a resolved table name -> uid stays cached
+        self.tableCacheTtl = table_cache_ttl
+        # HTTP transport (connection pool) settings, shared by every request
+        self.connectorLimit = connector_limit  # Max open connections, 0 = unlimited
+        self.connectorLimitPerHost = connector_limit_per_host  # Max per host, 0 = unlimited
+        self.keepaliveTimeout = keepalive_timeout  # Idle connection lifetime in ms
+        self.dnsCacheTtl = dns_cache_ttl  # Resolved host cache in ms, 0 = no cache
+        # Refresh the access token this many ms before its JWT `exp`
+        self.tokenRefreshMargin = token_refresh_margin
+        # Coalesce ref create() calls issued within this many ms, 0 = disabled
+        self.refBatchWindow = ref_batch_window
+        self.refBatchSize = ref_batch_size  # Max refs per bulk create
+        # Response bodies this large (bytes) are JSON-decoded in a worker thread, 0 = never
+        self.jsonThreadThreshold = json_thread_threshold
+        # JSON codec: 'auto' (orjson/msgspec when installed), 'orjson', 'msgspec', 'stdlib' or a JsonCodec
+        self.jsonCodec = json_codec
+        # Cache GET responses of these (metadata) paths for this many ms, 0 = disabled
+        self.responseCacheTtl = response_cache_ttl
+        self.responseCacheSize = response_cache_size
+        self.responseCachePaths = response_cache_paths if response_cache_paths is not None else [
+            '/tables', '/database', '/storage', '/buckets'
+        ]
+        # Share one HTTP call between identical GETs issued while it is in flight
+        self.coalesceRequests = coalesce_requests
+        # Retries of idempotent requests on network errors / 429 / 502-504 (delays in ms)
+        self.retries = retries
+        self.retryBaseDelay = retry_base_delay
+        self.retryMaxDelay = retry_max_delay
+        # Fail fast after this many consecutive failures, for this many ms (0 = never)
+        self.circuitFailureThreshold = circuit_failure_threshold
+        self.circuitResetTimeout = circuit_reset_timeout
+        # Per-endpoint timeouts in ms by path prefix, e.g. {'/ref': 5000}, others use `timeout`
+        self.endpointTimeouts = endpoint_timeouts or {}
+        # Local sqlite write-ahead log for durable ref writes, None = disabled
+        self.walPath = wal_path
+        self.walBatchSize = wal_batch_size  # Max writes per drained request
+        self.walFlushInterval = wal_flush_interval  # ms between drain rounds
+        # The server checks the `unique` param of POST /ref atomically (create-if-absent),
+        # off by default: other backends ignore it and would store duplicates
+        self.uniqueCreates = unique_creates
+        # The server has POST/PATCH/DELETE /ref/bulk: True always uses it, False never, None tries it
+        # and sends one request per item from the first 404/405 on (servers without the route)
+        self.bulkWrites = bulk_writes
+        # The server replays the response of a repeated Idempotency-Key header instead of applying
+        # the write again, off by default: the write-ahead log then sends one write per request and
+        # looks up a resent create before sending it again
+        self.idempotencyKeys = idempotency_keys
 
 
 class BaseClient:
@@ -36,6 +109,39 @@ class BaseClient:
         self.session: Optional[aiohttp.ClientSession] = None
         self.timeout = config.timeout
         self.enableSocket = config.enableSocket
+        self.tableCacheTtl = config.tableCacheTtl
+        self.connectorLimit = config.connectorLimit
+        self.connectorLimitPerHost = config.connectorLimitPerHost
+        self.keepaliveTimeout = config.keepaliveTimeout
+        self.dnsCacheTtl = config.dnsCacheTtl
+        self.tokenRefreshMargin = config.tokenRefreshMargin
+        self.refBatchWindow = config.refBatchWindow
+        self.refBatchSize = config.refBatchSize
+        self.jsonThreadThreshold = config.jsonThreadThreshold
+        self.codec = get_codec(config.jsonCodec)
+        self.responseCache: Optional[ResponseCache] = (
+            ResponseCache(config.responseCacheTtl, config.responseCacheSize)
+            if config.responseCacheTtl > 0 else None
+        )
+        self.responseCachePaths = set(config.responseCachePaths)
+        self.coalesceRequests = config.coalesceRequests
+        # In-flight GETs by request key, shared by every scope of this client
+        self.inflightRequests: Dict[Any, asyncio.Task] = {}
+        self.coalesceStats = {"issued": 0, "collapsed": 0}
+        self.retryPolicy = RetryPolicy(config.retries, config.retryBaseDelay, config.retryMaxDelay)
+        self.circuitBreaker = CircuitBreaker(config.circuitFailureThreshold, config.circuitResetTimeout)
+        self.endpointTimeouts = config.endpointTimeouts
+        self.retryStats = {"retries": 0}
+        self.uniqueCreates = config.uniqueCreates
+        self.idempotencyKeys = config.idempotencyKeys
+        # Server features found out while running, shared by every scope of this client
+        self.capabilities: Dict[str, Optional[bool]] = {'bulk': config.bulkWrites}
+        self.writeAheadLog: Optional[WriteAheadLog] = (
+            WriteAheadLog(self, config.walPath, config.walBatchSize, config.walFlushInterval)
+            if config.walPath else None
+        )
+        # Table name -> uid cache shared by every TablesAPI (and scope) of this client
+        self.tableIdCache: Dict[Any, Any] = {}
         
         # Create axios equivalent using aiohttp
         self.axiosInstance = self
@@ -52,25 +158,28 @@ class BaseClient:
         print(f"🔌 BaseClient.connect() called for URL: {self.baseUrl}")
         
         try:
+            # Create the persistent pooled session first so the health check
+            # warms up a keep-alive connection that API calls then reuse
+            print("🔧 Creating persistent aiohttp session...")
+            self.session = self._createSession()
+            print("✅ Persistent session created")
+            
+            # Drain writes logged while the client was offline or stopped
+            if self.writeAheadLog:
+                await self.writeAheadLog.start()
+            
             # Test connection with health check
             print("🏥 Testing connection with health check...")
-            async with aiohttp.ClientSession() as test_session:
-                health_url = f"{self.baseUrl}/health"
-                print(f"🔍 Health check URL: {health_url}")
-                
-                async with test_session.get(health_url) as response:
-                    print(f"📊 Health check response status: {response.status}")
-                    if response.status != 200:
-                        raise Exception(f"Health check failed with status {response.status}")
+            health_url = f"{self.baseUrl}/health"
+            print(f"🔍 Health check URL: {health_url}")
             
-            print("✅ Health check passed")
+            async with self.session.get(health_url) as response:
+                print(f"📊 Health check response status: {response.status}")
+                if response.status != 200:
+                    raise Exception(f"Health check failed with status {response.status}")
+                await response.read()
             
-            # Create persistent session
-            print("🔧 Creating persistent aiohttp session...")
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=self.timeout / 1000)
-            )
-            print("✅ Persistent session created")
+            print("✅ Health check passed")
             
             # Connect to socket server only if enabled
             if self.enableSocket:
@@ -97,6 +206,41 @@ class BaseClient:
                 "error": str(error) or "Failed to connect to Sodular backend"
             }
     
+    def _createSession(self) -> aiohttp.ClientSession:
+        """Create the pooled, keep-alive aware session used for all requests"""
+        dns_cache_ttl = self.dnsCacheTtl / 1000 if self.dnsCacheTtl else None
+        connector = aiohttp.TCPConnector(
+            limit=self.connectorLimit,
+            limit_per_host=self.connectorLimitPerHost,
+            keepalive_timeout=self.keepaliveTimeout / 1000,
+            use_dns_cache=dns_cache_ttl is not None,
+            ttl_dns_cache=dns_cache_ttl,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            json_serialize=self.codec.dumps,
+            timeout=aiohttp.ClientTimeout(total=self.timeout / 1000)
+        )
+    
+    def getPoolStats(self) -> Dict[str, Any]:
+        """Get connection pool statistics (in use, idle, waiters)"""
+        connector = self.session.connector if self.session else None
+        if connector is None or connector.closed:
+            return {"inUse": 0, "idle": 0, "waiters": 0,
+                    "limit": self.connectorLimit, "limitPerHost": self.connectorLimitPerHost}
+        
+        # aiohttp does not expose these counters publicly
+        acquired = getattr(connector, '_acquired', ())
+        conns = getattr(connector, '_conns', {})
+        waiters = getattr(connector, '_waiters', {})
+        return {
+            "inUse": len(acquired),
+            "idle": sum(len(c) for c in conns.values()),
+            "waiters": sum(len(w) for w in waiters.values()),
+            "limit": connector.limit,
+            "limitPerHost": connector.limit_per_host,
+        }
+    
     def getSocketUrl(self) -> str:
         """Extract host URL from API base URL for socket connection"""
         try:
@@ -134,12 +278,27 @@ class BaseClient:
             async def connect_error(data):
                 print(f"Socket connection error: {data}")
             
+            # Drop cached responses when the server announces changes
+            for event in CHANGE_EVENTS:
+                self.socket.on(event, self._withCacheInvalidation(None))
+            
             # Note: In Python, we'll connect when needed rather than immediately
             # This maintains the same interface as the JavaScript version
             
         except Exception as error:
             print(f"Failed to connect to socket server: {error}")
     
+    def scoped(self, databaseId: Optional[str] = None, accessToken: Optional[str] = None,
+               refreshToken: Optional[str] = None) -> 'ScopedClient':
+        """
+        Create a lightweight client context with its own database and auth state
+        
+        The scope shares this client's pooled session, socket and caches, but
+        `use()`/`setToken()` on it never touch this client or the global storage,
+        so concurrent sessions can each work in their own scope.
+        """
+        return ScopedClient(self, databaseId, accessToken, refreshToken)
+    
     def use(self, databaseId: Optional[str] = None):
         """Set the current database context"""
         self.currentDatabaseId = databaseId
@@ -186,8 +345,41 @@ class BaseClient:
     def on(self, event: str, callback: Callable):
         """Listen to events on a channel"""
         if self.socket and self.enableSocket:
+            if event in CHANGE_EVENTS:
+                # Replaces the default handler, keep invalidating the cache
+                callback = self._withCacheInvalidation(callback)
             self.socket.on(event, callback)
     
+    def _withCacheInvalidation(self, callback: Optional[Callable]) -> Callable:
+        """Wrap a change event handler so it also invalidates the response cache"""
+        async def handler(data=None):
+            if self.responseCache:
+                database_id = data.get('database_id') if isinstance(data, dict) else None
+                self.responseCache.invalidate(databaseId=database_id)
+            self._invalidateTableIds(data)
+            if callback:
+                result = callback(data)
+                if asyncio.iscoroutine(result):
+                    await result
+        return handler
+    
+    def _invalidateTableIds(self, data: Any):
+        """Drop cached table ids of the tables a change event announces (renamed or deleted)"""
+        records = data if isinstance(data, list) else [data]
+        uids = {record.get('uid') for record in records if isinstance(record, dict)}
+        for key, (uid, _) in list(self.tableIdCache.items()):
+            if uid in uids:
+                del self.tableIdCache[key]
+    
+    def invalidateCache(self, resource: Optional[str] = None, databaseId: Optional[str] = None):
+        """Drop cached responses (all, or of one resource and/or database)"""
+        if self.responseCache:
+            self.responseCache.invalidate(resource, databaseId)
+    
+    def getCacheStats(self) -> Dict[str, int]:
+        """Get response cache statistics (size, hits, misses, revalidated)"""
+        return self.responseCache.stats() if self.responseCache else {}
+    
     def off(self, event: str, callback: Optional[Callable] = None):
         """Remove event listener"""
         if self.socket and self.enableSocket:
@@ -214,11 +406,11 @@ class BaseClient:
             if self.currentDatabaseId:
                 query += f"&database_id={self.currentDatabaseId}"
             
-            url = build_api_url(self.baseUrl, '/auth/refresh-token', query)
+            url = build_api_url(self.baseUrl, REFRESH_TOKEN_PATH, query)
             
             async with self.session.post(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=self.codec.loads)
                     response_data = data.get('data', {})
                     tokens = response_data.get('tokens')
                     
@@ -230,12 +422,54 @@ class BaseClient:
                     self.clearTokens()
                     self.isRefreshing = False
                     return False
+                
+                await response.read()
+                self.isRefreshing = False
+                return False
                     
         except Exception:
             self.clearTokens()
             self.isRefreshing = False
             return False
     
+    async def refreshAccessToken(self, failedToken: Optional[str] = None) -> bool:
+        """
+        Refresh the access token once for all concurrent callers (single-flight)
+        
+        Callers arriving while a refresh is in flight await the same future.
+        
+        Args:
+            failedToken: The access token the caller was rejected with. If the
+                current token already differs, another caller refreshed it and
+                no new refresh is made.
+        """
+        if self.refreshPromise is not None:
+            return await asyncio.shield(self.refreshPromise)
+        
+        if failedToken is not None and self.accessToken and self.accessToken != failedToken:
+            return True
+        
+        if not self.refreshToken:
+            return False
+        
+        self.refreshPromise = asyncio.get_running_loop().create_future()
+        refreshed = False
+        try:
+            refreshed = bool(await self.performTokenRefresh())
+            return refreshed
+        finally:
+            # Always release waiters, even if the refresh was cancelled
+            self.refreshPromise.set_result(refreshed)
+            self.refreshPromise = None
+    
+    def _tokenExpiresSoon(self, token: Optional[str]) -> bool:
+        """Check whether a JWT access token expires within the refresh margin"""
+        payload = decode_jwt_payload(token) if token else None
+        exp = payload.get('exp') if payload else None
+        if not isinstance(exp, (int, float)):
+            return False
+        return exp * 1000 - time.time() * 1000 < self.tokenRefreshMargin
+    
     async def request(self, method: Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE'], path: str, options: Dict[str, Any] = None) -> ApiResponse:
         """Make HTTP request - EXACTLY like JavaScript"""
         if options is None:
@@ -244,45 +478,274 @@ class BaseClient:
         if not self.session:
             return {"error": "Client not connected. Call connect() first."}
         
+        if method != 'GET' or not self.coalesceRequests:
+            return await self._sendRequest(method, path, options)
+        
+        # Identical GETs already in flight share its response (treat it as read-only)
+        key = ResponseCache.key(method, path, options.get('params'), self.currentDatabaseId,
+                                self._principal())
+        task = self.inflightRequests.get(key)
+        if task is not None:
+            self.coalesceStats["collapsed"] += 1
+        else:
+            self.coalesceStats["issued"] += 1
+            # The shared call runs in an empty context under the endpoint timeout only:
+            # the deadline of whichever caller came first must not cut it short for the others
+            shared = {name: value for name, value in options.items() if name != 'timeout'}
+            task = contextvars.Context().run(asyncio.ensure_future, self._sendRequest(method, path, shared))
+            self.inflightRequests[key] = task
+            task.add_done_callback(lambda _: self.inflightRequests.pop(key, None))
+        
+        # Each caller waits within its own budget (options['timeout'] or its deadline scope)
+        budget = options.get('timeout')
+        scope_remaining = remaining_ms()
+        if scope_remaining is not None:
+            if scope_remaining <= 0:
+                return {"error": "Deadline exceeded", "deadlineExceeded": True}
+            budget = min(budget, scope_remaining) if budget else scope_remaining
+        # Shielded so one cancelled or timed out caller does not cancel the call for the others
+        if budget is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), budget / 1000)
+        except asyncio.TimeoutError:
+            return {"error": f"Deadline exceeded after {int(budget)} ms", "deadlineExceeded": True}
+    
+    def getWalStats(self) -> Dict[str, int]:
+        """Get write-ahead log statistics (appended, sent, pending, dead...)"""
+        return self.writeAheadLog.getStats() if self.writeAheadLog else {}
+    
+    def getCircuitStats(self) -> Dict[str, Any]:
+        """Get circuit breaker state and retry statistics"""
+        return {**self.circuitBreaker.stats(), **self.retryStats}
+    
+    def setCoalescing(self, enabled: bool):
+        """Turn in-flight GET coalescing on or off for this client"""
+        self.coalesceRequests = enabled
+    
+    def getCoalesceStats(self) -> Dict[str, int]:
+        """Get request coalescing statistics (GETs issued, GETs collapsed onto them)"""
+        return {**self.coalesceStats, "inflight": len(self.inflightRequests)}
+    
+    async def _sendRequest(self, method: str, path: str, options: Dict[str, Any]) -> ApiResponse:
+        """Send one HTTP request, see request()"""
         try:
             data = options.get('data')
-            params = options.get('params', {})
             config = options.get('config', {})
+            url = self._buildUrl(path, options.get('params'))
             
-            # Add database context if available - EXACTLY like JavaScript
-            if self.currentDatabaseId:
-                params['database_id'] = self.currentDatabaseId
+            # Serve metadata reads from the response cache when possible
+            cache = self.responseCache
+            cache_key = None
+            cached = None
+            if cache and method == 'GET' and path in self.responseCachePaths:
+                cache_key = cache.key(method, path, options.get('params'), self.currentDatabaseId,
+                                      self._principal())
+                cached = cache.get(cache_key)
+                if cached and cached.fresh:
+                    cache.hits += 1
+                    return cached.value
+                cache.misses += 1
+            elif cache and method != 'GET':
+                # Writes make cached reads of the same resource stale
+                cache.invalidate(resource_of(path), self.currentDatabaseId)
             
-            # Build URL with full base URL since we don't have axios baseURL
-            query_params = build_query_params(params)
-            url = build_api_url(self.baseUrl, path, query_params)
+            can_refresh = path != REFRESH_TOKEN_PATH
             
-            # Set up headers with authentication
-            headers = {}
-            if self.accessToken:
-                headers['Authorization'] = f'Bearer {self.accessToken}'
+            # Fail fast while the backend is known to be down
+            breaker = self.circuitBreaker
+            if not breaker.allow():
+                return {"error": f"Service unavailable, retry in {breaker.retryAfter():.1f}s"}
             
-                           # Make request using aiohttp - EXACTLY like JavaScript
-                async with self.session.request(
-                   method=method,
-                   url=url,
-                   json=data,
-                   headers=headers,
-                   **config
-                ) as response:
-                   # Check for successful status codes (2xx range)
-                    if 200 <= response.status < 300:
-                       return await response.json()
+            # Refresh proactively when the access token is about to expire
+            if can_refresh and self.refreshToken and self._tokenExpiresSoon(self.accessToken):
+                await self.refreshAccessToken(self.accessToken)
+            
+            # All attempts share one deadline: the endpoint timeout, capped by the caller's budget
+            # (options['timeout'] or the remaining time of the enclosing deadline scope)
+            endpoint_budget = endpoint_timeout(path, self.endpointTimeouts, self.timeout)
+            budget = endpoint_budget
+            if options.get('timeout'):
+                budget = min(budget, options['timeout'])
+            scope_remaining = remaining_ms()
+            if scope_remaining is not None:
+                if scope_remaining <= 0:
+                    return {"error": "Deadline exceeded", "deadlineExceeded": True}
+                budget = min(budget, int(scope_remaining))
+            deadline = time.monotonic() + budget / 1000
+            
+            # Only requests that are safe to send twice are retried
+            idempotency_key = options.get('idempotencyKey')
+            retryable = method in IDEMPOTENT_METHODS or options.get('idempotent') or idempotency_key
+            retries = self.retryPolicy.retries if retryable else 0
+            retry = 0
+            replayed = False
+            
+            while True:
+                # Set up headers with authentication
+                headers = {}
+                sent_token = self.accessToken
+                if sent_token:
+                    headers['Authorization'] = f'Bearer {sent_token}'
+                if idempotency_key:
+                    headers['Idempotency-Key'] = idempotency_key
+                if cached and cached.etag:
+                    # Revalidate the stale entry instead of downloading it again
+                    headers['If-None-Match'] = cached.etag
+                
+                remaining = deadline - time.monotonic()
+                attempt_config = dict(config)
+                attempt_config.setdefault('timeout', aiohttp.ClientTimeout(total=max(remaining, 0.001)))
+                status = None
+                error = None
+                try:
+                    # Make request using aiohttp - EXACTLY like JavaScript
+                    async with self.session.request(
+                        method=method,
+                        url=url,
+                        json=data,
+                        headers=headers,
+                        **attempt_config
+                    ) as response:
+                        if response.status == 304 and cached:
+                            await response.read()
+                            breaker.recordSuccess()
+                            cache.touch(cache_key)
+                            return cached.value
+                        # Check for successful status codes (2xx range)
+                        if 200 <= response.status < 300:
+                            result = await self._decodeJson(response)
+                            breaker.recordSuccess()
+                            if cache_key and is_cacheable(result):
+                                cache.set(cache_key, result, response.headers.get('ETag'))
+                            if retry and method not in IDEMPOTENT_METHODS and isinstance(result, dict):
+                                # An earlier attempt of this write may have been applied
+                                result['retried'] = True
+                            return result
+                        # Drain the body so the connection goes back to the pool
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    error = exc
+                
+                # A request rejected with 401 is replayed once after a refresh
+                if (status == 401 and not replayed and can_refresh and self.refreshToken
+                        and await self.refreshAccessToken(sent_token)):
+                    replayed = True
+                    continue
+                
+                if (error is not None or status in RETRYABLE_STATUSES) and retry < retries:
+                    delay = self.retryPolicy.delay(retry + 1)
+                    if time.monotonic() + delay < deadline:
+                        retry += 1
+                        self.retryStats["retries"] += 1
+                        await asyncio.sleep(delay)
+                        continue
+                
+                # A timeout under a budget shorter than the endpoint's says nothing about the backend
+                caller_timeout = isinstance(error, asyncio.TimeoutError) and budget < endpoint_budget
+                # Network errors and 5xx mean the backend is unhealthy, 4xx do not
+                if not caller_timeout:
+                    if error is not None or status >= 500:
+                        breaker.recordFailure()
                     else:
-                       return {"error": f"Request failed with status {response.status}"}
+                        breaker.recordSuccess()
+                
+                if caller_timeout:
+                    return {"error": f"Deadline exceeded after {budget} ms", "deadlineExceeded": True}
+                if isinstance(error, asyncio.TimeoutError):
+                    return {"error": f"Request timed out after {budget} ms"}
+                if error is not None:
+                    return {"error": f"Network error: {str(error)}"}
+                return {"error": f"Request failed with status {status}", "status": status}
                     
-        except aiohttp.ClientError as error:
-            return {"error": f"Network error: {str(error)}"}
         except Exception as error:
             return {"error": str(error) or "Request failed"}
     
+    async def requestStream(self, method: Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE'], path: str,
+                            options: Dict[str, Any] = None) -> AsyncIterator[Any]:
+        """
+        Make HTTP request and yield the records of the response `data` array
+        as they arrive, without buffering the whole body
+        
+        Unlike request(), failures raise instead of returning {"error": ...},
+        since records may already have been yielded.
+        """
+        if options is None:
+            options = {}
+        
+        if not self.session:
+            raise RuntimeError("Client not connected. Call connect() first.")
+        
+        url = self._buildUrl(path, options.get('params'))
+        
+        if self.refreshToken and self._tokenExpiresSoon(self.accessToken):
+            await self.refreshAccessToken(self.accessToken)
+        
+        # Nothing has been yielded before the status is known, so a 401 can be replayed
+        for attempt in range(2):
+            headers = {}
+            sent_token = self.accessToken
+            if sent_token:
+                headers['Authorization'] = f'Bearer {sent_token}'
+            
+            async with self.session.request(
+                method=method,
+                url=url,
+                json=options.get('data'),
+                headers=headers,
+                **options.get('config', {})
+            ) as response:
+                if 200 <= response.status < 300:
+                    parser = JsonArrayStreamParser()
+                    async for chunk in response.content.iter_any():
+                        for record in parser.feed(chunk):
+                            yield record
+                    parser.close()
+                    return
+                await response.read()
+                status = response.status
+            
+            if (status == 401 and attempt == 0 and self.refreshToken
+                    and await self.refreshAccessToken(sent_token)):
+                continue
+            raise RuntimeError(f"Request failed with status {status}")
+    
+    def _principal(self) -> Optional[str]:
+        """Identify who the current token authenticates, for cache keys"""
+        if not self.accessToken:
+            return None
+        payload = decode_jwt_payload(self.accessToken) or {}
+        return payload.get('uid') or payload.get('sub') or self.accessToken
+    
+    def _buildUrl(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build the full request URL with the database context"""
+        # Copy so the database context never leaks into the caller's dict
+        params = dict(params or {})
+        
+        # Add database context if available - EXACTLY like JavaScript
+        if self.currentDatabaseId:
+            params['database_id'] = self.currentDatabaseId
+        
+        # Build URL with full base URL since we don't have axios baseURL
+        return build_api_url(self.baseUrl, path, build_query_params(params, self.codec))
+    
+    async def _decodeJson(self, response: aiohttp.ClientResponse) -> Any:
+        """Decode a JSON body, off the event loop when it is large"""
+        body = await response.read()
+        if not body.strip():
+            return None
+        if self.jsonThreadThreshold and len(body) >= self.jsonThreadThreshold:
+            return await asyncio.to_thread(self.codec.loads, body)
+        return self.codec.loads(body)
+    
     async def close(self):
         """Close the client and cleanup resources"""
+        if self.writeAheadLog:
+            # Logged writes not sent yet are drained on the next connect()
+            await self.writeAheadLog.stop()
+            self.writeAheadLog.close()
+        
         try:
             if self.socket and self.enableSocket:
                 await self.socket.disconnect()
@@ -299,3 +762,56 @@ class BaseClient:
         
         # Clear tokens
         self.clearTokens()
+
+
+
+class ScopedClient(BaseClient):
+    """
+    Per-call database and auth context sharing a parent BaseClient's session
+    
+    Every BaseClient method runs against the scope's own database id and
+    tokens; anything the scope does not set itself (session, config, socket,
+    caches) is read from the parent.
+    """
+    
+    def __init__(self, parent: BaseClient, databaseId: Optional[str] = None,
+                 accessToken: Optional[str] = None, refreshToken: Optional[str] = None):
+        # BaseClient.__init__ is not called: configuration and session are shared
+        self._parent = parent
+        self.currentDatabaseId = databaseId
+        self.accessToken = accessToken
+        self.refreshToken = refreshToken
+        self.isRefreshing = False
+        self.refreshPromise: Optional[asyncio.Future] = None
+        self.axiosInstance = self
+    
+    def __getattr__(self, name):
+        # Only called for attributes the scope does not have itself
+        return getattr(self._parent, name)
+    
+    def scoped(self, databaseId: Optional[str] = None, accessToken: Optional[str] = None,
+               refreshToken: Optional[str] = None) -> 'ScopedClient':
+        """Create a sibling scope on the same parent client"""
+        return ScopedClient(self._parent, databaseId, accessToken, refreshToken)
+    
+    def use(self, databaseId: Optional[str] = None):
+        """Set the database context for this scope only"""
+        self.currentDatabaseId = databaseId
+    
+    def setToken(self, accessToken: str):
+        """Set the access token for this scope only"""
+        self.accessToken = accessToken
+    
+    def setTokens(self, accessToken: str, refreshToken: str):
+        """Set both tokens for this scope only"""
+        self.accessToken = accessToken
+        self.refreshToken = refreshToken
+    
+    def clearTokens(self):
+        """Clear this scope's tokens"""
+        self.accessToken = None
+        self.refreshToken = None
+    
+    async def close(self):
+        """Scopes do not own the session, closing one only clears its tokens"""
+        self.clearTokens()
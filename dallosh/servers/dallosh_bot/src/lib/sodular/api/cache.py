@@ -0,0 +1,121 @@
+"""
+Response cache for Sodular client
+LRU + TTL cache of idempotent GET responses with ETag revalidation
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class CacheEntry:
+    """One cached response"""
+
+    __slots__ = ('value', 'etag', 'expiresAt', 'resource', 'databaseId')
+
+    def __init__(self, value: Any, etag: Optional[str], expiresAt: float,
+                 resource: str, databaseId: Optional[str]):
+        self.value = value
+        self.etag = etag
+        self.expiresAt = expiresAt
+        self.resource = resource
+        self.databaseId = databaseId
+
+    @property
+    def fresh(self) -> bool:
+        return self.expiresAt > time.monotonic()
+
+
+def resource_of(path: str) -> str:
+    """Resource a path belongs to: '/tables/query' -> 'tables'"""
+    return path.strip('/').split('/', 1)[0]
+
+
+def is_cacheable(value: Any) -> bool:
+    """
+    Whether a response may be cached: negative answers (no data, empty list)
+    are not, so a table created elsewhere is found on the next lookup
+    """
+    return isinstance(value, dict) and value.get('data') not in (None, [], {})
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache for GET responses
+
+    Entries are keyed by (method, path, normalized params, database id,
+    auth principal). Expired entries that carry an ETag are kept so they can
+    be revalidated with If-None-Match instead of downloaded again.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: int, maxSize: int = 256):
+        self.ttl = ttl  # ms
+        self.maxSize = maxSize
+        self._entries: 'OrderedDict[Tuple, CacheEntry]' = OrderedDict()
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @staticmethod
+    def key(method: str, path: str, params: Optional[Dict[str, Any]],
+            databaseId: Optional[str], principal: Optional[str]) -> Tuple:
+        """Build a cache key, independent of params ordering"""
+        normalized = json.dumps(params or {}, sort_keys=True, default=str)
+        return (method, path, normalized, databaseId, principal)
+
+    def get(self, key: Tuple) -> Optional[CacheEntry]:
+        """Get an entry (fresh or stale-with-ETag) and mark it recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.fresh and not entry.etag:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Tuple, value: Any, etag: Optional[str] = None):
+        """Store a response, evicting the least recently used entries"""
+        path, databaseId = key[1], key[3]
+        self._entries[key] = CacheEntry(value, etag, time.monotonic() + self.ttl / 1000,
+                                        resource_of(path), databaseId)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+
+    def touch(self, key: Tuple):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        entry = self._entries.get(key)
+        if entry:
+            entry.expiresAt = time.monotonic() + self.ttl / 1000
+            self.revalidated += 1
+
+    def invalidate(self, resource: Optional[str] = None, databaseId: Optional[str] = None):
+        """
+        Drop cached responses
+
+        Args:
+            resource: Only drop this resource ('tables', 'database', ...), all if None
+            databaseId: Only drop entries of this database, all databases if None
+        """
+        for key, entry in list(self._entries.items()):
+            if resource is not None and entry.resource != resource:
+                continue
+            if databaseId is not None and entry.databaseId != databaseId:
+                continue
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
@@ -0,0 +1,123 @@
+"""
+Paginated query iteration for Sodular client
+Shared by the Ref and Tables query APIs
+"""
+
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncIterator, List, Tuple
+from ..types.schema import ApiResponse
+
+# Marker for "no keyset cursor yet" (None is a valid sort value)
+_START = object()
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    """Read a dotted path ('data.createdAt') from a row"""
+    for part in path.split('.'):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _parse_page(response: ApiResponse, requested: int) -> Tuple[List[Any], bool]:
+    """Extract (rows, hasMore) from a QueryResult or plain list response"""
+    if not response or response.get('error'):
+        raise RuntimeError(f"Query failed: {(response or {}).get('error', 'empty response')}")
+
+    data = response.get('data')
+    has_more = None
+    if isinstance(data, dict):
+        rows = data.get('data') or []
+        has_more = data.get('hasMore')
+    elif isinstance(data, list):
+        rows = data
+    else:
+        rows = []
+
+    # Without a hasMore flag, a full page means there may be more
+    if has_more is None:
+        has_more = len(rows) >= requested
+    return rows, bool(has_more)
+
+
+async def iterate_query(
+    query: Callable[[Dict[str, Any]], Awaitable[ApiResponse]],
+    options: Optional[Dict[str, Any]] = None,
+    pageSize: int = 100,
+    sortKey: Optional[str] = None,
+    sortOrder: int = 1,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """
+    Iterate over every row of a paginated query
+
+    At most two pages are held in memory: while the rows of one page are
+    consumed, the next page is already being fetched.
+
+    Args:
+        query: Function sending one page request (e.g. RefAPI.query)
+        options: Query options; `limit` caps the total number of rows yielded
+        pageSize: Rows requested per page
+        sortKey: Dotted path to paginate on with a keyset cursor
+            (`{sortKey: {'$gt': last}}`) instead of offsets. Use a unique,
+            sortable key the backend can filter and sort on.
+        sortOrder: 1 for ascending, -1 for descending keyset order
+        prefetch: Fetch the next page while the current one is consumed
+    """
+    options = dict(options or {})
+    total_limit = options.pop('limit', None)
+    base_filter = options.get('filter') or {}
+    offset = options.pop('offset', None) or 0
+    yielded = 0
+
+    def page_options(offset: int, after: Any, consumed: int) -> Dict[str, Any]:
+        size = pageSize if total_limit is None else min(pageSize, total_limit - consumed)
+        page = {**options, 'limit': size}
+        if sortKey:
+            page['sort'] = {sortKey: sortOrder}
+            if after is not _START:
+                cursor = {sortKey: {'$gt' if sortOrder > 0 else '$lt': after}}
+                page['filter'] = {'$and': [base_filter, cursor]} if base_filter else cursor
+        else:
+            page['offset'] = offset
+        return page
+
+    def fetch(offset: int, after: Any, consumed: int) -> Tuple[asyncio.Task, int]:
+        page = page_options(offset, after, consumed)
+        return asyncio.ensure_future(query(page)), page['limit']
+
+    if total_limit is not None and total_limit <= 0:
+        return
+
+    pending: Optional[Tuple[asyncio.Task, int]] = fetch(offset, _START, 0)
+    try:
+        while pending:
+            task, requested = pending
+            rows, has_more = _parse_page(await task, requested)
+            pending = None
+
+            if total_limit is not None:
+                rows = rows[:total_limit - yielded]
+                has_more = has_more and yielded + len(rows) < total_limit
+
+            next_page = None
+            if has_more and rows:
+                next_offset = offset + len(rows)
+                after = _get_path(rows[-1], sortKey) if sortKey else _START
+                next_page = (next_offset, after, yielded + len(rows))
+                if prefetch:
+                    pending = fetch(*next_page)
+
+            for row in rows:
+                yielded += 1
+                yield row
+
+            if next_page:
+                offset = next_page[0]
+                if not prefetch:
+                    pending = fetch(*next_page)
+    finally:
+        # Consumer stopped early, drop the prefetched page
+        if pending and not pending[0].done():
+            pending[0].cancel()
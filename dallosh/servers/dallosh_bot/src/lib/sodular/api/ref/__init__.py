@@ -3,13 +3,141 @@ Reference API for Sodular client
 Exact Python equivalent of ref/index.ts
 """
 
-from typing import Dict, Any, Optional, Callable
+import asyncio
+from typing import Dict, Any, Optional, Callable, List, Tuple, Set, AsyncIterator
 from ..base_client import BaseClient
+from ..pagination import iterate_query
+from ..resilience import BULK_UNSUPPORTED_STATUSES
+from ...utils import get_path
 from ...types.schema import (
     ApiResponse, QueryOptions, QueryResult, CountResult, UpdateResult, 
     DeleteResult, DeleteOptions, Ref, CreateRefRequest, UpdateRefRequest
 )
 
+async def send_bulk(client: BaseClient, method: str, tableId: str, data: List[Any],
+                    params: Dict[str, Any] = None) -> Optional[ApiResponse]:
+    """
+    Send one /ref/bulk request, None when the server has no bulk route
+    
+    The caller then sends one request per item, and reports how they went
+    with `bulk_missing()` so later calls skip the bulk attempt.
+    """
+    if client.capabilities.get('bulk') is False:
+        return None
+    response = await client.request(method, '/ref/bulk', {
+        'params': {**(params or {}), 'table_id': tableId},
+        'data': data
+    })
+    if (client.capabilities.get('bulk') is None and isinstance(response, dict)
+            and response.get('status') in BULK_UNSUPPORTED_STATUSES):
+        return None
+    return response
+
+
+def bulk_missing(client: BaseClient, responses: List[ApiResponse]):
+    """Stop trying /ref/bulk once a per-item request worked where it answered 404/405"""
+    if client.capabilities.get('bulk') is None and any(
+            isinstance(response, dict) and 'error' not in response for response in responses):
+        client.capabilities['bulk'] = False
+        print("⚠️ The server has no /ref/bulk route, sending items one by one")
+
+
+def merge_results(responses: List[ApiResponse]) -> ApiResponse:
+    """Combine per-item update/delete responses like one bulk response: counts summed, lists joined"""
+    merged: Dict[str, Any] = {}
+    for response in responses:
+        data = response.get('data') if isinstance(response, dict) else None
+        for key, value in (data.items() if isinstance(data, dict) else ()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+            elif isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+    result: ApiResponse = {'data': merged}
+    errors = [response['error'] for response in responses if isinstance(response, dict) and 'error' in response]
+    if errors:
+        result['error'] = errors[0]
+    return result
+
+
+class RefBatcher:
+    """
+    Coalesces individual ref creates into bulk creates
+    
+    Creates queued for the same table within `window` ms (or until `maxSize`
+    refs are queued) are sent as one POST /ref/bulk request, and each caller
+    gets back its own `{'data': ref}` or `{'error': ...}` response. Without
+    a bulk route on the server, the batch is sent one create at a time.
+    """
+    
+    def __init__(self, client: BaseClient, window: int, maxSize: int = 100):
+        self.client = client
+        self.window = window
+        self.maxSize = maxSize
+        self._pending: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._sending: Set[asyncio.Task] = set()
+        # Round trip accounting
+        self.itemsQueued = 0
+        self.requestsSent = 0
+    
+    def create(self, tableId: str, data: CreateRefRequest) -> asyncio.Future:
+        """Queue a create, the returned future resolves to its API response"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(tableId, [])
+        batch.append((data, future))
+        self.itemsQueued += 1
+        
+        if len(batch) >= self.maxSize:
+            self._flushTable(tableId)
+        elif tableId not in self._timers:
+            self._timers[tableId] = loop.call_later(self.window / 1000, self._flushTable, tableId)
+        return future
+    
+    async def flush(self):
+        """Send every queued create now and wait for all in-flight batches"""
+        for tableId in list(self._pending):
+            self._flushTable(tableId)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+    
+    def _flushTable(self, tableId: str):
+        timer = self._timers.pop(tableId, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(tableId, None)
+        if batch:
+            task = asyncio.create_task(self._send(tableId, batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+    
+    async def _send(self, tableId: str, batch: List[Tuple[Any, asyncio.Future]]):
+        self.requestsSent += 1
+        try:
+            response = await send_bulk(self.client, 'POST', tableId, [data for data, _ in batch])
+            if response is None:
+                responses = await asyncio.gather(*[
+                    self.client.request('POST', '/ref', {'params': {'table_id': tableId}, 'data': data})
+                    for data, _ in batch
+                ])
+                self.requestsSent += len(batch) - 1
+                bulk_missing(self.client, responses)
+                for (_, future), item_response in zip(batch, responses):
+                    if not future.done():
+                        future.set_result(item_response)
+                return
+        except Exception as error:
+            response = {"error": str(error) or "Bulk create failed"}
+        
+        refs = response.get('data') if response else None
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if isinstance(refs, list) and len(refs) == len(batch):
+                future.set_result({"data": refs[i]})
+            else:
+                future.set_result({"error": (response or {}).get('error') or "Bulk create failed"})
+
 
 class RefAPI:
     """Exact Python equivalent of RefAPI class"""
@@ -18,6 +146,7 @@ class RefAPI:
         self.client = client
         self.currentTableId: Optional[str] = None
         self.currentDatabaseId: Optional[str] = None
+        self._batcher: Optional[RefBatcher] = None
     
     def __getattr__(self, name):
         """Handle the 'from' method call since it's a reserved keyword in Python"""
@@ -32,6 +161,9 @@ class RefAPI:
         self.currentDatabaseId = getattr(self.client, 'currentDatabaseId', None)
         return self
     
+    # Pythonic spelling of from(), e.g. client.ref.from_(tableId)
+    from_ = _from_method
+    
     def on(self, event: str, callback: Callable):
         """
         Listen to events for the current table
@@ -88,14 +220,137 @@ class RefAPI:
         if not self.currentTableId:
             raise ValueError("Table ID is required. Use from(tableId) first.")
     
-    async def create(self, data: CreateRefRequest) -> ApiResponse:
-        """Create a new reference - EXACTLY like JavaScript"""
+    async def create(self, data: CreateRefRequest, durable: bool = False) -> ApiResponse:
+        """
+        Create a new reference - EXACTLY like JavaScript
+        
+        With `durable=True` (requires `walPath`) the write is stored in the local
+        write-ahead log and acknowledged right away with its idempotency key:
+        `{'data': {'idempotencyKey': ..., 'queued': True}}`.
+        """
         self._checkTableId()
+        if durable:
+            return await self._logWrite('create', data)
+        # Coalesce with other creates into one bulk request when batching is enabled
+        if getattr(self.client, 'refBatchWindow', 0) > 0 and self.client.capabilities.get('bulk') is not False:
+            return await self._getBatcher().create(self.currentTableId, data)
         return await self.client.request('POST', '/ref', {
             'params': {'table_id': self.currentTableId},  # JavaScript uses table_id
             'data': data
         })
     
+    async def createIfAbsent(self, data: CreateRefRequest, uniqueKeys: List[str],
+                             durable: bool = False) -> ApiResponse:
+        """
+        Create a reference unless one with the same unique fields exists
+        
+        Existing refs are matched on the `uniqueKeys` dotted paths (e.g.
+        ['data.name']) and answered as `{'data': existing, 'existed': True}`
+        instead of creating a duplicate. By default this is a get() followed
+        by a create(). With the `uniqueCreates` client option, the server does
+        the check atomically with the create in one round trip; the request is
+        then safe to retry, and an `existed` answer flagged `retried` may be an
+        earlier attempt of this very call.
+        
+        With `durable=True` the write is logged like create(), and the log
+        checks for an existing ref before sending it, so a first attempt that
+        was stored despite a timeout or 5xx is not created twice.
+        """
+        self._checkTableId()
+        if durable:
+            return await self._logWrite('createIfAbsent', {'data': data, 'uniqueKeys': uniqueKeys})
+        if getattr(self.client, 'uniqueCreates', False):
+            return await self.client.request('POST', '/ref', {
+                'params': {'table_id': self.currentTableId, 'unique': uniqueKeys},
+                'data': data,
+                'idempotent': True,
+            })
+        
+        existing = await self.get({'filter': {key: get_path(data, key) for key in uniqueKeys}})
+        if 'error' in existing:
+            return existing
+        if existing.get('data') and existing['data'].get('uid'):
+            return {'data': existing['data'], 'existed': True}
+        return await self.create(data)
+    
+    async def bulkCreate(self, items: List[CreateRefRequest]) -> ApiResponse:
+        """
+        Create many references in one request
+        
+        Servers without the /ref/bulk route (see the `bulkWrites` client
+        option) get one request per item; so do bulkPatch() and bulkDelete().
+        """
+        self._checkTableId()
+        table_id = self.currentTableId
+        response = await send_bulk(self.client, 'POST', table_id, items)
+        if response is not None:
+            return response
+        responses = await asyncio.gather(*[
+            self.client.request('POST', '/ref', {'params': {'table_id': table_id}, 'data': item})
+            for item in items
+        ])
+        bulk_missing(self.client, responses)
+        result: ApiResponse = {'data': [response.get('data') for response in responses]}
+        errors = [response['error'] for response in responses if 'error' in response]
+        if errors:
+            result['error'] = errors[0]
+        return result
+    
+    async def bulkPatch(self, updates: List[Dict[str, Any]]) -> ApiResponse:
+        """
+        Partially update many references in one request
+        
+        Args:
+            updates: List of {'filter': {...}, 'data': UpdateRefRequest}
+        """
+        self._checkTableId()
+        table_id = self.currentTableId
+        response = await send_bulk(self.client, 'PATCH', table_id, updates)
+        if response is not None:
+            return response
+        responses = await asyncio.gather(*[
+            self.client.request('PATCH', '/ref', {
+                'params': {'filter': update['filter'], 'table_id': table_id}, 'data': update['data']
+            })
+            for update in updates
+        ])
+        bulk_missing(self.client, responses)
+        return merge_results(responses)
+    
+    async def bulkDelete(self, filters: List[Dict[str, Any]], options: DeleteOptions = None) -> ApiResponse:
+        """Delete the references matching each filter in one request"""
+        self._checkTableId()
+        table_id = self.currentTableId
+        response = await send_bulk(self.client, 'DELETE', table_id, filters, {'options': options})
+        if response is not None:
+            return response
+        responses = await asyncio.gather(*[
+            self.client.request('DELETE', '/ref', {
+                'params': {'filter': filter_dict, 'options': options, 'table_id': table_id}
+            })
+            for filter_dict in filters
+        ])
+        bulk_missing(self.client, responses)
+        return merge_results(responses)
+    
+    async def flush(self):
+        """Send any creates still waiting in the batching window"""
+        if self._batcher:
+            await self._batcher.flush()
+    
+    async def _logWrite(self, op: str, payload: Dict[str, Any]) -> ApiResponse:
+        """Store a write in the client's write-ahead log"""
+        wal = getattr(self.client, 'writeAheadLog', None)
+        if wal is None:
+            return {"error": "Durable writes require the walPath client option"}
+        key = await wal.append(op, self.currentTableId, payload, self.client)
+        return {"data": {"idempotencyKey": key, "queued": True}}
+    
+    def _getBatcher(self) -> RefBatcher:
+        if self._batcher is None:
+            self._batcher = RefBatcher(self.client, self.client.refBatchWindow, self.client.refBatchSize)
+        return self._batcher
+    
     async def get(self, options: Dict[str, Any]) -> ApiResponse:
         """Get reference by filter - EXACTLY like JavaScript"""
         self._checkTableId()
@@ -110,6 +365,41 @@ class RefAPI:
             'params': {**options, 'table_id': self.currentTableId}  # JavaScript uses table_id
         })
     
+    def queryStream(self, options: QueryOptions) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Query references, yielding each one as soon as it is decoded
+        
+        The response is parsed incrementally instead of being buffered, so
+        large result pages stay cheap in memory. Raises on request errors.
+        """
+        self._checkTableId()
+        return self.client.requestStream('GET', '/ref/query', {
+            'params': {**options, 'table_id': self.currentTableId}
+        })
+    
+    def iterQuery(self, options: QueryOptions = None, pageSize: int = 100,
+                  sortKey: Optional[str] = None, sortOrder: int = 1) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all references matching a query, page by page
+        
+        The next page is prefetched while the current one is consumed. Pass
+        `sortKey` (e.g. 'uid') to paginate with a keyset cursor instead of
+        offsets. See `iterate_query` for details.
+        
+        Usage:
+            async for ref in client.ref.from_(tableId).iterQuery({'filter': {...}}, pageSize=500):
+                ...
+        """
+        self._checkTableId()
+        table_id = self.currentTableId
+        
+        async def query_page(page_options: Dict[str, Any]) -> ApiResponse:
+            return await self.client.request('GET', '/ref/query', {
+                'params': {**page_options, 'table_id': table_id}
+            })
+        
+        return iterate_query(query_page, options, pageSize, sortKey, sortOrder)
+    
     async def count(self, options: Dict[str, Any] = None) -> ApiResponse:
         """Count references with optional filter - EXACTLY like JavaScript"""
         self._checkTableId()
@@ -127,9 +417,12 @@ class RefAPI:
             'data': data
         })
     
-    async def patch(self, filter_dict: Dict[str, Any], data: UpdateRefRequest) -> ApiResponse:
-        """Update reference (partial) - EXACTLY like JavaScript"""
+    async def patch(self, filter_dict: Dict[str, Any], data: UpdateRefRequest,
+                    durable: bool = False) -> ApiResponse:
+        """Update reference (partial) - EXACTLY like JavaScript, see create() for `durable`"""
         self._checkTableId()
+        if durable:
+            return await self._logWrite('patch', {'filter': filter_dict, 'data': data})
         return await self.client.request('PATCH', '/ref', {
             'params': {'filter': filter_dict, 'table_id': self.currentTableId},  # JavaScript uses table_id
             'data': data
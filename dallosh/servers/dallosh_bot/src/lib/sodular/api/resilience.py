@@ -0,0 +1,119 @@
+"""
+Resilience helpers for Sodular client
+Retry policy with jittered exponential backoff and a circuit breaker
+"""
+
+import random
+import time
+from typing import Dict, Any, Optional
+
+# Methods that are safe to send twice
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+
+# Statuses worth retrying: the server may succeed on the next attempt
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+# Statuses of a server without the /ref/bulk route
+BULK_UNSUPPORTED_STATUSES = (404, 405)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter
+
+    Delay before retry n (1-based) is a random value in
+    [0, min(maxDelay, baseDelay * 2 ** (n - 1))] ms.
+    """
+
+    def __init__(self, retries: int = 2, baseDelay: int = 100, maxDelay: int = 2000):
+        self.retries = retries  # Extra attempts after the first one
+        self.baseDelay = baseDelay  # ms
+        self.maxDelay = maxDelay  # ms
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1-based)"""
+        cap = min(self.maxDelay, self.baseDelay * (2 ** (retry - 1)))
+        return random.uniform(0, cap) / 1000
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the Sodular backend
+
+    Closed: requests flow, consecutive failures are counted.
+    Open: after `failureThreshold` consecutive failures requests fail fast
+    for `resetTimeout` ms.
+    Half-open: then a single trial request is let through; success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failureThreshold: int = 5, resetTimeout: int = 10000):
+        self.failureThreshold = failureThreshold  # 0 = never open
+        self.resetTimeout = resetTimeout  # ms
+        self.state = self.CLOSED
+        self.failures = 0
+        self.openedAt = 0.0
+        self._trialStartedAt = 0.0  # 0 = no trial request in flight
+        # Statistics
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.openedAt < self.resetTimeout / 1000:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._trialStartedAt = 0.0
+        # Half-open: only one trial request at a time (a lost trial expires)
+        now = time.monotonic()
+        if self._trialStartedAt and now - self._trialStartedAt < self.resetTimeout / 1000:
+            self.rejected += 1
+            return False
+        self._trialStartedAt = now
+        return True
+
+    def recordSuccess(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trialStartedAt = 0.0
+
+    def recordFailure(self):
+        self.failures += 1
+        self._trialStartedAt = 0.0
+        if self.state == self.HALF_OPEN or (
+                self.failureThreshold and self.failures >= self.failureThreshold):
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.openedAt = time.monotonic()
+
+    def retryAfter(self) -> float:
+        """Seconds until an open circuit lets a trial request through"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.resetTimeout / 1000 - (time.monotonic() - self.openedAt))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+def endpoint_timeout(path: str, timeouts: Dict[str, int], default: int) -> int:
+    """Timeout (ms) for a path: longest matching prefix in `timeouts`, else default"""
+    best: Optional[str] = None
+    for prefix in timeouts:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return timeouts[best] if best is not None else default
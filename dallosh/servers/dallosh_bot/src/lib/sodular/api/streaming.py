@@ -0,0 +1,137 @@
+"""
+Streaming JSON decoding for Sodular client
+Yields the records of a response's `data` array while the body is downloading
+"""
+
+import codecs
+import json
+from typing import Any, List, Tuple
+
+# Where query responses keep their records: {"data": [...]} or {"data": {"data": [...]}}
+DEFAULT_ARRAY_PATHS: Tuple[Tuple[str, ...], ...] = (('data',), ('data', 'data'))
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for the records array of a JSON response
+
+    Feed it body chunks as they arrive; each call returns the records that are
+    complete so far. Only the unparsed tail of the body is kept in memory.
+
+    Usage:
+        parser = JsonArrayStreamParser()
+        async for chunk in response.content.iter_any():
+            for record in parser.feed(chunk):
+                ...
+        parser.close()
+    """
+
+    def __init__(self, paths: Tuple[Tuple[str, ...], ...] = DEFAULT_ARRAY_PATHS):
+        self.paths = paths
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'seek'  # 'seek' -> 'items' -> 'done'
+        # Seek state: open containers as [kind, current key]
+        self._stack: List[list] = []
+        self._inString = False
+        self._escape = False
+        self._stringStart = 0
+        self._lastString = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a body chunk and return the records completed by it"""
+        self._buffer += self._text.decode(chunk)
+        if self._state == 'seek':
+            self._seek()
+        if self._state == 'items':
+            return self._items()
+        return []
+
+    def close(self):
+        """Finish parsing, raising if the records array was truncated"""
+        self._buffer += self._text.decode(b'', final=True)
+        if self._state == 'items':
+            raise ValueError("Truncated JSON response: records array not closed")
+
+    def _seek(self):
+        """Scan the envelope until the opening bracket of the records array"""
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._inString:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._inString = False
+                    self._lastString = buffer[self._stringStart:i]
+            elif c == '"':
+                self._inString = True
+                self._stringStart = i + 1
+            elif c == ':':
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][1] = self._lastString
+            elif c == ',':
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][1] = None
+            elif c == '{':
+                self._stack.append(['{', None])
+            elif c == '[':
+                path = tuple(entry[1] for entry in self._stack)
+                if all(entry[0] == '{' for entry in self._stack) and path in self.paths:
+                    self._state = 'items'
+                    self._buffer = buffer[i + 1:]
+                    self._pos = 0
+                    return
+                self._stack.append(['[', None])
+            elif c in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    # Document closed without a records array
+                    self._state = 'done'
+                    self._buffer = ''
+                    self._pos = 0
+                    return
+            i += 1
+        self._pos = i
+
+    def _items(self) -> List[Any]:
+        """Decode every complete record currently buffered"""
+        buffer = self._buffer
+        pos = self._pos
+        records = []
+        while True:
+            i = pos
+            while i < len(buffer) and (buffer[i] in _WHITESPACE or buffer[i] == ','):
+                i += 1
+            if i >= len(buffer):
+                break
+            if buffer[i] == ']':
+                self._state = 'done'
+                pos = i + 1
+                break
+            try:
+                record, end = self._decoder.raw_decode(buffer, i)
+            except json.JSONDecodeError:
+                break  # Record not fully received yet
+            # A record is only complete once its delimiter has arrived
+            # (a number at the end of the buffer may still be growing)
+            j = end
+            while j < len(buffer) and buffer[j] in _WHITESPACE:
+                j += 1
+            if j >= len(buffer) or buffer[j] not in ',]':
+                break
+            records.append(record)
+            pos = end
+
+        # Drop what has been consumed
+        self._buffer = '' if self._state == 'done' else buffer[pos:]
+        self._pos = 0
+        return records
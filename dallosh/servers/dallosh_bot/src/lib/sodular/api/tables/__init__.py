@@ -3,8 +3,10 @@ Tables API for Sodular client
 Exact Python equivalent of tables/index.ts
 """
 
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Tuple, AsyncIterator
 from ..base_client import BaseClient
+from ..pagination import iterate_query
 from ...types.schema import (
     ApiResponse, QueryOptions, QueryResult, CountResult, UpdateResult, 
     DeleteResult, DeleteOptions, Table, CreateTableRequest, UpdateTableRequest
@@ -16,6 +18,54 @@ class TablesAPI:
     
     def __init__(self, client: BaseClient):
         self.client = client
+        # Table name -> uid resolution cache: {(database_id, name): (uid, expires_at)}
+        # Lives on the client so every scope of the same connection shares it
+        self._idCache: Dict[Tuple[Optional[str], str], Tuple[str, float]] = client.tableIdCache
+    
+    async def resolveId(self, name: str, refresh: bool = False) -> Optional[str]:
+        """
+        Resolve a table name to its uid in the current database
+        
+        Resolved ids are cached per database for `tableCacheTtl` ms, so
+        repeated lookups of the same table cost no round trip.
+        
+        Args:
+            name: Table name (matched against data.name)
+            refresh: Bypass the cache and query the server
+        """
+        key = (self.client.currentDatabaseId, name)
+        cached = self._idCache.get(key)
+        if cached and not refresh and cached[1] > time.monotonic():
+            return cached[0]
+        
+        response = await self.get({'filter': {'data.name': name}})
+        table = response.get('data') if response else None
+        # Server may answer with a single table or a list of tables
+        if isinstance(table, list):
+            table = table[0] if table else None
+        uid = table.get('uid') if isinstance(table, dict) else None
+        
+        if uid:
+            self._idCache[key] = (uid, time.monotonic() + self.client.tableCacheTtl / 1000)
+        else:
+            self._idCache.pop(key, None)
+        return uid
+    
+    def invalidateId(self, name: Optional[str] = None, databaseId: Optional[str] = None):
+        """
+        Drop cached table ids
+        
+        Args:
+            name: Only drop this table name (all names if None)
+            databaseId: Database to drop from (current database if None)
+        """
+        if databaseId is None:
+            databaseId = self.client.currentDatabaseId
+        for key in list(self._idCache):
+            if key[0] == databaseId and (name is None or key[1] == name):
+                del self._idCache[key]
+        # The lookup response may also be held by the response cache
+        self.client.invalidateCache('tables', databaseId)
     
     async def exists(self, tableId: str) -> ApiResponse:
         """Check if table exists"""
@@ -35,6 +85,15 @@ class TablesAPI:
         """Query tables with options"""
         return await self.client.request('GET', '/tables/query', {'params': options})
     
+    def queryStream(self, options: QueryOptions) -> AsyncIterator[Dict[str, Any]]:
+        """Query tables, yielding each one as soon as it is decoded"""
+        return self.client.requestStream('GET', '/tables/query', {'params': options})
+    
+    def iterQuery(self, options: QueryOptions = None, pageSize: int = 100,
+                  sortKey: Optional[str] = None, sortOrder: int = 1) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all tables matching a query, prefetching the next page"""
+        return iterate_query(self.query, options, pageSize, sortKey, sortOrder)
+    
     async def count(self, options: Dict[str, Any] = None) -> ApiResponse:
         """Count tables with optional filter"""
         if options is None:
@@ -43,12 +102,23 @@ class TablesAPI:
     
     async def put(self, filter_dict: Dict[str, Any], data: UpdateTableRequest) -> ApiResponse:
         """Update table (replace)"""
-        return await self.client.request('PUT', '/tables', {'params': {'filter': filter_dict}, 'data': data})
+        try:
+            return await self.client.request('PUT', '/tables', {'params': {'filter': filter_dict}, 'data': data})
+        finally:
+            # A replace can rename the table, drop cached ids for this database once it landed
+            # (also on errors, the write may have been applied)
+            self.invalidateId()
     
     async def patch(self, filter_dict: Dict[str, Any], data: UpdateTableRequest) -> ApiResponse:
         """Update table (partial)"""
-        return await self.client.request('PATCH', '/tables', {'params': {'filter': filter_dict}, 'data': data})
+        try:
+            return await self.client.request('PATCH', '/tables', {'params': {'filter': filter_dict}, 'data': data})
+        finally:
+            self.invalidateId()
     
     async def delete(self, filter_dict: Dict[str, Any], options: DeleteOptions = None) -> ApiResponse:
         """Delete table"""
-        return await self.client.request('DELETE', '/tables', {'params': {'filter': filter_dict, 'options': options}})
+        try:
+            return await self.client.request('DELETE', '/tables', {'params': {'filter': filter_dict, 'options': options}})
+        finally:
+            self.invalidateId()
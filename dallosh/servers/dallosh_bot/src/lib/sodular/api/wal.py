@@ -0,0 +1,374 @@
+"""
+Write-ahead log for Sodular client
+Ref writes are acknowledged once stored in a local sqlite log, then drained
+to the server in order per table, in batches when the server has idempotency keys
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, List, Tuple
+from .resilience import BULK_UNSUPPORTED_STATUSES
+from ..utils import get_path
+from ..utils.codec import get_codec
+
+# Statuses a failed write is worth retrying on (backend down, overloaded, or timed out)
+RETRYABLE_STATUSES = (408, 425, 429)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    database_id TEXT,
+    table_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    batch_key TEXT,
+    access_token TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    created_at INTEGER NOT NULL
+)
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS entries_table ON entries (status, database_id, table_id, seq)"
+
+
+class WriteAheadLog:
+    """
+    Durable local queue of ref creates and patches
+
+    `append()` stores a write and returns its idempotency key without any
+    network round trip. A background task drains the log: tables are
+    drained independently, and a table whose write fails is retried with
+    backoff before any later write to it is sent.
+
+    Each send gets a key stored with its entries before it goes out, so a
+    write that is retried after a crash or timeout is known to be a resend.
+    When the server replays repeated Idempotency-Key headers (the client's
+    `idempotencyKeys`), consecutive writes of the same kind to a table are
+    sent as one bulk request, and a resent batch goes out identically with
+    the same key. Otherwise each write is sent on its own: creates carry a
+    uid given when they are logged, and a resent create is looked up by
+    that uid before it is created again. Patches are resent as they are.
+    Writes the server rejects (4xx) are kept with status 'dead' for
+    inspection and `requeueDead()`.
+
+    The log file is private (0600) and stores the access token each write
+    is sent with, never the refresh token: a write whose token expired
+    before it could be sent is rejected and kept as 'dead'. sqlite runs in
+    a worker thread, off the event loop. `client` may be None to inspect a
+    log without connecting (`listEntries`, `getStats`, `requeueDead`).
+    """
+
+    def __init__(self, client, path: str, batchSize: int = 100, flushInterval: int = 200,
+                 retryDelay: int = 1000, maxRetryDelay: int = 30000):
+        self.client = client
+        self.codec = client.codec if client else get_codec()
+        self.path = path
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval  # ms between drain rounds when idle
+        self.retryDelay = retryDelay  # ms
+        self.maxRetryDelay = maxRetryDelay  # ms
+        self._lock = threading.Lock()  # One statement at a time on the shared connection
+        self._db: Optional[sqlite3.Connection] = None
+        self._open()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._draining: Optional[asyncio.Lock] = None
+        self._unsignaled = 0  # Appends since the drain task was last woken up
+        # Backoff by (database_id, table_id): (consecutive failures, retry at monotonic time)
+        self._backoff: Dict[Tuple[Optional[str], str], Tuple[int, float]] = {}
+        # Statistics
+        self.stats = {"appended": 0, "sent": 0, "batches": 0, "retries": 0, "dead": 0}
+
+    def _open(self):
+        # Entries carry access tokens, create the file (and so its journal) private
+        if not os.path.exists(self.path):
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(self.path, 0o600)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        # WAL journaling with NORMAL sync: durable across process crashes, microsecond appends
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute(_INDEX)
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._db.execute(sql, params)
+
+    def _fetch(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    async def append(self, op: str, tableId: str, payload: Dict[str, Any], scope=None) -> str:
+        """
+        Store a write and return its idempotency key
+
+        Args:
+            op: 'create' (payload is a CreateRefRequest), 'patch' (payload is {'filter', 'data'})
+                or 'createIfAbsent' (payload is {'data': CreateRefRequest, 'uniqueKeys': [...]})
+            tableId: Target table
+            payload: Request body
+            scope: Client whose database and token the write is sent with (this client if None)
+        """
+        scope = scope or self.client
+        key = uuid.uuid4().hex
+        if op == 'create' and not payload.get('uid'):
+            # Lets a resend find the ref if the lost attempt was stored
+            payload = {**payload, 'uid': str(uuid.UUID(key))}
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO entries (op, database_id, table_id, payload, idempotency_key, "
+            "access_token, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (op, scope.currentDatabaseId, tableId, self.codec.dumps(payload), key,
+             scope.accessToken, int(time.time() * 1000))
+        )
+        self.stats["appended"] += 1
+        # Drain early once a full batch is waiting
+        self._unsignaled += 1
+        if self._wakeup is not None and self._unsignaled >= self.batchSize:
+            self._unsignaled = 0
+            self._wakeup.set()
+        return key
+
+    def pending(self) -> int:
+        return self._fetch("SELECT COUNT(*) FROM entries WHERE status = 'pending'")[0][0]
+
+    def getStats(self) -> Dict[str, int]:
+        dead = self._fetch("SELECT COUNT(*) FROM entries WHERE status = 'dead'")[0][0]
+        return {**self.stats, "pending": self.pending(), "deadEntries": dead}
+
+    def listEntries(self, status: str = 'pending', limit: int = 100) -> List[Dict[str, Any]]:
+        """List logged writes (without their tokens)"""
+        rows = self._fetch(
+            "SELECT seq, op, database_id, table_id, payload, idempotency_key, error, created_at "
+            "FROM entries WHERE status = ? ORDER BY seq LIMIT ?", (status, limit)
+        )
+        return [
+            {"seq": seq, "op": op, "databaseId": database_id, "tableId": table_id,
+             "payload": self.codec.loads(payload), "idempotencyKey": key,
+             "error": error, "createdAt": created_at}
+            for seq, op, database_id, table_id, payload, key, error, created_at in rows
+        ]
+
+    def requeueDead(self) -> int:
+        """Give writes rejected by the server another try, returns how many"""
+        cursor = self._execute(
+            "UPDATE entries SET status = 'pending', error = NULL, batch_key = NULL WHERE status = 'dead'"
+        )
+        return cursor.rowcount
+
+    async def start(self):
+        """Start draining the log in the background"""
+        if self._task:
+            return
+        if self._db is None:
+            self._open()
+        self._wakeup = asyncio.Event()
+        self._draining = asyncio.Lock()
+        # Drain in an empty context so it never inherits the deadline of the call that started it
+        self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+    async def stop(self):
+        """Stop draining, pending writes stay in the log for the next start"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def close(self):
+        """Close the log file, `start()` opens it again"""
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flushInterval / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as error:
+                print(f"⚠️ Write-ahead log drain failed: {error}")
+
+    async def drain(self) -> int:
+        """Run one drain round over every table, returns how many writes were sent"""
+        if self._draining is None:
+            self._draining = asyncio.Lock()
+        async with self._draining:
+            now = time.monotonic()
+            tables = [
+                key for key in await asyncio.to_thread(
+                    self._fetch, "SELECT DISTINCT database_id, table_id FROM entries WHERE status = 'pending'"
+                )
+                if self._backoff.get(key, (0, 0.0))[1] <= now
+            ]
+            sent = await asyncio.gather(*(self._drainTable(*key) for key in tables))
+            return sum(sent)
+
+    async def drainAll(self, timeout: Optional[float] = None) -> bool:
+        """Drain until the log is empty (ignoring backoff), True when nothing is left pending"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while await asyncio.to_thread(self.pending):
+            self._backoff.clear()
+            if not await self.drain():
+                return False
+            if deadline and time.monotonic() > deadline:
+                break
+        return not await asyncio.to_thread(self.pending)
+
+    async def _drainTable(self, databaseId: Optional[str], tableId: str) -> int:
+        sent = 0
+        while True:
+            batched = self.client.idempotencyKeys and self.client.capabilities.get('bulk') is not False
+            batch = await asyncio.to_thread(self._nextBatch, databaseId, tableId, batched)
+            if not batch:
+                return sent
+            if not await self._send(databaseId, tableId, batch):
+                return sent
+            sent += len(batch["payloads"])
+
+    def _nextBatch(self, databaseId: Optional[str], tableId: str, batched: bool) -> Optional[Dict[str, Any]]:
+        """Oldest writes of a table to send together (only one unless `batched`), resends first"""
+        rows = self._fetch(
+            "SELECT seq, op, payload, idempotency_key, batch_key, access_token "
+            "FROM entries WHERE status = 'pending' AND database_id IS ? AND table_id = ? "
+            "ORDER BY seq LIMIT ?", (databaseId, tableId, self.batchSize)
+        )
+        if not rows:
+            return None
+
+        first = rows[0]
+        resent = bool(first[4])
+        if resent:
+            # A send interrupted earlier: resend exactly its entries
+            batch = [row for row in rows if row[4] == first[4]] if batched else [first]
+            batch_key = first[4]
+        else:
+            batch = []
+            for row in rows:
+                # Only consecutive writes of the same kind and auth go together,
+                # creates with a uniqueness check are sent one by one
+                if row[4] or row[1] != first[1] or row[5] != first[5]:
+                    break
+                batch.append(row)
+                if row[1] == 'createIfAbsent' or not batched:
+                    break
+            batch_key = batch[0][3] if len(batch) == 1 else uuid.uuid4().hex
+            with self._lock:
+                self._db.executemany("UPDATE entries SET batch_key = ? WHERE seq = ?",
+                                     [(batch_key, row[0]) for row in batch])
+        return {
+            "op": first[1],
+            "key": batch_key,
+            "payloads": [self.codec.loads(row[2]) for row in batch],
+            "accessToken": first[5],
+            "seqs": [row[0] for row in batch],
+            "resent": resent,
+        }
+
+    def _forEntry(self, sql: str, seqs: List[int], params=()):
+        with self._lock:
+            self._db.executemany(sql, [(*params, seq) for seq in seqs])
+
+    async def _send(self, databaseId: Optional[str], tableId: str, batch: Dict[str, Any]) -> bool:
+        """Send one batch, returns False when the table should wait before its next batch"""
+        scope = self.client.scoped(databaseId, batch["accessToken"])
+        payloads = batch["payloads"]
+        options: Dict[str, Any] = {'params': {'table_id': tableId}}
+        if self.client.idempotencyKeys:
+            options['idempotencyKey'] = batch["key"]
+        if batch["op"] == 'createIfAbsent':
+            response = await self._sendIfAbsent(scope, tableId, payloads[0], options)
+        elif batch["op"] == 'create' and len(payloads) == 1:
+            response = await self._sendCreate(scope, tableId, payloads[0], options, batch["resent"])
+        elif batch["op"] == 'create':
+            response = await scope.request('POST', '/ref/bulk', {**options, 'data': payloads})
+        elif len(payloads) == 1:
+            options['params']['filter'] = payloads[0]['filter']
+            response = await scope.request('PATCH', '/ref', {**options, 'data': payloads[0]['data']})
+        else:
+            response = await scope.request('PATCH', '/ref/bulk', {**options, 'data': payloads})
+
+        key = (databaseId, tableId)
+        status = response.get('status') if isinstance(response, dict) else None
+        if (len(payloads) > 1 and status in BULK_UNSUPPORTED_STATUSES
+                and self.client.capabilities.get('bulk') is None):
+            # No bulk route, so nothing was written: send these writes one by one
+            self.client.capabilities['bulk'] = False
+            await asyncio.to_thread(self._forEntry, "UPDATE entries SET batch_key = NULL WHERE seq = ?",
+                                    batch["seqs"])
+            print("⚠️ The server has no /ref/bulk route, sending logged writes one by one")
+            return True
+        if isinstance(response, dict) and 'error' not in response or (status == 409 and self.client.idempotencyKeys):
+            # 409: the idempotency key was already applied
+            await asyncio.to_thread(self._forEntry, "DELETE FROM entries WHERE seq = ?", batch["seqs"])
+            self._backoff.pop(key, None)
+            self.stats["sent"] += len(payloads)
+            self.stats["batches"] += 1
+            return True
+
+        error = response.get('error') if isinstance(response, dict) else str(response)
+        if status and 400 <= status < 500 and status not in RETRYABLE_STATUSES:
+            # Rejected by the server, retrying would fail the same way
+            await asyncio.to_thread(self._forEntry, "UPDATE entries SET status = 'dead', error = ? WHERE seq = ?",
+                                    batch["seqs"], (error,))
+            self.stats["dead"] += len(payloads)
+            print(f"❌ Write-ahead log dropped {len(payloads)} write(s) to {tableId}: {error}")
+            return True
+
+        failures = self._backoff.get(key, (0, 0.0))[0] + 1
+        cap = min(self.maxRetryDelay, self.retryDelay * (2 ** (failures - 1)))
+        self._backoff[key] = (failures, time.monotonic() + random.uniform(cap / 2, cap) / 1000)
+        self.stats["retries"] += 1
+        return False
+
+    async def _sendCreate(self, scope, tableId: str, payload: Dict[str, Any], options: Dict[str, Any],
+                          resent: bool) -> Dict[str, Any]:
+        """
+        Create a ref, unless an earlier attempt of this create was stored
+
+        Without idempotency keys nothing stops the server from storing a
+        resent create twice: look its uid up first.
+        """
+        if resent and not self.client.idempotencyKeys and payload.get('uid'):
+            existing = await scope.request('GET', '/ref', {
+                'params': {'table_id': tableId, 'filter': {'uid': payload['uid']}}
+            })
+            if not isinstance(existing, dict) or 'error' in existing:
+                return existing
+            if isinstance(existing.get('data'), dict) and existing['data'].get('uid'):
+                return {'data': existing['data'], 'existed': True}
+        return await scope.request('POST', '/ref', {**options, 'data': payload})
+
+    async def _sendIfAbsent(self, scope, tableId: str, payload: Dict[str, Any],
+                            options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a ref unless one with the same unique fields exists
+
+        The write was logged because its first attempt failed, and that attempt
+        may still have been stored: look for it before creating, or let the
+        server check atomically when the client has `uniqueCreates`.
+        """
+        data = payload['data']
+        if self.client.uniqueCreates:
+            options['params']['unique'] = payload['uniqueKeys']
+            return await scope.request('POST', '/ref', {**options, 'data': data})
+        filter = {key: get_path(data, key) for key in payload['uniqueKeys']}
+        existing = await scope.request('GET', '/ref', {'params': {'table_id': tableId, 'filter': filter}})
+        if not isinstance(existing, dict) or 'error' in existing:
+            return existing
+        if isinstance(existing.get('data'), dict) and existing['data'].get('uid'):
+            return {'data': existing['data'], 'existed': True}
+        return await scope.request('POST', '/ref', {**options, 'data': data})
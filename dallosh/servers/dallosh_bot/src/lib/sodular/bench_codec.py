@@ -0,0 +1,93 @@
+"""
+Benchmark the JSON codecs of the Sodular client
+Compares stdlib json with orjson/msgspec (when installed) on representative
+ref query payloads and AI stream lines
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.bench_codec
+"""
+
+import time
+import uuid
+from typing import Callable, Dict, Any, List
+
+from src.lib.sodular.utils.codec import JsonCodec, OrjsonCodec, MsgspecCodec, orjson, msgspec
+
+ROUNDS = 200
+
+
+def make_ref(i: int) -> Dict[str, Any]:
+    """A request ref as written by send_user_request"""
+    return {
+        'uid': str(uuid.uuid4()),
+        'createdAt': 1755104672000 + i,
+        'updatedAt': 1755104672000 + i,
+        'data': {
+            'chatId': str(uuid.uuid4()),
+            'name': f'Request {i}',
+            'description': 'Le client souhaite changer son forfait mobile et demande un rappel. ' * 2,
+            'label': ['low', 'normal', 'urgent'][i % 3],
+            'userId': str(uuid.uuid4()),
+            'userName': 'Jeanne Dupont',
+            'createdAt': 1755104672000 + i,
+            'status': 'ongoing',
+        },
+    }
+
+
+def make_payloads() -> Dict[str, Any]:
+    refs = [make_ref(i) for i in range(500)]
+    return {
+        'query page (500 refs)': {'data': {'data': refs, 'total': 5000, 'limit': 500, 'offset': 0, 'hasMore': True}},
+        'single ref': {'data': refs[0]},
+        'filter param': {'data.name': 'requests', 'data.status': {'$in': ['ongoing', 'done']}},
+    }
+
+
+def make_stream_lines() -> List[bytes]:
+    """NDJSON lines as produced by the AI chat stream"""
+    return [
+        ('{"data": {"type": "text", "content": "Bonjour, je vais vous aider avec votre demande %d.", '
+         '"agent": "support", "done": false}}\n' % i).encode('utf-8')
+        for i in range(1000)
+    ]
+
+
+def timed(fn: Callable[[], Any], rounds: int = ROUNDS) -> float:
+    """Best-of-3 average milliseconds per round"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        best = min(best, (time.perf_counter() - start) * 1000 / rounds)
+    return best
+
+
+def main():
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    if msgspec is not None:
+        codecs.append(MsgspecCodec())
+    if len(codecs) == 1:
+        print("⚠️ Neither orjson nor msgspec is installed, only stdlib is measured")
+
+    payloads = make_payloads()
+    lines = make_stream_lines()
+
+    print(f"{'case':<34}" + ''.join(f"{c.name:>12}" for c in codecs))
+    for name, payload in payloads.items():
+        encoded = JsonCodec().dumpb(payload)
+        dumps = [timed(lambda: c.dumpb(payload)) for c in codecs]
+        loads = [timed(lambda: c.loads(encoded)) for c in codecs]
+        print(f"{'encode ' + name:<34}" + ''.join(f"{t:>10.3f}ms" for t in dumps))
+        print(f"{'decode ' + name:<34}" + ''.join(f"{t:>10.3f}ms" for t in loads))
+
+    stream = [timed(lambda: [c.loads(line) for line in lines], rounds=20) for c in codecs]
+    print(f"{'decode stream (1000 lines)':<34}" + ''.join(f"{t:>10.3f}ms" for t in stream))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+In-memory fake Sodular server for local tests and benchmarks
+Implements the subset of the REST API used by the Python client
+"""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from typing import Dict, Any, List, Optional
+from aiohttp import web
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    """Read a dotted path ('data.name') from a document"""
+    value: Any = doc
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _matches_value(actual: Any, expected: Any) -> bool:
+    """Match one field: equality, or a {'$gt'/'$lt': value} comparison"""
+    if isinstance(expected, dict) and ('$gt' in expected or '$lt' in expected):
+        if actual is None:
+            return False
+        if '$gt' in expected and not actual > expected['$gt']:
+            return False
+        if '$lt' in expected and not actual < expected['$lt']:
+            return False
+        return True
+    return actual == expected
+
+
+def _matches(doc: Dict[str, Any], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """Match every dotted path of the filter ('$and' lists are supported)"""
+    for key, value in (filter_dict or {}).items():
+        if key == '$and':
+            if not all(_matches(doc, f) for f in value):
+                return False
+        elif not _matches_value(_get_path(doc, key), value):
+            return False
+    return True
+
+
+class FakeSodularServer:
+    """
+    Fake Sodular backend served on localhost
+
+    Usage:
+        server = FakeSodularServer()
+        await server.start()
+        client = SodularClient({'baseUrl': server.baseUrl, 'enableSocket': False})
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 bulk: bool = True):
+        self.host = host
+        self.port = port
+        self.latency = latency  # Seconds added to every API response
+        # Serve /ref/bulk, which sodular_server does not have
+        self.bulk = bulk
+        self.tables: List[Dict[str, Any]] = []
+        self.refs: Dict[str, List[Dict[str, Any]]] = {}
+        # Number of API round trips received, by "METHOD /path"
+        self.requests: Dict[str, int] = {}
+        # Answer this many upcoming API requests with 503 (fault injection)
+        self.failNext = 0
+        # Responses by Idempotency-Key, replayed for repeated keys
+        self.idempotentResponses: Dict[str, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def baseUrl(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    @property
+    def totalRequests(self) -> int:
+        return sum(self.requests.values())
+
+    def addTable(self, name: str) -> str:
+        """Create a table and return its uid"""
+        uid = str(uuid.uuid4())
+        self.tables.append({'uid': uid, 'data': {'name': name}})
+        self.refs[uid] = []
+        return uid
+
+    async def start(self):
+        app = web.Application(middlewares=[self._count])
+        app.router.add_get('/api/v1/health', self._health)
+        app.router.add_get('/api/v1/tables', self._getTable)
+        app.router.add_post('/api/v1/ref', self._createRef)
+        app.router.add_get('/api/v1/ref', self._getRef)
+        app.router.add_patch('/api/v1/ref', self._patchRef)
+        app.router.add_delete('/api/v1/ref', self._deleteRef)
+        app.router.add_get('/api/v1/ref/query', self._queryRefs)
+        if self.bulk:
+            app.router.add_post('/api/v1/ref/bulk', self._bulkCreate)
+            app.router.add_patch('/api/v1/ref/bulk', self._bulkPatch)
+            app.router.add_delete('/api/v1/ref/bulk', self._bulkDelete)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Pick up the actual port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler):
+        key = f"{request.method} {request.path[len('/api/v1'):]}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if self.latency and not request.path.endswith('/health'):
+            await asyncio.sleep(self.latency)
+        if self.failNext and not request.path.endswith('/health'):
+            self.failNext -= 1
+            return web.json_response({'error': 'Service unavailable'}, status=503)
+        key = request.headers.get('Idempotency-Key')
+        if key in self.idempotentResponses:
+            return web.Response(text=self.idempotentResponses[key], content_type='application/json')
+        response = await handler(request)
+        if key and response.status == 200:
+            self.idempotentResponses[key] = response.text
+        return response
+
+    def _tableRefs(self, request: web.Request) -> Optional[List[Dict[str, Any]]]:
+        return self.refs.get(request.query.get('table_id', ''))
+
+    def _filter(self, request: web.Request) -> Optional[Dict[str, Any]]:
+        raw = request.query.get('filter')
+        return json.loads(raw) if raw else None
+
+    def _newRef(self, request: web.Request, body: Dict[str, Any]) -> Dict[str, Any]:
+        ref = {'uid': body.get('uid') or str(uuid.uuid4()), 'data': body.get('data', {})}
+        self._tableRefs(request).append(ref)
+        return ref
+
+    async def _health(self, request: web.Request):
+        return web.json_response({'status': 'ok'})
+
+    async def _getTable(self, request: web.Request):
+        filter_dict = self._filter(request)
+        table = next((t for t in self.tables if _matches(t, filter_dict)), None)
+        body = json.dumps({'data': table})
+        etag = '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=body, content_type='application/json', headers={'ETag': etag})
+
+    async def _createRef(self, request: web.Request):
+        refs = self._tableRefs(request)
+        if refs is None:
+            return web.json_response({'error': 'Table not found'}, status=404)
+        body = await request.json()
+        unique = json.loads(request.query.get('unique', '[]'))
+        if unique:
+            # Create-if-absent: answer with the ref already holding these values
+            filter_dict = {key: _get_path(body, key) for key in unique}
+            existing = next((r for r in refs if _matches(r, filter_dict)), None)
+            if existing:
+                return web.json_response({'data': existing, 'existed': True})
+        return web.json_response({'data': self._newRef(request, body)})
+
+    async def _getRef(self, request: web.Request):
+        refs = self._tableRefs(request) or []
+        filter_dict = self._filter(request)
+        return web.json_response({'data': next((r for r in refs if _matches(r, filter_dict)), None)})
+
+    async def _patchRef(self, request: web.Request):
+        filter_dict = self._filter(request)
+        body = await request.json()
+        modified = 0
+        for ref in self._tableRefs(request) or []:
+            if _matches(ref, filter_dict):
+                ref['data'].update(body.get('data', {}))
+                modified += 1
+        return web.json_response({'data': {'modifiedCount': modified}})
+
+    async def _deleteRef(self, request: web.Request):
+        refs = self._tableRefs(request) or []
+        filter_dict = self._filter(request)
+        kept = [r for r in refs if not _matches(r, filter_dict)]
+        deleted = len(refs) - len(kept)
+        refs[:] = kept
+        return web.json_response({'data': {'deletedCount': deleted}})
+
+    async def _queryRefs(self, request: web.Request):
+        refs = [r for r in self._tableRefs(request) or [] if _matches(r, self._filter(request))]
+        sort = json.loads(request.query.get('sort', '{}'))
+        for key, order in reversed(list(sort.items())):
+            refs.sort(key=lambda r: _get_path(r, key), reverse=order < 0)
+        offset = int(request.query.get('offset', 0))
+        limit = int(request.query.get('limit', 0)) or len(refs)
+        page = refs[offset:offset + limit]
+        return web.json_response({'data': {
+            'data': page,
+            'total': len(refs),
+            'limit': limit,
+            'offset': offset,
+            'hasMore': offset + len(page) < len(refs),
+        }})
+
+    async def _bulkCreate(self, request: web.Request):
+        if self._tableRefs(request) is None:
+            return web.json_response({'error': 'Table not found'}, status=404)
+        return web.json_response({'data': [self._newRef(request, item) for item in await request.json()]})
+
+    async def _bulkPatch(self, request: web.Request):
+        modified = 0
+        for update in await request.json():
+            for ref in self._tableRefs(request) or []:
+                if _matches(ref, update.get('filter')):
+                    ref['data'].update(update.get('data', {}).get('data', {}))
+                    modified += 1
+        return web.json_response({'data': {'modifiedCount': modified}})
+
+    async def _bulkDelete(self, request: web.Request):
+        refs = self._tableRefs(request) or []
+        filters = await request.json()
+        kept = [r for r in refs if not any(_matches(r, f) for f in filters)]
+        deleted = len(refs) - len(kept)
+        refs[:] = kept
+        return web.json_response({'data': {'deletedCount': deleted}})
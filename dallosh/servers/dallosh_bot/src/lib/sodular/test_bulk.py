@@ -0,0 +1,129 @@
+"""
+Test bulk ref writes for Sodular client
+Runs against the local fake server and reports round trips saved
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.test_bulk
+"""
+
+import asyncio
+
+from src.lib.sodular import SodularClient
+from src.lib.sodular.fake_server import FakeSodularServer
+
+ROWS = 300
+
+
+async def connect(server: FakeSodularServer, **config):
+    result = await SodularClient({'baseUrl': server.baseUrl, 'enableSocket': False, **config}).connect()
+    if not result.isReady:
+        raise RuntimeError(f"Connection failed: {result.error}")
+    return result.client
+
+
+async def test_bulk_methods():
+    """bulkCreate / bulkPatch / bulkDelete each take one round trip"""
+    print("🧪 Testing bulk methods...")
+    server = FakeSodularServer()
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server)
+
+    try:
+        ref_api = getattr(client.ref, 'from')(table_id)
+        before = server.totalRequests
+
+        created = await ref_api.bulkCreate([{'data': {'name': f'row-{i}'}} for i in range(ROWS)])
+        assert len(created['data']) == ROWS, created
+
+        patched = await ref_api.bulkPatch([{'filter': {'data.name': 'row-1'}, 'data': {'data': {'status': 'done'}}}])
+        assert patched['data']['modifiedCount'] == 1, patched
+
+        deleted = await ref_api.bulkDelete([{'data.name': 'row-1'}, {'data.name': 'row-2'}])
+        assert deleted['data']['deletedCount'] == 2, deleted
+
+        assert server.totalRequests - before == 3
+        print(f"✅ {ROWS} creates + patch + delete in {server.totalRequests - before} round trips")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_auto_batching():
+    """Concurrent create() calls within the window are coalesced"""
+    print("🧪 Testing create() auto-batching...")
+    results = {}
+
+    for window in (0, 5):
+        server = FakeSodularServer(latency=0.002)
+        await server.start()
+        table_id = server.addTable('transcripts')
+        client = await connect(server, refBatchWindow=window, refBatchSize=100)
+
+        try:
+            ref_api = getattr(client.ref, 'from')(table_id)
+            before = server.totalRequests
+            responses = await asyncio.gather(*[
+                ref_api.create({'data': {'name': f'row-{i}'}}) for i in range(ROWS)
+            ])
+            await ref_api.flush()
+
+            assert all(r.get('data', {}).get('uid') for r in responses), responses[:3]
+            assert len(server.refs[table_id]) == ROWS
+            results[window] = server.totalRequests - before
+        finally:
+            await client.close()
+            await server.stop()
+
+    print(f"📊 {ROWS} creates: {results[0]} round trips unbatched, {results[5]} batched "
+          f"({results[0] - results[5]} saved)")
+    assert results[5] < results[0]
+    print("✅ Auto-batching coalesced creates")
+
+
+async def test_bulk_fallback():
+    """Without /ref/bulk on the server, bulk methods and batching send one request per item"""
+    print("🧪 Testing the per-item fallback...")
+    server = FakeSodularServer(bulk=False)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server, refBatchWindow=5, refBatchSize=100)
+
+    try:
+        ref_api = getattr(client.ref, 'from')(table_id)
+        created = await ref_api.bulkCreate([{'data': {'name': f'row-{i}'}} for i in range(10)])
+        assert 'error' not in created and len(created['data']) == 10, created
+        assert all(ref['uid'] for ref in created['data'])
+        assert client._base_client.capabilities['bulk'] is False
+
+        patched = await ref_api.bulkPatch([
+            {'filter': {'data.name': f'row-{i}'}, 'data': {'data': {'status': 'done'}}} for i in range(3)
+        ])
+        assert patched == {'data': {'modifiedCount': 3}}, patched
+
+        deleted = await ref_api.bulkDelete([{'data.name': 'row-1'}, {'data.name': 'row-2'}])
+        assert deleted == {'data': {'deletedCount': 2}}, deleted
+
+        responses = await asyncio.gather(*[ref_api.create({'data': {'name': f'more-{i}'}}) for i in range(20)])
+        assert all(r.get('data', {}).get('uid') for r in responses), responses[:3]
+        assert len(server.refs[table_id]) == 28
+
+        # Only the first bulk call tried the route
+        bulk_attempts = sum(count for route, count in server.requests.items() if route.endswith('/ref/bulk'))
+        assert bulk_attempts == 1, server.requests
+        print(f"✅ Bulk route tried once, {server.totalRequests} round trips one item at a time")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def main():
+    await test_bulk_methods()
+    await test_auto_batching()
+    await test_bulk_fallback()
+    print("🎉 All bulk tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Test in-flight GET coalescing for Sodular client
+Runs against the local fake server
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.test_coalescing
+"""
+
+import asyncio
+
+from src.lib.sodular import SodularClient
+from src.lib.sodular.fake_server import FakeSodularServer
+from src.lib.sodular.utils.deadline import deadline_scope
+
+LATENCY = 0.05  # seconds, keeps the first GET in flight while the others arrive
+
+
+async def connect(server: FakeSodularServer, **config):
+    result = await SodularClient({'baseUrl': server.baseUrl, 'enableSocket': False, 'responseCacheTtl': 0,
+                                  'coalesceRequests': True, **config}).connect()
+    if not result.isReady:
+        raise RuntimeError(f"Connection failed: {result.error}")
+    return result.client
+
+
+async def get_ref(client, table_id: str):
+    return await getattr(client.ref, 'from')(table_id).get({'filter': {'data.name': 'a'}})
+
+
+async def test_identical_gets():
+    """Concurrent identical GETs of one scope take one round trip"""
+    print("🧪 Testing identical GETs...")
+    server = FakeSodularServer(latency=LATENCY)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server)
+
+    try:
+        scope = client.scoped('db-1', 'token-a')
+        before = server.totalRequests
+        responses = await asyncio.gather(*[get_ref(scope, table_id) for _ in range(10)])
+        assert server.totalRequests - before == 1, server.requests
+        assert all(response == responses[0] for response in responses)
+        print("✅ 10 GETs in 1 round trip")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_key_includes_principal_and_database():
+    """GETs of other databases or other users are never shared"""
+    print("🧪 Testing coalescing key...")
+    server = FakeSodularServer(latency=LATENCY)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server)
+
+    try:
+        scopes = [
+            client.scoped('db-1', 'token-a'),
+            client.scoped('db-1', 'token-a'),  # Same principal and database as the first
+            client.scoped('db-2', 'token-a'),  # Other database
+            client.scoped('db-1', 'token-b'),  # Other principal
+            client.scoped('db-1', None),  # Anonymous
+        ]
+        before = server.totalRequests
+        await asyncio.gather(*[get_ref(scope, table_id) for scope in scopes])
+        assert server.totalRequests - before == 4, server.requests
+        print("✅ 5 GETs from 4 distinct (database, principal) pairs in 4 round trips")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_cancelled_waiter():
+    """Cancelling one caller leaves the shared request running for the others"""
+    print("🧪 Testing cancelled waiter...")
+    server = FakeSodularServer(latency=LATENCY)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server)
+
+    try:
+        scope = client.scoped('db-1', 'token-a')
+        before = server.totalRequests
+        first = asyncio.create_task(get_ref(scope, table_id))
+        second = asyncio.create_task(get_ref(scope, table_id))
+        await asyncio.sleep(LATENCY / 5)
+        first.cancel()
+
+        response = await second
+        assert first.cancelled()
+        assert 'error' not in response, response
+        assert server.totalRequests - before == 1, server.requests
+        assert client.getCoalesceStats()['inflight'] == 0
+        print("✅ Cancelled caller did not cancel the shared GET")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_waiter_deadlines():
+    """Each caller waits for the shared GET within its own deadline, not the first caller's"""
+    print("🧪 Testing per-caller deadlines...")
+    server = FakeSodularServer(latency=LATENCY)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server)
+
+    async def get_within(budget: int):
+        with deadline_scope(budget):
+            return await get_ref(scope, table_id)
+
+    try:
+        scope = client.scoped('db-1', 'token-a')
+        before = server.totalRequests
+        short, long = await asyncio.gather(get_within(int(LATENCY * 1000 / 5)), get_within(5000))
+        assert short.get('deadlineExceeded'), short
+        assert 'error' not in long, long
+        assert server.totalRequests - before == 1, server.requests
+
+        # Issued by the caller with the longer deadline, the shared GET does not hold the short one
+        before = server.totalRequests
+        long, short = await asyncio.gather(get_within(5000), get_within(int(LATENCY * 1000 / 5)))
+        assert short.get('deadlineExceeded') and 'error' not in long, (short, long)
+        assert server.totalRequests - before == 1, server.requests
+        print("✅ Caller past its deadline gave up, the other got the shared response")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def main():
+    await test_identical_gets()
+    await test_key_includes_principal_and_database()
+    await test_cancelled_waiter()
+    await test_waiter_deadlines()
+    print("🎉 All coalescing tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
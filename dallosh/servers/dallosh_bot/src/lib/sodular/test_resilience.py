@@ -0,0 +1,179 @@
+"""
+Test retries, backoff and the circuit breaker of Sodular client
+Runs against the local fake server, injecting failures with `failNext`
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.test_resilience
+"""
+
+import asyncio
+
+from src.lib.sodular import SodularClient
+from src.lib.sodular.api.resilience import CircuitBreaker, RetryPolicy
+from src.lib.sodular.fake_server import FakeSodularServer
+
+
+async def connect(server: FakeSodularServer, **config):
+    result = await SodularClient({'baseUrl': server.baseUrl, 'enableSocket': False, 'retryBaseDelay': 5,
+                                  'retryMaxDelay': 20, **config}).connect()
+    if not result.isReady:
+        raise RuntimeError(f"Connection failed: {result.error}")
+    return result.client
+
+
+def api_requests(server: FakeSodularServer) -> int:
+    return server.totalRequests - server.requests.get('GET /health', 0)
+
+
+async def get_ref(client, table_id: str, **options):
+    return await client._base_client.request('GET', '/ref', {
+        'params': {'table_id': table_id, 'filter': {'data.name': 'a'}}, **options
+    })
+
+
+def test_backoff():
+    """Delays are jittered within an exponentially growing, capped window"""
+    print("🧪 Testing backoff...")
+    policy = RetryPolicy(retries=5, baseDelay=100, maxDelay=400)
+    for retry, cap in ((1, 0.1), (2, 0.2), (3, 0.4), (4, 0.4), (5, 0.4)):
+        delays = [policy.delay(retry) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays), (retry, max(delays))
+        assert max(delays) > cap / 2, "Delays are not spread over the window"
+    print("✅ Backoff windows 100/200/400/400/400 ms")
+
+
+async def test_retries():
+    """Idempotent requests are retried on 503, other writes are not"""
+    print("🧪 Testing retries...")
+    server = FakeSodularServer()
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server, retries=2)
+    base = client._base_client
+
+    try:
+        # GET: two failures then a success
+        server.failNext = 2
+        before = api_requests(server)
+        response = await get_ref(client, table_id)
+        assert 'error' not in response, response
+        assert api_requests(server) - before == 3
+        assert client.getCircuitStats()['retries'] == 2
+
+        # Retries are bounded
+        server.failNext = 5
+        response = await get_ref(client, table_id)
+        assert response.get('status') == 503, response
+        server.failNext = 0
+
+        # POST without an idempotency key is sent once
+        server.failNext = 1
+        before = api_requests(server)
+        response = await base.request('POST', '/ref', {'params': {'table_id': table_id}, 'data': {'data': {}}})
+        assert response.get('status') == 503, response
+        assert api_requests(server) - before == 1
+
+        # POST with an idempotency key is retried and applied once
+        server.failNext = 1
+        response = await base.request('POST', '/ref', {
+            'params': {'table_id': table_id}, 'data': {'data': {'name': 'once'}}, 'idempotencyKey': 'key-1'
+        })
+        assert response.get('data', {}).get('uid'), response
+        assert [r['data'].get('name') for r in server.refs[table_id]] == ['once']
+        print("✅ GETs and keyed writes retried, plain writes sent once")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_circuit_breaker():
+    """Open after consecutive failures, fail fast, then half-open with one trial"""
+    print("🧪 Testing circuit breaker...")
+    server = FakeSodularServer()
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server, retries=0, circuitFailureThreshold=2, circuitResetTimeout=200)
+
+    try:
+        server.failNext = 2
+        await get_ref(client, table_id)
+        assert client.getCircuitStats()['state'] == CircuitBreaker.CLOSED
+        await get_ref(client, table_id)
+        assert client.getCircuitStats()['state'] == CircuitBreaker.OPEN
+
+        # Open: rejected without a round trip
+        before = api_requests(server)
+        response = await get_ref(client, table_id)
+        assert response['error'].startswith('Service unavailable'), response
+        assert api_requests(server) == before
+        assert client.getCircuitStats()['rejected'] == 1
+
+        # Half-open: a failed trial opens the circuit again
+        await asyncio.sleep(0.25)
+        server.failNext = 1
+        await get_ref(client, table_id)
+        stats = client.getCircuitStats()
+        assert stats['state'] == CircuitBreaker.OPEN and stats['opened'] == 2, stats
+
+        # Half-open: a successful trial closes it
+        await asyncio.sleep(0.25)
+        response = await get_ref(client, table_id)
+        assert 'error' not in response, response
+        assert client.getCircuitStats()['state'] == CircuitBreaker.CLOSED
+        print("✅ Circuit opened, rejected, reopened on a failed trial and closed on a good one")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+def test_half_open_single_trial():
+    """Only one trial request goes through while half-open"""
+    print("🧪 Testing half-open trial...")
+    breaker = CircuitBreaker(failureThreshold=1, resetTimeout=0)
+    breaker.recordFailure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.resetTimeout = 10000
+    assert not breaker.allow()
+    breaker.recordSuccess()
+    assert breaker.allow()
+    print("✅ Single trial request")
+
+
+async def test_caller_timeout():
+    """A timeout under the caller's shorter budget is not a backend failure"""
+    print("🧪 Testing caller timeout...")
+    server = FakeSodularServer(latency=0.2)
+    await server.start()
+    table_id = server.addTable('transcripts')
+    client = await connect(server, retries=0, circuitFailureThreshold=1, endpointTimeouts={'/ref': 100})
+
+    try:
+        # The caller's 50 ms budget is shorter than the endpoint's 100 ms
+        response = await get_ref(client, table_id, timeout=50)
+        assert response.get('deadlineExceeded'), response
+        stats = client.getCircuitStats()
+        assert stats['state'] == CircuitBreaker.CLOSED and stats['failures'] == 0, stats
+
+        # The endpoint's own timeout counts
+        response = await get_ref(client, table_id)
+        assert 'timed out' in response['error'], response
+        assert client.getCircuitStats()['state'] == CircuitBreaker.OPEN
+        print("✅ Caller timeouts left the circuit closed, endpoint timeouts opened it")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def main():
+    test_backoff()
+    await test_retries()
+    await test_circuit_breaker()
+    test_half_open_single_trial()
+    await test_caller_timeout()
+    print("🎉 All resilience tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
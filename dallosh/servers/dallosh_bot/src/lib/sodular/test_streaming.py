@@ -0,0 +1,101 @@
+"""
+Test streaming JSON decoding for Sodular client
+Feeds responses to JsonArrayStreamParser in random chunk sizes and compares
+the records with a regular json.loads of the whole body
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.test_streaming
+"""
+
+import json
+import random
+
+from src.lib.sodular.api.streaming import JsonArrayStreamParser
+
+ROUNDS = 200
+
+
+def make_records(rng: random.Random, count: int):
+    """Records with strings, escapes, multi-byte characters and nested arrays"""
+    return [
+        {
+            'uid': f'row-{i}',
+            'data': {
+                'name': rng.choice(['plain', 'quote " inside', 'back\\slash', 'bracket ] and , comma',
+                                    'newline\nand\ttab', 'accent é 中文 🎧', '{"looks": ["like", "json"]}']),
+                'score': rng.choice([0, -12, 3.25, 1e21, 12345678901234567890]),
+                'tags': [[i, [i * 2, 'x']], [], [{'deep': [None, True, False]}]],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def split(body: bytes, rng: random.Random):
+    """Cut a body into chunks of 1 to 40 bytes (multi-byte characters get cut too)"""
+    chunks = []
+    i = 0
+    while i < len(body):
+        size = rng.randint(1, 40)
+        chunks.append(body[i:i + size])
+        i += size
+    return chunks
+
+
+def parse(chunks):
+    parser = JsonArrayStreamParser()
+    records = []
+    for chunk in chunks:
+        records.extend(parser.feed(chunk))
+    parser.close()
+    return records
+
+
+def test_random_chunks():
+    """Records decoded chunk by chunk match json.loads of the whole body"""
+    print("🧪 Testing random chunk sizes...")
+    rng = random.Random(0)
+    for round_index in range(ROUNDS):
+        records = make_records(rng, rng.randint(0, 20))
+        if round_index % 2:
+            envelope = {'meta': {'note': 'data: [not this one]', 'list': [1, [2]]}, 'data': records}
+        else:
+            envelope = {'status': 'ok', 'data': {'total': len(records), 'data': records}}
+        body = json.dumps(envelope, ensure_ascii=round_index % 3 == 0).encode()
+        assert parse(split(body, rng)) == records, f"Mismatch in round {round_index}"
+    print(f"✅ {ROUNDS} responses decoded identically")
+
+
+def test_no_records_array():
+    """A response without a records array yields nothing"""
+    print("🧪 Testing response without records...")
+    rng = random.Random(1)
+    body = json.dumps({'error': 'Not found', 'data': None}).encode()
+    assert parse(split(body, rng)) == []
+    print("✅ No records")
+
+
+def test_truncated():
+    """A body cut inside the records array raises on close()"""
+    print("🧪 Testing truncated response...")
+    body = json.dumps({'data': make_records(random.Random(2), 3)}).encode()
+    parser = JsonArrayStreamParser()
+    parser.feed(body[:-10])
+    try:
+        parser.close()
+    except ValueError:
+        print("✅ Truncation detected")
+        return
+    raise AssertionError("Truncated body was accepted")
+
+
+def main():
+    test_random_chunks()
+    test_no_records_array()
+    test_truncated()
+    print("🎉 All streaming tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Test the Sodular client's write-ahead log
+Background draining under a caller's deadline, one write per request with
+lookups of resent creates, and bulk drains against the local fake server
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.test_wal
+"""
+
+import asyncio
+import os
+import tempfile
+
+from src.lib.sodular import SodularClient
+from src.lib.sodular.fake_server import FakeSodularServer
+from src.lib.sodular.utils.deadline import deadline_scope
+
+WRITES = 20
+
+
+async def connect(server: FakeSodularServer, **config):
+    path = os.path.join(tempfile.mkdtemp(), 'wal.db')
+    result = await SodularClient({'baseUrl': server.baseUrl, 'enableSocket': False, 'walPath': path,
+                                  'walFlushInterval': 20, **config}).connect()
+    if not result.isReady:
+        raise RuntimeError(f"Connection failed: {result.error}")
+    return result.client
+
+
+async def test_drain_outlives_deadline():
+    """A log started under a short deadline keeps draining once that deadline has passed"""
+    print("🧪 Testing the drain task under a caller's deadline...")
+    server = FakeSodularServer()
+    await server.start()
+    table_id = server.addTable('requests')
+    try:
+        with deadline_scope(200):
+            client = await connect(server)
+            await asyncio.sleep(0.3)
+            ref_api = getattr(client.ref, 'from')(table_id)
+            for i in range(WRITES):
+                await ref_api.create({'data': {'name': f'row-{i}'}}, durable=True)
+
+        wal = client._base_client.writeAheadLog
+        for _ in range(100):
+            if not wal.pending():
+                break
+            await asyncio.sleep(0.02)
+        assert wal.pending() == 0 and len(server.refs[table_id]) == WRITES, wal.getStats()
+        print(f"✅ {WRITES} writes drained after the starting deadline expired")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_one_write_per_request():
+    """Without idempotency keys, writes go one by one and a resent create is not stored twice"""
+    print("🧪 Testing drains without idempotency keys...")
+    server = FakeSodularServer(bulk=False)
+    await server.start()
+    table_id = server.addTable('requests')
+    client = await connect(server, walFlushInterval=60000)
+    wal = client._base_client.writeAheadLog
+    try:
+        ref_api = getattr(client.ref, 'from')(table_id)
+        for i in range(WRITES):
+            await ref_api.create({'data': {'name': f'row-{i}'}}, durable=True)
+        await ref_api.patch({'data.name': 'row-0'}, {'data': {'status': 'done'}}, durable=True)
+
+        # The first create was sent and stored, but its answer was lost
+        entry = wal.listEntries()[0]
+        batch = await asyncio.to_thread(wal._nextBatch, entry['databaseId'], table_id, False)
+        assert batch['seqs'] == [entry['seq']] and not batch['resent']
+        server.refs[table_id].append({'uid': entry['payload']['uid'], 'data': entry['payload']['data']})
+
+        assert await wal.drainAll(10)
+        refs = server.refs[table_id]
+        assert len(refs) == WRITES and len({ref['uid'] for ref in refs}) == WRITES, refs
+        assert refs[0]['data'].get('status') == 'done', refs[0]
+        assert server.requests.get('POST /ref') == WRITES - 1, server.requests
+        assert server.requests.get('GET /ref') == 1, server.requests
+        assert not any(route.endswith('/ref/bulk') for route in server.requests), server.requests
+        assert not server.idempotentResponses
+        print(f"✅ {WRITES} creates and a patch sent one by one, the resent create found by its uid")
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_bulk_drains():
+    """With idempotency keys, writes go in bulk, or one by one when the server has no bulk route"""
+    print("🧪 Testing bulk drains...")
+    for bulk in (True, False):
+        server = FakeSodularServer(bulk=bulk)
+        await server.start()
+        table_id = server.addTable('requests')
+        client = await connect(server, idempotencyKeys=True, walFlushInterval=60000)
+        wal = client._base_client.writeAheadLog
+        try:
+            ref_api = getattr(client.ref, 'from')(table_id)
+            for i in range(WRITES):
+                await ref_api.create({'data': {'name': f'row-{i}'}}, durable=True)
+            assert await wal.drainAll(10)
+            stats = wal.getStats()
+            assert len(server.refs[table_id]) == WRITES and stats['dead'] == 0, stats
+            if bulk:
+                assert stats['batches'] == 1 and server.requests.get('POST /ref/bulk') == 1, server.requests
+            else:
+                assert client._base_client.capabilities['bulk'] is False
+                assert server.requests.get('POST /ref') == WRITES, server.requests
+                assert server.requests.get('POST /ref/bulk') == 1, server.requests
+        finally:
+            await client.close()
+            await server.stop()
+    print(f"✅ {WRITES} writes in one bulk request, or one by one after a 404")
+
+
+async def main():
+    await test_drain_outlives_deadline()
+    await test_one_write_per_request()
+    await test_bulk_drains()
+    print("🎉 All write-ahead log tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
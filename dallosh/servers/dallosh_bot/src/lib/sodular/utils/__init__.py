@@ -1,102 +1,146 @@
-"""
-Utility functions for Sodular client
-Exact Python equivalent of utils/index.ts
-"""
-
-import json
-import urllib.parse
-from typing import Dict, Any, Optional
-
-
-class TOKEN_KEYS:
-    """Token storage keys"""
-    ACCESS_TOKEN = "sodular_access_token"
-    REFRESH_TOKEN = "sodular_refresh_token"
-
-
-class Storage:
-    """Simple in-memory storage (Python equivalent to localStorage)"""
-    
-    def __init__(self):
-        self._storage = {}
-    
-    def set(self, key: str, value: str):
-        """Set a value in storage"""
-        self._storage[key] = value
-    
-    def get(self, key: str) -> Optional[str]:
-        """Get a value from storage"""
-        return self._storage.get(key)
-    
-    def remove(self, key: str):
-        """Remove a value from storage"""
-        if key in self._storage:
-            del self._storage[key]
-
-
-# Global storage instance
-storage = Storage()
-
-
-def build_query_params(params: Dict[str, Any]) -> str:
-    """
-    Build query string from parameters
-    
-    Args:
-        params: Dictionary of parameters
-        
-    Returns:
-        URL encoded query string
-    """
-    if not params:
-        return ""
-    
-    query_parts = []
-    for key, value in params.items():
-        if value is None:
-            continue
-        
-        if isinstance(value, (dict, list)):
-            # JSON encode complex values
-            encoded_value = json.dumps(value)
-        else:
-            encoded_value = str(value)
-        
-        query_parts.append(f"{key}={urllib.parse.quote(encoded_value)}")
-    
-    return "&".join(query_parts)
-
-
-def build_api_url(base_url: str, path: str, query: str = "") -> str:
-    """
-    Build full API URL
-    
-    Args:
-        base_url: Base URL
-        path: API path
-        query: Query string
-        
-    Returns:
-        Full API URL
-    """
-    if not base_url.endswith('/') and not path.startswith('/'):
-        base_url += '/'
-    
-    url = base_url + path
-    
-    if query:
-        if '?' in url:
-            url += '&' + query
-        else:
-            url += '?' + query
-    
-    return url
-
-
-__all__ = [
-    'TOKEN_KEYS',
-    'Storage',
-    'storage',
-    'build_query_params',
-    'build_api_url',
-]
+"""
+Utility functions for Sodular client
+Exact Python equivalent of utils/index.ts
+"""
+
+import base64
+import json
+import urllib.parse
+from typing import Dict, Any, Optional
+from .codec import JsonCodec, get_codec
+from .deadline import deadline_scope, remaining_ms, set_turn_budget, get_turn_budget
+
+
+class TOKEN_KEYS:
+    """Token storage keys"""
+    ACCESS_TOKEN = "sodular_access_token"
+    REFRESH_TOKEN = "sodular_refresh_token"
+
+
+class Storage:
+    """Simple in-memory storage (Python equivalent to localStorage)"""
+    
+    def __init__(self):
+        self._storage = {}
+    
+    def set(self, key: str, value: str):
+        """Set a value in storage"""
+        self._storage[key] = value
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get a value from storage"""
+        return self._storage.get(key)
+    
+    def remove(self, key: str):
+        """Remove a value from storage"""
+        if key in self._storage:
+            del self._storage[key]
+
+
+# Global storage instance
+storage = Storage()
+
+
+def build_query_params(params: Dict[str, Any], codec: Optional[JsonCodec] = None) -> str:
+    """
+    Build query string from parameters
+    
+    Args:
+        params: Dictionary of parameters
+        codec: JSON codec for complex values (stdlib json if None)
+        
+    Returns:
+        URL encoded query string
+    """
+    if not params:
+        return ""
+    
+    query_parts = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        
+        if isinstance(value, (dict, list)):
+            # JSON encode complex values
+            encoded_value = codec.dumps(value) if codec else json.dumps(value)
+        else:
+            encoded_value = str(value)
+        
+        query_parts.append(f"{key}={urllib.parse.quote(encoded_value)}")
+    
+    return "&".join(query_parts)
+
+
+def build_api_url(base_url: str, path: str, query: str = "") -> str:
+    """
+    Build full API URL
+    
+    Args:
+        base_url: Base URL
+        path: API path
+        query: Query string
+        
+    Returns:
+        Full API URL
+    """
+    if not base_url.endswith('/') and not path.startswith('/'):
+        base_url += '/'
+    
+    url = base_url + path
+    
+    if query:
+        if '?' in url:
+            url += '&' + query
+        else:
+            url += '?' + query
+    
+    return url
+
+
+def decode_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the payload of a JWT without verifying its signature
+    
+    Args:
+        token: JWT string
+        
+    Returns:
+        Payload dictionary, or None if the token is not a JWT
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except Exception:
+        return None
+
+
+def get_path(value: Any, path: str) -> Any:
+    """
+    Get the value at a dotted path (e.g. 'data.name')
+    
+    Returns:
+        The value, or None if a part of the path is missing
+    """
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+__all__ = [
+    'TOKEN_KEYS',
+    'Storage',
+    'storage',
+    'build_query_params',
+    'build_api_url',
+    'decode_jwt_payload',
+    'get_path',
+    'JsonCodec',
+    'get_codec',
+    'deadline_scope',
+    'remaining_ms',
+    'set_turn_budget',
+    'get_turn_budget',
+]
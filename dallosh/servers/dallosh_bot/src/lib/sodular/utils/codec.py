@@ -0,0 +1,113 @@
+"""
+JSON codecs for Sodular client
+Uses orjson or msgspec when installed, falling back to the standard library
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Optional dependency
+    msgspec = None
+
+
+class JsonCodec:
+    """Standard library JSON codec (always available)"""
+
+    name = 'stdlib'
+
+    def dumps(self, value: Any) -> str:
+        """Encode to a JSON string"""
+        return json.dumps(value)
+
+    def dumpb(self, value: Any) -> bytes:
+        """Encode to UTF-8 JSON bytes"""
+        return json.dumps(value).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        """Decode a JSON string or bytes, raising ValueError when invalid"""
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson codec
+
+    orjson rejects some values the standard library encodes (non-str dict
+    keys, integers over 64 bits): those payloads are encoded with json.
+    """
+
+    name = 'orjson'
+
+    def dumps(self, value: Any) -> str:
+        return self.dumpb(value).decode('utf-8')
+
+    def dumpb(self, value: Any) -> bytes:
+        try:
+            return orjson.dumps(value)
+        except TypeError:  # orjson.JSONEncodeError
+            return super().dumpb(value)
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    """msgspec codec, falling back to json for values it rejects like OrjsonCodec"""
+
+    name = 'msgspec'
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, value: Any) -> str:
+        return self.dumpb(value).decode('utf-8')
+
+    def dumpb(self, value: Any) -> bytes:
+        try:
+            return self._encoder.encode(value)
+        except (TypeError, OverflowError):
+            return super().dumpb(value)
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as error:
+            # Surface decode errors as ValueError like json/orjson do
+            raise ValueError(str(error)) from error
+
+
+def get_codec(codec: Union[str, JsonCodec, None] = 'auto') -> JsonCodec:
+    """
+    Resolve a codec name to a codec instance
+
+    Args:
+        codec: 'auto' (fastest installed), 'orjson', 'msgspec', 'stdlib',
+            or a JsonCodec instance which is returned as-is
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec in (None, 'auto'):
+        if orjson is not None:
+            return OrjsonCodec()
+        if msgspec is not None:
+            return MsgspecCodec()
+        return JsonCodec()
+    if codec == 'orjson':
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        return OrjsonCodec()
+    if codec == 'msgspec':
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        return MsgspecCodec()
+    if codec == 'stdlib':
+        return JsonCodec()
+    raise ValueError(f"Unknown JSON codec: {codec}")
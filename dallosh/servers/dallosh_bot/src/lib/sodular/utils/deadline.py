@@ -0,0 +1,62 @@
+"""
+Deadline propagation for Sodular client
+A latency budget set by the caller (e.g. a voice turn) caps the timeout of
+every request made within it, through context variables
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Iterator
+
+# Budget (ms) each deadline scope gets when none is given, inherited by child tasks
+_turn_budget: ContextVar[Optional[int]] = ContextVar('sodular_turn_budget', default=None)
+
+# Absolute deadline (time.monotonic() seconds) of the current scope
+_deadline: ContextVar[Optional[float]] = ContextVar('sodular_deadline', default=None)
+
+
+def set_turn_budget(budget: Optional[int]):
+    """
+    Set the default budget (ms) of deadline scopes opened in this context
+
+    Tasks created afterwards (pipeline processors, function call handlers)
+    inherit it, so a session sets it once and every tool call gets it.
+    """
+    _turn_budget.set(budget)
+
+
+def get_turn_budget() -> Optional[int]:
+    return _turn_budget.get()
+
+
+@contextmanager
+def deadline_scope(budget: Optional[int] = None) -> Iterator[Optional[float]]:
+    """
+    Run a block under a deadline `budget` ms from now
+
+    Uses the turn budget when `budget` is None, and does nothing when neither
+    is set. Nested scopes can only shorten the enclosing deadline.
+    """
+    if budget is None:
+        budget = _turn_budget.get()
+    if budget is None:
+        yield _deadline.get()
+        return
+    deadline = time.monotonic() + budget / 1000
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left before the current deadline, None when there is none"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return (deadline - time.monotonic()) * 1000
@@ -0,0 +1,79 @@
+"""
+Inspect and replay the Sodular client's write-ahead log
+Lists logged writes, requeues the ones the server rejected, and drains the
+log to the server
+
+Run from the bot root with::
+
+    python -m src.lib.sodular.wal_replay sodular_wal.db --list
+    python -m src.lib.sodular.wal_replay sodular_wal.db --requeue-dead --base-url http://localhost:5005/api/v1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from src.lib.sodular import SodularClient
+from src.lib.sodular.api.wal import WriteAheadLog
+
+
+def list_entries(args) -> int:
+    """List logged writes straight from the file, without connecting or draining"""
+    wal = WriteAheadLog(None, args.path)
+    try:
+        for entry in wal.listEntries(args.list, args.limit):
+            error = f"  ({entry['error']})" if entry['error'] else ""
+            print(f"#{entry['seq']} {entry['op']} {entry['tableId']} key={entry['idempotencyKey']}{error}")
+        print(f"📊 {wal.getStats()}")
+        return 0
+    finally:
+        wal.close()
+
+
+async def main(args) -> int:
+    if not os.path.exists(args.path):
+        print(f"❌ No write-ahead log at {args.path}")
+        return 1
+
+    if args.list:
+        return list_entries(args)
+
+    # Connecting starts draining the log in the background
+    result = await SodularClient({
+        'baseUrl': args.base_url,
+        'enableSocket': False,
+        'walPath': args.path,
+    }).connect()
+    if not result.isReady:
+        print(f"❌ Connection failed: {result.error}")
+        return 1
+    client = result.client
+    wal = client._base_client.writeAheadLog
+
+    try:
+        if args.requeue_dead:
+            print(f"🔁 Requeued {wal.requeueDead()} rejected write(s)")
+
+        print(f"🚀 Draining {wal.pending()} pending write(s) to {args.base_url}...")
+        drained = await wal.drainAll(args.timeout)
+        print(f"📊 {wal.getStats()}")
+        if not drained:
+            print("⚠️ Some writes could not be sent, they stay in the log")
+            return 2
+        print("✅ Write-ahead log drained")
+        return 0
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and replay a Sodular write-ahead log")
+    parser.add_argument("path", help="sqlite write-ahead log file")
+    parser.add_argument("--base-url", default=os.environ.get('SODULAR_API_URL', 'http://localhost:5005/api/v1'))
+    parser.add_argument("--list", nargs="?", const="pending", choices=["pending", "dead"],
+                        help="list logged writes instead of draining them")
+    parser.add_argument("--limit", type=int, default=100, help="max writes to list")
+    parser.add_argument("--requeue-dead", action="store_true", help="retry writes the server rejected")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to keep draining")
+    sys.exit(asyncio.run(main(parser.parse_args())))
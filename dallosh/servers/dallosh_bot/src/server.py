@@ -1,10 +1,11 @@
 import asyncio
 import json
+import os
 from contextlib import asynccontextmanager
 from typing import Dict
 
 from fastapi import BackgroundTasks, FastAPI, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pipecat.transports.network.webrtc_connection import IceServer, SmallWebRTCConnection
@@ -13,6 +14,12 @@ from src.agents import(
     run_gemini_agent, 
     # run_ollama_agent
 )
+from src.agents.tools import SEND_REQUEST_MODE, get_request_write_queue, close_request_write_queue
+from src.services.session_registry import SessionRegistry
+from src.services.admission import AdmissionController, LoadSampler
+from src.services import metrics, component_pool, upstream_pool
+from src.services.audio_offload import close_audio_pool
+from src.services.vad_batching import get_vad_service, close_vad_service
 
 app = FastAPI()
 
@@ -20,6 +27,31 @@ app = FastAPI()
 connections: Dict[str, SmallWebRTCConnection] = {}
 websocket_connections: Dict[str, WebSocket] = {}
 
+# Multi-process mode (see src/dispatcher.py): this worker's identity and session budget
+WORKER_ID = os.getenv("BOT_WORKER_ID")
+WORKER_URL = os.getenv("BOT_WORKER_URL")
+WORKER_CAPACITY = int(os.getenv("BOT_WORKER_CAPACITY", "20"))
+HEARTBEAT_INTERVAL = 2  # seconds
+
+# Sessions owned by this worker, shared with the dispatcher
+session_registry = SessionRegistry() if WORKER_ID else None
+
+# Admission control: new sessions are admitted while there are free slots and the
+# event loop keeps up, otherwise they wait a bit in a queue and then get a 503
+load_sampler = LoadSampler()
+admission = AdmissionController(
+    load_sampler,
+    maxSessions=WORKER_CAPACITY,
+    maxLoopLag=float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "100")),
+    maxCpuPercent=float(os.getenv("ADMISSION_MAX_CPU_PERCENT", "90")),
+    queueSize=int(os.getenv("ADMISSION_QUEUE_SIZE", "10")),
+    queueTimeout=int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "5000")),
+)
+load_sampler.onSample(lambda lag, cpu: metrics.loop_lag.observe(lag / 1000))
+metrics.registry.register(metrics.Gauge("bot_sessions_active", "Admitted sessions", lambda: admission.active))
+metrics.registry.register(metrics.Gauge("bot_sessions_waiting", "Offers waiting for admission", lambda: admission.waiting))
+metrics.registry.register(metrics.Gauge("bot_cpu_percent", "Process CPU use, in % of one core", lambda: load_sampler.cpuPercent))
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +81,7 @@ logger = logging.getLogger(__name__)
 @app.post("/api/offer")
 async def handle_offer(request: dict, background_tasks: BackgroundTasks, request_obj: Request):
     """Handle WebRTC offer from client and return SDP answer."""
+    admitted = False  # Holding an admission slot not handed to an agent task yet
     try:
         # print(f"Received request: {request}")
         # Extract data from request body first, then URL parameters as fallback
@@ -95,6 +128,16 @@ async def handle_offer(request: dict, background_tasks: BackgroundTasks, request
             webrtc_connection = connections[pc_id]
             await webrtc_connection.renegotiate(sdp=sdp, type=type)
         else:
+            # Renegotiations above are never queued, only new sessions
+            if not await admission.acquire():
+                print(f"⚠️ Offer rejected, worker saturated ({admission.saturation() or 'queue full'})")
+                return JSONResponse(
+                    {"error": "Bot is at capacity, retry later"},
+                    status_code=503,
+                    headers={"Retry-After": str(admission.retryAfter())},
+                )
+            admitted = True
+
             # Create new WebRTC connection
             logger.info(f"Creating new peer connection")
             webrtc_connection = SmallWebRTCConnection(
@@ -123,6 +166,8 @@ async def handle_offer(request: dict, background_tasks: BackgroundTasks, request
             async def on_closed(connection):
                 print(f"Peer disconnected: {connection.pc_id}")
                 connections.pop(connection.pc_id, None)
+                if session_registry:
+                    await asyncio.to_thread(session_registry.unregister, connection.pc_id)
                 # Also clean up WebSocket if exists
                 if connection.pc_id in websocket_connections:
                     websocket_connections.pop(connection.pc_id, None)
@@ -155,8 +200,12 @@ async def handle_offer(request: dict, background_tasks: BackgroundTasks, request
                     if webrtc_connection.pc_id in connections:
                         await webrtc_connection.disconnect()
                         connections.pop(webrtc_connection.pc_id, None)
+                finally:
+                    admission.release()
+                    metrics.forget_session(webrtc_connection.pc_id)
 
             background_tasks.add_task(agent_task, webrtc_connection)
+            admitted = False
 
         answer = webrtc_connection.get_answer()
         if not answer:
@@ -164,17 +213,71 @@ async def handle_offer(request: dict, background_tasks: BackgroundTasks, request
 
         print(f"Connection established with peer: {answer['pc_id']}")
         connections[answer["pc_id"]] = webrtc_connection
+        if session_registry:
+            # Renegotiations for this pc_id must be routed back to this worker
+            await asyncio.to_thread(session_registry.register, answer["pc_id"], WORKER_ID)
         return answer
 
     except Exception as e:
         print(f"Error handling offer: {str(e)}")
         return {"error": str(e)}
+    finally:
+        if admitted:
+            admission.release()
+
+
+
+@app.get("/api/worker")
+async def worker_status():
+    """Load of this worker process"""
+    return {
+        "workerId": WORKER_ID or "main",
+        "pid": os.getpid(),
+        "sessions": admission.active,
+        "capacity": WORKER_CAPACITY,
+    }
 
 
+@app.get("/api/metrics")
+async def admission_metrics():
+    """Admission counters and the load they are based on"""
+    return {"workerId": WORKER_ID or "main", **admission.getStats(), "pools": component_pool.pool_stats(),
+            "upstreams": upstream_pool.pool_stats()}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Loop lag, per-processor and per-session CPU time in the Prometheus text format"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+async def send_heartbeats():
+    """Report this worker's load to the dispatcher through the session registry"""
+    while True:
+        try:
+            await asyncio.to_thread(session_registry.heartbeat, WORKER_ID, WORKER_URL, admission.active,
+                                    WORKER_CAPACITY)
+        except Exception as e:
+            print(f"Failed to send worker heartbeat: {e}")
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Replay requests spilled by a previous run
+    if SEND_REQUEST_MODE == "async":
+        await get_request_write_queue()
+    load_sampler.start()
+    # Load the shared VAD model and build the first sessions' components before any offer
+    get_vad_service()
+    await component_pool.warm_pools()
+    upstream_pool.start_pools()
+    heartbeat_task = asyncio.create_task(send_heartbeats()) if session_registry else None
     yield  # Run app
+    load_sampler.stop()
+    if heartbeat_task:
+        heartbeat_task.cancel()
+        session_registry.removeWorker(WORKER_ID)
     # Clean up connections on shutdown
     coros = [pc.disconnect() for pc in connections.values()]
     if coros:
@@ -188,6 +291,12 @@ async def lifespan(app: FastAPI):
         except:
             pass
     websocket_connections.clear()
+    
+    # Spill requests not written yet, they are replayed on next start
+    await close_request_write_queue()
+    close_audio_pool()
+    await upstream_pool.stop_pools()
+    close_vad_service()
 
 # Add lifespan to app
 app.router.lifespan_context = lifespan
\ No newline at end of file
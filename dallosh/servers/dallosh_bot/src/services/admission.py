@@ -0,0 +1,161 @@
+"""
+Admission control for Python
+Limits concurrent voice sessions by count and by measured event-loop lag and
+CPU, queueing offers for a while before turning them away
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+
+class LoadSampler:
+    """
+    Samples event-loop lag and process CPU usage
+
+    Lag is how late a periodic timer fires: when per-frame work (VAD, noise
+    reduction...) hogs the loop, every session's audio is delayed by as much.
+    """
+
+    def __init__(self, interval: float = 0.5, smoothing: float = 0.3):
+        self.interval = interval  # seconds
+        self.smoothing = smoothing  # EWMA weight of the newest sample
+        self.loopLag = 0.0  # ms, smoothed
+        self.maxLoopLag = 0.0  # ms, worst sample since start
+        self.cpuPercent = 0.0  # % of one core, smoothed
+        self._task: Optional[asyncio.Task] = None
+        self._listeners = []
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def onSample(self, callback):
+        """Call `callback(lag_ms, cpu_percent)` after every sample"""
+        self._listeners.append(callback)
+
+    async def _run(self):
+        last_wall = time.monotonic()
+        last_cpu = time.process_time()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, (now - expected) * 1000)
+            cpu_now = time.process_time()
+            cpu = (cpu_now - last_cpu) / max(now - last_wall, 1e-6) * 100
+            last_wall, last_cpu = now, cpu_now
+
+            self.loopLag += self.smoothing * (lag - self.loopLag)
+            self.cpuPercent += self.smoothing * (cpu - self.cpuPercent)
+            self.maxLoopLag = max(self.maxLoopLag, lag)
+            for callback in self._listeners:
+                try:
+                    callback(lag, cpu)
+                except Exception as e:
+                    print(f"Load sample listener failed: {e}")
+
+
+class AdmissionController:
+    """
+    Session admission by count, event-loop lag and CPU
+
+    `acquire()` admits a session right away when there is room, otherwise
+    waits in a bounded queue (woken when a session ends or the load drops)
+    until `queueTimeout` ms; it returns False when the offer should be
+    rejected. Every admitted session must be `release()`d once.
+    """
+
+    def __init__(self, sampler: LoadSampler, maxSessions: int = 20, maxLoopLag: float = 100,
+                 maxCpuPercent: float = 90, queueSize: int = 10, queueTimeout: int = 5000):
+        self.sampler = sampler
+        self.maxSessions = maxSessions  # 0 = unlimited
+        self.maxLoopLag = maxLoopLag  # ms, 0 = ignore
+        self.maxCpuPercent = maxCpuPercent  # %, 0 = ignore
+        self.queueSize = queueSize
+        self.queueTimeout = queueTimeout  # ms
+        self.active = 0
+        self.waiting = 0
+        self._changed: Optional[asyncio.Condition] = None
+        # Statistics
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timedOut": 0}
+        sampler.onSample(lambda lag, cpu: self._notify())
+
+    def saturation(self) -> Optional[str]:
+        """Why no session can be admitted now, None when one can"""
+        if self.maxSessions and self.active >= self.maxSessions:
+            return "sessions"
+        # Load limits only apply once there is a session to protect
+        if self.active and self.maxLoopLag and self.sampler.loopLag > self.maxLoopLag:
+            return "loop_lag"
+        if self.active and self.maxCpuPercent and self.sampler.cpuPercent > self.maxCpuPercent:
+            return "cpu"
+        return None
+
+    async def acquire(self) -> bool:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+
+        if self.waiting == 0 and self.saturation() is None:
+            self._admit()
+            return True
+        if self.waiting >= self.queueSize:
+            self.stats["rejected"] += 1
+            return False
+
+        self.waiting += 1
+        self.stats["queued"] += 1
+        deadline = time.monotonic() + self.queueTimeout / 1000
+        try:
+            async with self._changed:
+                while self.saturation() is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timedOut"] += 1
+                        return False
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                self._admit()
+                return True
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.active = max(0, self.active - 1)
+        self._notify()
+
+    def retryAfter(self) -> int:
+        """Seconds a rejected client should wait before offering again"""
+        return max(1, int(self.queueTimeout / 1000))
+
+    def getStats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active": self.active,
+            "waiting": self.waiting,
+            "maxSessions": self.maxSessions,
+            "saturation": self.saturation(),
+            "loopLagMs": round(self.sampler.loopLag, 2),
+            "maxLoopLagMs": round(self.sampler.maxLoopLag, 2),
+            "cpuPercent": round(self.sampler.cpuPercent, 1),
+        }
+
+    def _admit(self):
+        self.active += 1
+        self.stats["admitted"] += 1
+
+    def _notify(self):
+        if self._changed is None or not self.waiting:
+            return
+        asyncio.ensure_future(self._wake())
+
+    async def _wake(self):
+        async with self._changed:
+            self._changed.notify_all()
@@ -0,0 +1,176 @@
+"""
+Audio offload for Python
+Runs noise reduction and Silero VAD inference of every session in a shared
+pool of worker processes, so the event loop only moves frames around
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict
+
+from pipecat.audio.filters.noisereduce_filter import NoisereduceFilter
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+# Number of audio worker processes, 0 keeps noise reduction and VAD in the bot process
+AUDIO_OFFLOAD_WORKERS = int(os.getenv("AUDIO_OFFLOAD_WORKERS", "0"))
+
+# Seconds after which a session's Silero state is reset (as SileroVADAnalyzer does)
+VAD_RESET_STATES_TIME = 5.0
+
+
+# --- Worker process side -------------------------------------------------------
+
+# Silero models of the sessions assigned to this worker: session id -> (model, last reset)
+_vad_models: Dict[str, list] = {}
+
+
+def _reduce_noise(audio: bytes, sample_rate: int) -> bytes:
+    import numpy as np
+    import noisereduce as nr
+
+    data = np.frombuffer(audio, dtype=np.int16).astype(np.float32) + 1e-10
+    reduced = nr.reduce_noise(y=data, sr=sample_rate)
+    return np.clip(reduced, -32768, 32767).astype(np.int16).tobytes()
+
+
+def _silero_model():
+    from pipecat.audio.vad.silero import SileroOnnxModel
+    from src.services.vad_batching import silero_model_path
+
+    return SileroOnnxModel(silero_model_path(), force_onnx_cpu=True)
+
+
+def _vad_confidence(session: str, audio: bytes, sample_rate: int) -> float:
+    import numpy as np
+
+    state = _vad_models.get(session)
+    if state is None:
+        state = _vad_models[session] = [_silero_model(), time.time()]
+    model = state[0]
+    confidence = model(np.frombuffer(audio, np.int16).astype(np.float32) / 32768.0, sample_rate)[0]
+    if time.time() - state[1] >= VAD_RESET_STATES_TIME:
+        model.reset_states()
+        state[1] = time.time()
+    return float(confidence)
+
+
+def _vad_release(session: str):
+    _vad_models.pop(session, None)
+
+
+# --- Bot process side ----------------------------------------------------------
+
+class AudioWorkerPool:
+    """
+    Worker processes shared by every session of the bot process
+
+    Each session is pinned to one worker: Silero keeps recurrent state
+    between frames, and pinning keeps a session's frames in order. New
+    sessions go to the worker with the fewest sessions.
+    """
+
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context("spawn")
+        self.workers = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(workers)]
+        self.load = [0] * workers
+        self._ids = itertools.count()
+
+    def assign(self) -> int:
+        slot = min(range(len(self.workers)), key=lambda i: self.load[i])
+        self.load[slot] += 1
+        return slot
+
+    def release(self, slot: int):
+        self.load[slot] = max(0, self.load[slot] - 1)
+
+    def sessionId(self) -> str:
+        return f"{os.getpid()}-{next(self._ids)}"
+
+    def submit(self, slot: int, fn, *args):
+        return self.workers[slot].submit(fn, *args)
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[AudioWorkerPool] = None
+
+
+def get_audio_pool() -> Optional[AudioWorkerPool]:
+    """Shared pool, None when offloading is disabled"""
+    global _pool
+    if _pool is None and AUDIO_OFFLOAD_WORKERS > 0:
+        _pool = AudioWorkerPool(AUDIO_OFFLOAD_WORKERS)
+    return _pool
+
+
+def close_audio_pool():
+    global _pool
+    if _pool:
+        _pool.shutdown()
+        _pool = None
+
+
+class OffloadedNoiseFilter(NoisereduceFilter):
+    """NoisereduceFilter running noisereduce in the audio worker pool"""
+
+    def __init__(self, pool: AudioWorkerPool):
+        super().__init__()
+        self._pool = pool
+        self._slot = pool.assign()
+
+    async def stop(self):
+        await super().stop()
+        if self._slot is not None:
+            self._pool.release(self._slot)
+            self._slot = None
+
+    async def filter(self, audio: bytes) -> bytes:
+        if not self._filtering or self._slot is None:
+            return audio
+        try:
+            future = self._pool.submit(self._slot, _reduce_noise, audio, self._sample_rate)
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            print(f"⚠️ Offloaded noise reduction failed: {e}")
+            return audio
+
+
+class OffloadedSileroVADAnalyzer(VADAnalyzer):
+    """
+    Silero VAD whose model runs in the audio worker pool
+
+    The transport calls analyze_audio from a thread, so waiting for the
+    worker here does not block the event loop. `close()` frees the
+    session's model in the worker.
+    """
+
+    def __init__(self, pool: AudioWorkerPool, *, sample_rate: Optional[int] = None,
+                 params: Optional[VADParams] = None):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self._pool = pool
+        self._slot = pool.assign()
+        self._session = pool.sessionId()
+
+    def num_frames_required(self) -> int:
+        return 512 if self.sample_rate == 16000 else 256
+
+    def voice_confidence(self, buffer) -> float:
+        if self._slot is None:
+            return 0
+        try:
+            return self._pool.submit(self._slot, _vad_confidence, self._session, buffer, self.sample_rate).result()
+        except Exception as e:
+            print(f"⚠️ Offloaded VAD failed: {e}")
+            return 0
+
+    def close(self):
+        if self._slot is not None:
+            self._pool.submit(self._slot, _vad_release, self._session)
+            self._pool.release(self._slot)
+            self._slot = None
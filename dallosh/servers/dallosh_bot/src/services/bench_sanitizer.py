@@ -0,0 +1,86 @@
+"""
+Benchmark the streaming text sanitizer against the pattern-pair chain
+Feeds the same LLM-like token stream to PatternPairAggregator followed by
+MarkdownTextFilter (the previous setup) and to StreamingTextSanitizer, and
+reports throughput and how much text an unmatched "(" holds back
+
+Run from the bot root with::
+
+    python -m src.services.bench_sanitizer
+"""
+
+import asyncio
+import random
+import time
+
+from pipecat.utils.text.markdown_text_filter import MarkdownTextFilter
+from pipecat.utils.text.pattern_pair_aggregator import PatternPairAggregator
+
+from src.services.text_sanitizer import DEFAULT_PAIRS, StreamingTextSanitizer
+
+TOKENS = 20000
+WORDS = ("Bonjour", "votre", "commande", "est", "**bien**", "partie", "(numéro", "42)", "et", "arrivera",
+         "demain", "<think>vérifier</think>", "`code`", "chez", "vous", "##", "merci")
+
+
+def make_tokens(count: int):
+    """Words of a few characters with a sentence end every dozen tokens"""
+    rng = random.Random(0)
+    tokens = []
+    for i in range(count):
+        word = rng.choice(WORDS)
+        tokens.append(" " + word + ("." if i % 12 == 11 else ""))
+    return tokens
+
+
+def pattern_pair_chain():
+    aggregator = PatternPairAggregator()
+    for pair in DEFAULT_PAIRS:
+        aggregator.add_pattern_pair(pattern_id=pair.id, start_pattern=pair.start, end_pattern=pair.end,
+                                    remove_match=True)
+    return aggregator, MarkdownTextFilter()
+
+
+async def run_chain(tokens):
+    """Returns (seconds, tokens fed before the first text after the opening "(")"""
+    aggregator, markdown = pattern_pair_chain()
+    start = time.perf_counter()
+    first_after = None
+    for index, token in enumerate(tokens):
+        sentence = await aggregator.aggregate(token)
+        if sentence:
+            await markdown.filter(sentence)
+            if first_after is None and index > 0:
+                first_after = index
+    sentence = aggregator.text
+    if sentence:
+        await markdown.filter(sentence)
+    return time.perf_counter() - start, first_after if first_after is not None else len(tokens)
+
+
+async def run_sanitizer(tokens):
+    sanitizer = StreamingTextSanitizer()
+    start = time.perf_counter()
+    first_after = None
+    for index, token in enumerate(tokens):
+        if await sanitizer.aggregate(token) and first_after is None and index > 0:
+            first_after = index
+    _ = sanitizer.text
+    return time.perf_counter() - start, first_after if first_after is not None else len(tokens)
+
+
+async def main():
+    tokens = make_tokens(TOKENS)
+    # Same stream, opened by a "(" that is never closed
+    unmatched = ["Voici ("] + make_tokens(200)
+
+    print(f"{TOKENS} tokens\n")
+    print(f"{'':<22} | {'tokens/s':>10} | {'unmatched ( holds':>18}")
+    for name, run in (("pattern pairs + md", run_chain), ("streaming sanitizer", run_sanitizer)):
+        seconds, _ = await run(tokens)
+        _, held = await run(unmatched)
+        print(f"{name:<22} | {TOKENS / seconds:>10.0f} | {held:>11} tokens")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
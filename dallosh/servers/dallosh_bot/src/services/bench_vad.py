@@ -0,0 +1,77 @@
+"""
+Benchmark batched Silero VAD against one model per session
+Scores the same audio for 10/50/100 concurrent sessions both ways and
+reports CPU time per session per second of audio
+
+Run from the bot root with::
+
+    python -m src.services.bench_vad
+"""
+
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from pipecat.audio.vad.silero import SileroOnnxModel
+
+from src.services.vad_batching import BatchedVADService, silero_model_path
+
+SAMPLE_RATE = 16000
+CHUNK = 512  # Samples per inference at 16 kHz (32 ms)
+AUDIO_SECONDS = 5
+SESSIONS = (10, 50, 100)
+
+
+def make_chunks(sessions: int, ticks: int):
+    """Per tick, one int16 PCM chunk per session"""
+    rng = np.random.default_rng(0)
+    return [
+        [(rng.standard_normal(CHUNK) * 3000).astype(np.int16).tobytes() for _ in range(sessions)]
+        for _ in range(ticks)
+    ]
+
+
+def bench_per_instance(chunks) -> float:
+    """One SileroOnnxModel per session, as SileroVADAnalyzer does; returns CPU seconds"""
+    models = [SileroOnnxModel(silero_model_path(), force_onnx_cpu=True) for _ in chunks[0]]
+    start = time.process_time()
+    for tick in chunks:
+        for model, audio in zip(models, tick):
+            model(np.frombuffer(audio, np.int16).astype(np.float32) / 32768.0, SAMPLE_RATE)
+    return time.process_time() - start
+
+
+def bench_batched(chunks) -> float:
+    """One BatchedVADService inference per tick for all sessions; returns CPU seconds"""
+    service = BatchedVADService()
+    service.start()
+    sessions = [service.register() for _ in chunks[0]]
+    start = time.process_time()
+    for tick in chunks:
+        batch = [
+            (session, np.frombuffer(audio, np.int16).astype(np.float32) / 32768.0, SAMPLE_RATE, Future())
+            for session, audio in zip(sessions, tick)
+        ]
+        service.infer(batch)
+    elapsed = time.process_time() - start
+    service.stop()
+    return elapsed
+
+
+def main():
+    ticks = int(AUDIO_SECONDS * SAMPLE_RATE / CHUNK)
+    print(f"{AUDIO_SECONDS}s of audio per session, {CHUNK}-sample chunks at {SAMPLE_RATE} Hz\n")
+    print(f"{'sessions':>8} | {'per-instance ms/s':>17} | {'batched ms/s':>12} | {'speedup':>7}")
+    for sessions in SESSIONS:
+        chunks = make_chunks(sessions, ticks)
+        single = bench_per_instance(chunks)
+        batched = bench_batched(chunks)
+        # CPU milliseconds per session per second of audio
+        per_single = single * 1000 / sessions / AUDIO_SECONDS
+        per_batched = batched * 1000 / sessions / AUDIO_SECONDS
+        print(f"{sessions:>8} | {per_single:>17.2f} | {per_batched:>12.2f} | {single / batched:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,15 @@ async def getSodularClient() -> Optional[SodularClientInstance]:
                 'baseUrl': apiUrl,
                 'ai': {'baseUrl': aiUrl},
                 'timeout': 30000, # Default timeout
+                'connectorLimit': int(getLocal('SODULAR_CONNECTOR_LIMIT', '100')), # Pooled connections shared by all sessions
+                'keepaliveTimeout': 30000, # Keep idle connections open between tool calls
+                'responseCacheTtl': int(getLocal('SODULAR_RESPONSE_CACHE_TTL', '60000')), # Cache table/database lookups (ms, 0 = off)
+                'coalesceRequests': getLocal('SODULAR_COALESCE_REQUESTS', 'true').lower() == 'true', # Share identical in-flight GETs across sessions
+                'endpointTimeouts': {'/tables': 5000, '/ref': 8000}, # Voice turns cannot wait for the 30 s default
+                'walPath': getLocal('SODULAR_WAL_PATH', 'sodular_wal.db'), # Local log of writes made while the backend is down
+                'uniqueCreates': getLocal('SODULAR_UNIQUE_CREATES', 'false').lower() == 'true', # Backend supports atomic create-if-absent
+                'bulkWrites': {'true': True, 'false': False}.get(getLocal('SODULAR_BULK_WRITES', '').lower()), # Backend has /ref/bulk (unset: detect)
+                'idempotencyKeys': getLocal('SODULAR_IDEMPOTENCY_KEYS', 'false').lower() == 'true', # Backend replays repeated Idempotency-Key headers
                 'enableSocket': False  # Enable/disable web socket connections
             })
             
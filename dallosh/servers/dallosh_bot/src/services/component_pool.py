@@ -0,0 +1,128 @@
+"""
+Component pools for Python
+Per-session pipeline components built ahead of time, so a new session does
+not pay for model loads and processor setup before its first audio
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from src.services import metrics
+
+# Ready components kept per pool
+COMPONENT_POOL_SIZE = int(os.getenv("COMPONENT_POOL_SIZE", "4"))
+
+pool_acquired = metrics.registry.register(metrics.Counter(
+    "bot_component_pool_acquired_total", "Components handed to sessions, from the pool (hit) or built (miss)",
+    ("pool", "result")
+))
+
+
+class ComponentPool:
+    """
+    Pool of ready instances of one component
+
+    `acquire()` hands out a ready instance, or builds one when the pool is
+    empty, and schedules a background refill. Components with a `reset`
+    are returned with `release()` after the session and reused; the others
+    are single-use and only ever built ahead of time.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int = COMPONENT_POOL_SIZE,
+                 reset: Optional[Callable[[Any], None]] = None, threaded: bool = False):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.reset = reset
+        self.threaded = threaded  # Build in a thread (model loads), else on the event loop
+        self.ready: List[Any] = []
+        self._refill: Optional[asyncio.Task] = None
+        # Statistics
+        self.stats = {"hits": 0, "misses": 0, "built": 0, "reused": 0}
+
+    def acquire(self) -> Any:
+        if self.ready:
+            component = self.ready.pop()
+            self.stats["hits"] += 1
+            pool_acquired.inc(1, self.name, "hit")
+        else:
+            component = self.factory()
+            self.stats["misses"] += 1
+            self.stats["built"] += 1
+            pool_acquired.inc(1, self.name, "miss")
+        self.startRefill()
+        return component
+
+    def release(self, component: Any):
+        """Give a component back after its session, dropped if it cannot be reset"""
+        if self.reset is None or len(self.ready) >= self.size:
+            return
+        try:
+            self.reset(component)
+        except Exception as e:
+            print(f"⚠️ Could not reset {self.name} component: {e}")
+            return
+        self.ready.append(component)
+        self.stats["reused"] += 1
+
+    def startRefill(self):
+        if self.size <= 0 or (self._refill and not self._refill.done()):
+            return
+        try:
+            self._refill = asyncio.get_running_loop().create_task(self.fill())
+        except RuntimeError:
+            pass  # No running loop, the pool is refilled on the next acquire
+
+    async def fill(self):
+        """Build components until the pool is full"""
+        while len(self.ready) < self.size:
+            try:
+                if self.threaded:
+                    component = await asyncio.to_thread(self.factory)
+                else:
+                    component = self.factory()
+            except Exception as e:
+                print(f"⚠️ Could not build {self.name} component: {e}")
+                return
+            self.ready.append(component)
+            self.stats["built"] += 1
+            # Let sessions run between builds
+            await asyncio.sleep(0)
+
+    def getStats(self) -> Dict[str, Any]:
+        acquired = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "ready": len(self.ready), "size": self.size,
+                "hitRate": round(self.stats["hits"] / acquired, 3) if acquired else None}
+
+
+pools: Dict[str, ComponentPool] = {}
+
+metrics.registry.register(metrics.Gauge(
+    "bot_component_pool_ready", "Ready components per pool",
+    lambda: {(name,): len(pool.ready) for name, pool in pools.items()}, ("pool",)
+))
+
+
+def register_pool(name: str, factory: Callable[[], Any], **options) -> ComponentPool:
+    pools[name] = ComponentPool(name, factory, **options)
+    return pools[name]
+
+
+def acquire(name: str) -> Any:
+    return pools[name].acquire()
+
+
+def release(name: str, component: Any):
+    pools[name].release(component)
+
+
+async def warm_pools():
+    """Fill every pool (on startup)"""
+    for pool in pools.values():
+        pool.startRefill()
+    await asyncio.gather(*(pool._refill for pool in pools.values() if pool._refill), return_exceptions=True)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.getStats() for name, pool in pools.items()}
@@ -0,0 +1,271 @@
+"""
+Metrics for Python
+Event-loop lag and CPU time per session and pipeline processor, exported in
+the Prometheus text format
+"""
+
+import time
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+# Per-frame CPU time buckets (seconds): a 20 ms audio frame must be handled well under 20 ms
+FRAME_CPU_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelNames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelNames = tuple(labelNames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelNames: Iterable[str] = ()):
+        super().__init__(name, help, labelNames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def remove(self, match: Callable[[Tuple[str, ...]], bool]):
+        """Drop the series whose label values `match`"""
+        for labels in [labels for labels in self.values if match(labels)]:
+            del self.values[labels]
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_labels(self.labelNames, labels)} {_number(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge read from a callback when rendered, which returns {label values: value} if labeled"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Any], labelNames: Iterable[str] = ()):
+        super().__init__(name, help, labelNames)
+        self.read = read
+
+    def render(self) -> List[str]:
+        values = self.read()
+        if not self.labelNames:
+            values = {(): values}
+        return super().render() + [
+            f"{self.name}{_labels(self.labelNames, labels)} {_number(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labelNames: Iterable[str] = ()):
+        super().__init__(name, help, labelNames)
+        self.buckets = tuple(sorted(buckets))
+        # By label values: (count per bucket, sum, count)
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelNames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelNames, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelNames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelNames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def merge_rendered(texts: Dict[str, str], labelName: str = "worker") -> str:
+    """
+    Merge metrics rendered by several processes into one exposition
+
+    Each sample gets a `labelName` label with the key of the text it came
+    from, and the samples of a metric are grouped under one HELP/TYPE header.
+    """
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    for key, text in texts.items():
+        label = f'{labelName}="{_escape(key)}"'
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# "):
+                family = line.split(" ")[2]
+                lines = headers.setdefault(family, [])
+                if line not in lines:
+                    lines.append(line)
+            elif line and family is not None:
+                name, _, rest = line.partition("{")
+                if rest:
+                    line = f"{name}{{{label},{rest}"
+                else:
+                    name, _, value = line.partition(" ")
+                    line = f"{name}{{{label}}} {value}"
+                samples.setdefault(family, []).append(line)
+    lines = []
+    for family, header in headers.items():
+        lines.extend(header)
+        lines.extend(samples.get(family, []))
+    return "\n".join(lines) + "\n"
+
+loop_lag = registry.register(Histogram(
+    "bot_event_loop_lag_seconds", "How late the event loop ran a periodic timer", LOOP_LAG_BUCKETS
+))
+frame_cpu = registry.register(Histogram(
+    "bot_processor_frame_cpu_seconds", "CPU time spent handling one frame, by processor",
+    FRAME_CPU_BUCKETS, ("processor",)
+))
+session_cpu = registry.register(Counter(
+    "bot_session_cpu_seconds_total", "CPU time used by each live session, by processor",
+    ("pc_id", "processor")
+))
+
+
+class _CpuTimed:
+    """
+    Awaitable running a coroutine and measuring the CPU time of its own steps
+
+    Only the time spent inside the coroutine's steps is counted, not the
+    time other tasks run while it awaits, so the result is the time this
+    coroutine kept the event loop busy.
+    """
+
+    def __init__(self, coro, record: Callable[[float], None]):
+        self._coro = coro
+        self._record = record
+
+    def __await__(self):
+        cpu = 0.0
+        value, error = None, None
+        try:
+            while True:
+                start = time.thread_time()
+                try:
+                    if error is None:
+                        yielded = self._coro.send(value)
+                    else:
+                        yielded = self._coro.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    cpu += time.thread_time() - start
+                try:
+                    value, error = (yield yielded), None
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            self._record(cpu)
+
+
+def _recorder(pc_id: Optional[str], name: str) -> Callable[[float], None]:
+    def record(cpu: float):
+        frame_cpu.observe(cpu, name)
+        if pc_id:
+            session_cpu.inc(cpu, pc_id, name)
+    return record
+
+
+def instrument_processor(pc_id: Optional[str], processor, name: Optional[str] = None):
+    """Measure the CPU time of a pipeline processor's process_frame calls"""
+    record = _recorder(pc_id, name or type(processor).__name__)
+    process_frame = processor.process_frame
+
+    async def timed_process_frame(frame, direction):
+        return await _CpuTimed(process_frame(frame, direction), record)
+
+    processor.process_frame = timed_process_frame
+    return processor
+
+
+def instrument_processors(pc_id: Optional[str], processors: Iterable[Any]):
+    for processor in processors:
+        instrument_processor(pc_id, processor)
+
+
+def instrument_audio_filter(pc_id: Optional[str], audio_filter):
+    """Measure the CPU time of a transport audio filter (e.g. NoisereduceFilter)"""
+    record = _recorder(pc_id, type(audio_filter).__name__)
+    filter_audio = audio_filter.filter
+
+    async def timed_filter(audio):
+        return await _CpuTimed(filter_audio(audio), record)
+
+    audio_filter.filter = timed_filter
+    return audio_filter
+
+
+def instrument_vad(pc_id: Optional[str], vad_analyzer):
+    """Measure the CPU time of VAD analysis, which the transport may run in a thread"""
+    record = _recorder(pc_id, type(vad_analyzer).__name__)
+    analyze_audio = vad_analyzer.analyze_audio
+
+    def timed_analyze_audio(buffer):
+        start = time.thread_time()
+        try:
+            return analyze_audio(buffer)
+        finally:
+            record(time.thread_time() - start)
+
+    vad_analyzer.analyze_audio = timed_analyze_audio
+    return vad_analyzer
+
+
+def forget_session(pc_id: str):
+    """Drop the per-session series of a finished session"""
+    session_cpu.remove(lambda labels: labels[0] == pc_id)
@@ -0,0 +1,113 @@
+"""
+Session registry for Python
+Shared by the dispatcher and the bot workers of a multi-process deployment:
+which worker owns each WebRTC session (by pc_id) and how loaded each worker is
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        pc_id TEXT PRIMARY KEY,
+        worker_id TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS workers (
+        worker_id TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        pid INTEGER,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        capacity INTEGER NOT NULL DEFAULT 0,
+        heartbeat_at REAL NOT NULL
+    )
+    """,
+)
+
+# Path of the registry database, every process of a deployment must use the same one
+SESSION_REGISTRY_PATH = os.getenv("SESSION_REGISTRY_PATH", "sessions.db")
+
+
+class SessionRegistry:
+    """
+    sqlite-backed registry shared between processes
+
+    Workers register the sessions they own and send heartbeats with their
+    load; the dispatcher reads them to route renegotiations to the owning
+    worker and new offers to the least loaded one. Methods block on sqlite,
+    async callers run them with `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str = SESSION_REGISTRY_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()  # One statement at a time on the shared connection
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def reset(self):
+        """Forget every session and worker (on deployment start)"""
+        self._execute("DELETE FROM sessions")
+        self._execute("DELETE FROM workers")
+
+    def register(self, pc_id: str, worker_id: str):
+        self._execute(
+            "INSERT OR REPLACE INTO sessions (pc_id, worker_id, created_at) VALUES (?, ?, ?)",
+            (pc_id, worker_id, time.time())
+        )
+
+    def unregister(self, pc_id: str):
+        self._execute("DELETE FROM sessions WHERE pc_id = ?", (pc_id,))
+
+    def owner(self, pc_id: str) -> Optional[str]:
+        """Worker owning a session, None when unknown"""
+        rows = self._execute("SELECT worker_id FROM sessions WHERE pc_id = ?", (pc_id,))
+        return rows[0][0] if rows else None
+
+    def heartbeat(self, worker_id: str, url: str, sessions: int, capacity: int):
+        """Report a worker as alive, with its current load"""
+        self._execute(
+            "INSERT OR REPLACE INTO workers (worker_id, url, pid, sessions, capacity, heartbeat_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (worker_id, url, os.getpid(), sessions, capacity, time.time())
+        )
+
+    def removeWorker(self, worker_id: str):
+        """Drop a worker and the sessions it owned"""
+        self._execute("DELETE FROM sessions WHERE worker_id = ?", (worker_id,))
+        self._execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def workers(self, maxAge: float = 10.0) -> List[Dict[str, Any]]:
+        """Workers that sent a heartbeat in the last `maxAge` seconds"""
+        rows = self._execute(
+            "SELECT worker_id, url, pid, sessions, capacity, heartbeat_at FROM workers "
+            "WHERE heartbeat_at >= ? ORDER BY worker_id", (time.time() - maxAge,)
+        )
+        return [
+            {"workerId": worker_id, "url": url, "pid": pid, "sessions": sessions,
+             "capacity": capacity, "heartbeatAt": heartbeat_at}
+            for worker_id, url, pid, sessions, capacity, heartbeat_at in rows
+        ]
+
+    def sessions(self, worker_id: Optional[str] = None) -> List[str]:
+        if worker_id is None:
+            rows = self._execute("SELECT pc_id FROM sessions")
+        else:
+            rows = self._execute("SELECT pc_id FROM sessions WHERE worker_id = ?", (worker_id,))
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
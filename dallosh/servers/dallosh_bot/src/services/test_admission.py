@@ -0,0 +1,107 @@
+"""
+Test session admission control
+Queueing, queue timeout, loop lag and CPU saturation, and releases, with
+load samples set by hand instead of measured
+
+Run from the bot root with::
+
+    python -m src.services.test_admission
+"""
+
+import asyncio
+
+from src.services.admission import AdmissionController, LoadSampler
+
+
+def sample(sampler: LoadSampler, loopLag: float = 0.0, cpuPercent: float = 0.0):
+    """Report a load sample as the sampler task would"""
+    sampler.loopLag = loopLag
+    sampler.cpuPercent = cpuPercent
+    for callback in sampler._listeners:
+        callback(loopLag, cpuPercent)
+
+
+async def test_session_limit():
+    """Offers over the limit queue, the queue is bounded, and a release admits the oldest"""
+    print("🧪 Testing session limit and queue...")
+    admission = AdmissionController(LoadSampler(), maxSessions=2, queueSize=1, queueTimeout=2000)
+    assert await admission.acquire() and await admission.acquire()
+    assert admission.saturation() == "sessions"
+
+    queued = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0.01)
+    assert admission.waiting == 1 and not queued.done()
+
+    # The queue is full: turned away right away
+    assert not await admission.acquire()
+    assert admission.stats["rejected"] == 1
+
+    admission.release()
+    assert await asyncio.wait_for(queued, 1)
+    assert admission.active == 2 and admission.waiting == 0
+    assert admission.stats == {"admitted": 3, "queued": 1, "rejected": 1, "timedOut": 0}, admission.stats
+    print("✅ Queued offer admitted on release, extra offer rejected")
+
+
+async def test_queue_timeout():
+    """A queued offer gives up after queueTimeout"""
+    print("🧪 Testing queue timeout...")
+    admission = AdmissionController(LoadSampler(), maxSessions=1, queueTimeout=50)
+    assert await admission.acquire()
+    assert not await admission.acquire()
+    assert admission.stats["timedOut"] == 1 and admission.waiting == 0
+    assert admission.retryAfter() == 1
+    print("✅ Queued offer timed out")
+
+
+async def test_load_saturation():
+    """Loop lag or CPU over the limit hold offers until a sample shows the load dropped"""
+    print("🧪 Testing loop lag and CPU saturation...")
+    sampler = LoadSampler()
+    admission = AdmissionController(sampler, maxSessions=10, maxLoopLag=100, maxCpuPercent=90,
+                                    queueTimeout=2000)
+
+    # With no session yet, the load limits do not apply
+    sample(sampler, loopLag=500, cpuPercent=100)
+    assert admission.saturation() is None
+    assert await admission.acquire()
+
+    for loopLag, cpuPercent, reason in ((500, 10, "loop_lag"), (10, 95, "cpu")):
+        sample(sampler, loopLag, cpuPercent)
+        assert admission.saturation() == reason
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0.01)
+        assert not queued.done(), reason
+        sample(sampler, loopLag=10, cpuPercent=10)
+        assert await asyncio.wait_for(queued, 1), reason
+
+    assert admission.active == 3
+    print("✅ Offers held while the loop lagged or the CPU was busy, admitted once it dropped")
+
+
+async def test_release():
+    """Releasing admitted sessions (including offers that failed) frees their slot, never below 0"""
+    print("🧪 Testing release...")
+    admission = AdmissionController(LoadSampler(), maxSessions=1, queueTimeout=50)
+    for _ in range(5):
+        # An admitted offer that fails to negotiate is released right away
+        assert await admission.acquire()
+        admission.release()
+    assert admission.active == 0 and admission.stats["timedOut"] == 0
+
+    admission.release()
+    assert admission.active == 0
+    assert admission.getStats()["saturation"] is None
+    print("✅ 5 failed offers released, slot still free")
+
+
+async def main():
+    await test_session_limit()
+    await test_queue_timeout()
+    await test_load_saturation()
+    await test_release()
+    print("🎉 All admission tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Test the streaming text sanitizer
+Feeds texts split into random tokens and compares the clean text with
+feeding each text at once
+
+Run from the bot root with::
+
+    python -m src.services.test_text_sanitizer
+"""
+
+import random
+
+from src.services.text_sanitizer import StreamingTextSanitizer
+
+ROUNDS = 2000
+
+# Pieces of LLM output: plain words and punctuation, every delimiter and markdown
+FRAGMENTS = [
+    "Hello", " there", " snake", "_case", "_", "__", "___", "*", "**", "~", "~~", "#", "## ", "-", "---", "----",
+    "=", "===", "`", "``", "```", "|", "[link]", "(", ")", "(a comment)", " http", "s", "://example.com",
+    "<", "|", "<think>", "reasoning", "</think>", "<|start_header_id|>", "assistant", "</|start_header_id|>",
+    "<start_header_id>", "</start_header_id>", "h", "t", "p", ":", "/", ".", "!", " ", "é", "\n",
+]
+
+
+def make_text(rng: random.Random) -> str:
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 30)))
+
+
+def split(text: str, rng: random.Random):
+    """Cut a text into tokens of 1 to 8 characters"""
+    tokens = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        tokens.append(text[i:i + size])
+        i += size
+    return tokens
+
+
+def sanitize(tokens) -> str:
+    # No hold-back limit: where a held delimiter is given up on depends on the split by design
+    sanitizer = StreamingTextSanitizer(maxHoldChars=10 ** 9, maxHoldMs=float("inf"))
+    for token in tokens:
+        sanitizer.feed(token)
+    return sanitizer.text
+
+
+def test_known_splits():
+    """Delimiters and markdown cut between tokens"""
+    print("🧪 Testing delimiters cut between tokens...")
+    cases = [
+        (["<|start", "_header_id|>assistant</|start_header_id|>Hi there."], "Hi there."),
+        (["snake_", "_case"], "snakecase"),
+        (["Hello **wor", "ld*", "*"], "Hello world"),
+        (["a ``", "`code`", "``b"], "a b"),
+        (["see http", "s://example.com"], "see example.com"),
+        (["x --", "-- y"], "x  y"),
+    ]
+    for tokens, expected in cases:
+        assert sanitize(tokens) == expected, (tokens, sanitize(tokens))
+        assert sanitize(["".join(tokens)]) == expected, tokens
+    print(f"✅ {len(cases)} split delimiters removed")
+
+
+def test_random_splits():
+    """Random tokens give the same clean text as the whole string"""
+    print("🧪 Testing random token splits...")
+    rng = random.Random(0)
+    for round_index in range(ROUNDS):
+        text = make_text(rng)
+        expected = sanitize([text])
+        got = sanitize(split(text, rng))
+        assert got == expected, f"Round {round_index}: {text!r} gave {got!r} instead of {expected!r}"
+    print(f"✅ {ROUNDS} texts sanitized identically")
+
+
+def main():
+    test_known_splits()
+    test_random_splits()
+    print("🎉 All text sanitizer tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Test batched Silero VAD
+Checks that batched scores are exactly those of one SileroOnnxModel per
+session, and that each session's state is kept, reset and freed on its own
+
+Run from the bot root with::
+
+    python -m src.services.test_vad_batching
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from pipecat.audio.vad.silero import SileroOnnxModel
+
+from src.services import vad_batching
+from src.services.vad_batching import BatchedVADService, silero_model_path
+
+SESSIONS = 8
+TICKS = 40
+
+
+def chunk_size(sample_rate: int) -> int:
+    return 512 if sample_rate == 16000 else 256
+
+
+def make_audio(rng: np.random.Generator, sample_rate: int, ticks: int):
+    """int16 PCM chunks alternating noise and voiced-like tones, so scores move"""
+    size = chunk_size(sample_rate)
+    t = np.arange(size) / sample_rate
+    chunks = []
+    for tick in range(ticks):
+        audio = rng.standard_normal(size) * 800
+        if (tick // 8) % 2:
+            audio += np.sin(2 * np.pi * rng.uniform(120, 240) * t) * 9000
+        chunks.append(np.clip(audio, -32768, 32767).astype(np.int16).tobytes())
+    return chunks
+
+
+def to_float(audio: bytes) -> np.ndarray:
+    return np.frombuffer(audio, np.int16).astype(np.float32) / 32768.0
+
+
+def score_per_instance(audio, sample_rate: int):
+    model = SileroOnnxModel(silero_model_path(), force_onnx_cpu=True)
+    return [float(model(to_float(chunk), sample_rate)[0][0]) for chunk in audio]
+
+
+def make_service() -> BatchedVADService:
+    """A service whose batches are run by the test (no inference thread)"""
+    service = BatchedVADService(window=0)
+    service._model = vad_batching.load_silero_session()
+    return service
+
+
+def run_batch(service: BatchedVADService, items):
+    batch = [(session, to_float(audio), sample_rate, Future()) for session, audio, sample_rate in items]
+    service.infer(batch)
+    return [future.result() for *_, future in batch]
+
+
+def test_parity():
+    """Sessions of both sample rates scored together match one model per session exactly"""
+    print("🧪 Testing parity with per-session models...")
+    rng = np.random.default_rng(0)
+    rates = [16000 if i % 4 else 8000 for i in range(SESSIONS)]
+    audio = [make_audio(rng, rate, TICKS) for rate in rates]
+    expected = [score_per_instance(chunks, rate) for chunks, rate in zip(audio, rates)]
+
+    service = make_service()
+    sessions = [service.register() for _ in range(SESSIONS)]
+    scores = [[] for _ in range(SESSIONS)]
+    for tick in range(TICKS):
+        # Sessions come and go: not every session has a chunk every tick
+        present = [i for i in range(SESSIONS) if (tick + i) % 3]
+        tick_scores = run_batch(service, [(sessions[i], audio[i][len(scores[i])], rates[i]) for i in present])
+        for i, score in zip(present, tick_scores):
+            scores[i].append(score)
+    for i in range(SESSIONS):
+        remaining = audio[i][len(scores[i]):]
+        scores[i].extend(run_batch(service, [(sessions[i], chunk, rates[i])])[0] for chunk in remaining)
+
+    max_diff = max(abs(a - b) for got, want in zip(scores, expected) for a, b in zip(got, want))
+    assert max_diff == 0, max_diff
+    assert max(max(s) for s in expected) > 0.5 > min(min(s) for s in expected), "Scores did not move"
+    print(f"✅ {SESSIONS} sessions x {TICKS} chunks, max difference {max_diff}")
+
+
+def test_same_session_twice():
+    """Two chunks of one session in a batch are scored in order, like two calls"""
+    print("🧪 Testing two chunks of one session in a batch...")
+    audio = make_audio(np.random.default_rng(1), 16000, 4)
+    expected = score_per_instance(audio, 16000)
+    service = make_service()
+    session = service.register()
+    scores = run_batch(service, [(session, chunk, 16000) for chunk in audio])
+    assert scores == expected, (scores, expected)
+    print("✅ Chunks of one session scored in order")
+
+
+def test_reset_and_unregister():
+    """Stale state is reset after VAD_RESET_STATES_TIME, and unregistered sessions start fresh"""
+    print("🧪 Testing session state reset...")
+    audio = make_audio(np.random.default_rng(2), 16000, 12)
+    fresh = score_per_instance(audio[6:], 16000)
+    service = make_service()
+
+    # Old state: the next chunk is scored as by a new model
+    session = service.register()
+    run_batch(service, [(session, chunk, 16000) for chunk in audio[:6]])
+    service._sessions[session].resetAt -= vad_batching.VAD_RESET_STATES_TIME
+    scores = [run_batch(service, [(session, chunk, 16000)])[0] for chunk in audio[6:]]
+    assert scores == fresh, (scores, fresh)
+
+    # A chunk pending when its session is unregistered is scored, its state is not kept
+    service.unregister(session)
+    assert run_batch(service, [(session, audio[0], 16000)])
+    assert session not in service._sessions
+
+    # Sample rate change: the state starts over
+    session = service.register()
+    run_batch(service, [(session, chunk, 8000) for chunk in make_audio(np.random.default_rng(3), 8000, 3)])
+    scores = [run_batch(service, [(session, chunk, 16000)])[0] for chunk in audio[6:]]
+    assert scores == fresh, (scores, fresh)
+    print("✅ State reset on age, unregister and sample rate change")
+
+
+def test_threaded():
+    """Callers blocking on confidence() from several threads get their own session's scores"""
+    print("🧪 Testing the inference thread...")
+    rng = np.random.default_rng(4)
+    audio = [make_audio(rng, 16000, 10) for _ in range(4)]
+    expected = [score_per_instance(chunks, 16000) for chunks in audio]
+
+    service = BatchedVADService(window=2)
+    service.start()
+    sessions = [service.register() for _ in audio]
+    scores = [[] for _ in audio]
+
+    def run(i):
+        for chunk in audio[i]:
+            scores[i].append(service.confidence(sessions[i], chunk, 16000))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(audio))]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    service.stop()
+    assert scores == expected
+    assert service.stats["chunks"] == 40 and service.stats["batches"] < 40, service.stats
+    print(f"✅ 40 chunks in {service.stats['batches']} batches ({(time.monotonic() - start) * 1000:.0f} ms)")
+
+
+def main():
+    test_parity()
+    test_same_session_twice()
+    test_reset_and_unregister()
+    test_threaded()
+    print("🎉 All batched VAD tests passed!")
+
+
+if __name__ == "__main__":
+    main()
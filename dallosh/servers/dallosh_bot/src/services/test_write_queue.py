@@ -0,0 +1,90 @@
+"""
+Test the background write queue's spill file
+Spills jobs while persisting fails, replays them on the next start, and
+checks that processes sharing one spill file never lose or duplicate jobs
+
+Run from the bot root with::
+
+    python -m src.services.test_write_queue
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+
+from src.services.write_queue import WriteQueue
+
+PROCESSES = 4
+JOBS_PER_PROCESS = 300
+
+
+async def test_spill_and_replay(directory: str):
+    """Jobs that exhaust their retries are spilled, then replayed by the next run"""
+    print("🧪 Testing spill and replay...")
+    spill_path = os.path.join(directory, 'round_trip.jsonl')
+
+    async def backend_down(job):
+        return False
+
+    queue = WriteQueue(backend_down, spillPath=spill_path, retries=1, baseDelay=1, maxDelay=1)
+    await queue.start()
+    for i in range(5):
+        queue.submit({'id': f'job-{i}', 'token': 'secret'})
+    while queue.getStats()["spilled"] < 5:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    assert os.stat(spill_path).st_mode & 0o777 == 0o600
+
+    persisted = []
+
+    async def backend_up(job):
+        persisted.append(job['id'])
+        return True
+
+    queue = WriteQueue(backend_up, spillPath=spill_path)
+    await queue.start()
+    while len(persisted) < 5:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    assert sorted(persisted) == [f'job-{i}' for i in range(5)], persisted
+    assert os.path.getsize(spill_path) == 0
+    print("✅ 5 jobs spilled and replayed once")
+
+
+def _spill_jobs(spill_path: str, worker: int):
+    queue = WriteQueue(None, spillPath=spill_path)
+    for i in range(JOBS_PER_PROCESS):
+        queue._appendLines([{'id': f'{worker}-{i}'}])
+
+
+def test_shared_spill_file(directory: str):
+    """Concurrent appends and takes from several processes keep every job exactly once"""
+    print("🧪 Testing spill file shared by processes...")
+    spill_path = os.path.join(directory, 'shared.jsonl')
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_spill_jobs, args=(spill_path, worker)) for worker in range(PROCESSES)]
+    for process in processes:
+        process.start()
+
+    taker = WriteQueue(None, spillPath=spill_path)
+    taken = []
+    while any(process.is_alive() for process in processes):
+        taken.extend(job['id'] for job in taker._takeLines())
+    for process in processes:
+        process.join()
+    taken.extend(job['id'] for job in taker._takeLines())
+
+    assert len(taken) == len(set(taken)) == PROCESSES * JOBS_PER_PROCESS, (len(taken), len(set(taken)))
+    print(f"✅ {len(taken)} jobs from {PROCESSES} processes, none lost or duplicated")
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        await test_spill_and_replay(directory)
+        test_shared_spill_file(directory)
+    print("🎉 All write queue tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,230 @@
+"""
+Streaming text sanitizer for Python
+Removes tags, comments, code blocks and markdown from LLM tokens on their
+way to TTS in a single pass, and never holds text back on an open delimiter
+longer than a bounded window
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from pipecat.utils.string import match_endofsentence
+from pipecat.utils.text.base_text_aggregator import BaseTextAggregator
+
+# Characters held inside an open delimiter before it is given up on and the text is spoken
+SANITIZER_MAX_HOLD_CHARS = int(os.getenv("SANITIZER_MAX_HOLD_CHARS", "160"))
+# Milliseconds held inside an open delimiter before the same (checked as tokens arrive)
+SANITIZER_MAX_HOLD_MS = float(os.getenv("SANITIZER_MAX_HOLD_MS", "1500"))
+
+# Markdown dropped wherever it appears: emphasis, headers, inline code, table pipes and
+# rules, link brackets and URL schemes
+MARKDOWN_PATTERN = r"\*+|_{2,}|~~|#+|`|\||\[|\]|-{3,}|={3,}|https?://"
+# Shortest text of each multi-character markdown alternative, whose beginning is held back
+MARKDOWN_LITERALS = ("__", "~~", "---", "===", "http://", "https://")
+
+# Characters after which a sentence may end, before asking the sentence tokenizer
+SENTENCE_END = re.compile(r"[.!?;…。！？]")
+
+
+class PairSpec(NamedTuple):
+    """Delimited span removed from the text"""
+    id: str
+    start: str
+    end: str
+    # Speak the content when the end does not come within the hold-back window,
+    # else keep discarding it until the end (reasoning, code)
+    spill: bool
+
+
+DEFAULT_PAIRS = (
+    PairSpec("think_tag", "<think>", "</think>", spill=False),
+    PairSpec("assistant_header_tag", "<|start_header_id|>", "</|start_header_id|>", spill=True),
+    PairSpec("assistant_header_tag2", "<start_header_id>", "</start_header_id>", spill=True),
+    PairSpec("comment_tag", "(", ")", spill=True),
+    PairSpec("comment_tag2", "```", "```", spill=False),
+)
+
+
+class StreamingTextSanitizer(BaseTextAggregator):
+    """
+    Text aggregator cleaning LLM tokens for TTS
+
+    All delimiters and markdown are compiled into one regex, so each token is
+    scanned once: plain text is copied in bulk, markdown is dropped, and a
+    pair start switches to looking for its end (nested starts are counted).
+    The end of a token that may be the beginning of a delimiter, or markdown
+    that may go on in the next token, is kept until the next one, so the
+    clean text does not depend on how the text is split into tokens.
+
+    Text inside an open pair is held at most `maxHoldChars` characters or
+    `maxHoldMs` milliseconds. Past that the start was not a delimiter (an
+    unmatched "(" for example): it is dropped and the held text is scanned
+    again as plain text, unless the pair is one that is never spoken.
+
+    Clean text is returned a sentence at a time, like the pipecat aggregators.
+    """
+
+    def __init__(self, pairs=DEFAULT_PAIRS, maxHoldChars: int = SANITIZER_MAX_HOLD_CHARS,
+                 maxHoldMs: float = SANITIZER_MAX_HOLD_MS):
+        self.pairs: Dict[str, PairSpec] = {pair.start: pair for pair in pairs}
+        self.maxHoldChars = maxHoldChars
+        self.maxHoldMs = maxHoldMs
+        # Longest alternatives first, so that "```" wins over "`"
+        starts = sorted(self.pairs, key=len, reverse=True)
+        self._tokens = re.compile("|".join([re.escape(start) for start in starts] + [MARKDOWN_PATTERN]))
+        # Proper prefixes of the delimiters, held back when a token ends with one
+        literals = list(self.pairs) + list(MARKDOWN_LITERALS)
+        self._prefixes = {literal[:i] for literal in literals for i in range(1, len(literal))}
+        self._longestPrefix = max(map(len, self._prefixes), default=0)
+        self._text = ""  # Clean text waiting for a sentence end
+        self._pending = ""  # Raw text that may be the beginning of a delimiter
+        self._pair: Optional[PairSpec] = None
+        self._depth = 0
+        self._held: List[str] = []
+        self._heldChars = 0
+        self._heldSince = 0.0
+        self._sentenceEnd = False
+        # Statistics
+        self.stats = {"removed": 0, "spilled": 0}
+
+    @property
+    def text(self) -> str:
+        """Clean text so far, with the content of an unfinished spoken pair"""
+        text = self._text
+        if self._pair is None:
+            # The stream may end here, kept-back markdown is dropped
+            text += self._tokens.sub("", self._pending)
+        elif self._pair.spill:
+            text += "".join(self._held)
+        return text
+
+    async def aggregate(self, text: str) -> Optional[str]:
+        self.feed(text)
+        if not self._sentenceEnd:
+            return None
+        eos_marker = match_endofsentence(self._text)
+        if not eos_marker:
+            return None
+        result = self._text[:eos_marker]
+        self._text = self._text[eos_marker:]
+        self._sentenceEnd = SENTENCE_END.search(self._text) is not None
+        return result
+
+    async def handle_interruption(self):
+        self._clear()
+
+    async def reset(self):
+        self._clear()
+
+    def feed(self, text: str):
+        """Scan a token, appending its clean text"""
+        buffer = self._pending + text
+        self._pending = ""
+        position = 0
+        out = []
+        while position < len(buffer):
+            if self._pair is not None:
+                position = self._scanPair(buffer, position)
+                if self._pair is not None and self._overflowing():
+                    # Give up on the delimiter, the held text goes through the scanner again
+                    buffer = "".join(self._held) + self._pending + buffer[position:]
+                    self.stats["spilled"] += 1
+                    self._closePair()
+                    self._pending = ""
+                    position = 0
+                continue
+
+            # Whatever follows the beginning of a delimiter waits for the next token,
+            # e.g. the "|" of "<|start" or a "``" that may become "```"
+            limit = len(buffer) - self._partialTail(buffer, position)
+            match = self._tokens.search(buffer, position)
+            if match is None or match.start() >= limit:
+                out.append(buffer[position:limit])
+                self._pending = buffer[limit:]
+                break
+            out.append(buffer[position:match.start()])
+            if match.end() == len(buffer):
+                # "**", "---"... may go on in the next token
+                self._pending = buffer[match.start():]
+                break
+            position = match.end()
+            pair = self.pairs.get(match.group())
+            if pair is not None:
+                self._openPair(pair)
+
+        clean = "".join(out)
+        if clean:
+            self._text += clean
+            self._sentenceEnd = self._sentenceEnd or SENTENCE_END.search(clean) is not None
+
+    def _scanPair(self, buffer: str, position: int) -> int:
+        """Consume text inside the open pair, returns the position after it"""
+        pair = self._pair
+        nested = pair.start != pair.end
+        while True:
+            end = buffer.find(pair.end, position)
+            start = buffer.find(pair.start, position, end if end != -1 else len(buffer)) if nested else -1
+            if start != -1:
+                self._hold(buffer[position:start + len(pair.start)])
+                self._depth += 1
+                position = start + len(pair.start)
+            elif end != -1:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.stats["removed"] += 1
+                    self._closePair()
+                    return end + len(pair.end)
+                self._hold(buffer[position:end + len(pair.end)])
+                position = end + len(pair.end)
+            else:
+                # Keep what may be the beginning of the end (or of a nested start)
+                tail = 0
+                for delimiter in (pair.end, pair.start) if nested else (pair.end,):
+                    for size in range(min(len(delimiter) - 1, len(buffer) - position), tail, -1):
+                        if buffer.endswith(delimiter[:size]):
+                            tail = size
+                            break
+                self._hold(buffer[position:len(buffer) - tail])
+                self._pending = buffer[len(buffer) - tail:]
+                return len(buffer)
+
+    def _partialTail(self, buffer: str, position: int) -> int:
+        """Length of the end of the buffer that may be the beginning of a delimiter"""
+        for size in range(min(self._longestPrefix, len(buffer) - position), 0, -1):
+            if buffer[-size:] in self._prefixes:
+                return size
+        return 0
+
+    def _openPair(self, pair: PairSpec):
+        self._pair = pair
+        self._depth = 1
+        self._held = []
+        self._heldChars = 0
+        self._heldSince = time.monotonic()
+
+    def _closePair(self):
+        self._pair = None
+        self._depth = 0
+        self._held = []
+        self._heldChars = 0
+
+    def _hold(self, text: str):
+        if not text:
+            return
+        self._heldChars += len(text)
+        if self._pair.spill:
+            self._held.append(text)
+
+    def _overflowing(self) -> bool:
+        if not self._pair.spill:
+            return False
+        return self._heldChars > self.maxHoldChars or \
+            (time.monotonic() - self._heldSince) * 1000 > self.maxHoldMs
+
+    def _clear(self):
+        self._text = ""
+        self._pending = ""
+        self._sentenceEnd = False
+        self._closePair()
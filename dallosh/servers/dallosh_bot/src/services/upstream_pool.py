@@ -0,0 +1,174 @@
+"""
+Upstream connection pools for Python
+Authenticated websockets to upstream services (e.g. Rime TTS) opened ahead of
+time, so a new session skips the TCP/TLS/websocket handshakes on its first turn
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.services import metrics
+
+# Open connections kept per upstream, 0 disables pre-connecting
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "0"))
+# Seconds after which an unclaimed connection is recycled, before the upstream drops it as idle
+UPSTREAM_MAX_AGE = float(os.getenv("UPSTREAM_MAX_AGE_SECS", "60"))
+
+upstream_claimed = metrics.registry.register(metrics.Counter(
+    "bot_upstream_claimed_total", "Upstream connections claimed by sessions (hit) or left to connect (miss)",
+    ("upstream", "result")
+))
+
+
+def is_open(websocket) -> bool:
+    state = getattr(websocket, "state", None)
+    return getattr(state, "name", None) == "OPEN"
+
+
+class UpstreamPool:
+    """
+    Pool of open, authenticated websockets to one upstream
+
+    Connections are opened to a target (e.g. the URL with its query
+    parameters) learned from the sessions' claims: a session connects by
+    itself the first time, and the pool then keeps `size` connections open
+    to that target. A background task drops the ones the upstream closed or
+    that are older than `maxAge`, and opens new ones. Connections are kept
+    alive by the websockets library's pings. `claim()` hands out a healthy
+    connection, or None when none is ready.
+    """
+
+    def __init__(self, name: str, connect: Callable[[Any], Awaitable[Any]], size: int = UPSTREAM_POOL_SIZE,
+                 maxAge: float = UPSTREAM_MAX_AGE, healthInterval: float = 5.0):
+        self.name = name
+        self.connect = connect  # Opens a connection to a target
+        self.target: Any = None
+        self.size = size
+        self.maxAge = maxAge  # seconds
+        self.healthInterval = healthInterval  # seconds
+        self.ready: List[Tuple[Any, float]] = []  # (websocket, opened at)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        # Statistics
+        self.stats = {"opened": 0, "claimed": 0, "missed": 0, "recycled": 0, "failed": 0}
+
+    def start(self):
+        if self._task is None and self.size > 0:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            # wait_for() may swallow a cancel racing a wakeup, the flag ends the loop anyway
+            self._stopping = True
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._stopping = False
+        for websocket, _ in self.ready:
+            await self._close(websocket)
+        self.ready.clear()
+
+    def claim(self, target: Any) -> Optional[Any]:
+        if target != self.target:
+            # Connections opened to another target are of no use anymore
+            self.target = target
+            self._closeAll()
+        now = time.monotonic()
+        while self.ready:
+            websocket, opened_at = self.ready.pop()
+            if is_open(websocket) and now - opened_at < self.maxAge:
+                self.stats["claimed"] += 1
+                upstream_claimed.inc(1, self.name, "hit")
+                self._refill()
+                return websocket
+            asyncio.ensure_future(self._close(websocket))
+        self.stats["missed"] += 1
+        upstream_claimed.inc(1, self.name, "miss")
+        self._refill()
+        return None
+
+    def getStats(self) -> Dict[str, Any]:
+        return {**self.stats, "ready": len(self.ready), "size": self.size}
+
+    def _refill(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self):
+        failures = 0
+        while not self._stopping:
+            self._prune()
+            while self.target is not None and len(self.ready) < self.size:
+                target = self.target
+                try:
+                    websocket = await self.connect(target)
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    failures += 1
+                    print(f"⚠️ Could not pre-connect to {self.name}: {e}")
+                    break
+                failures = 0
+                if target != self.target:
+                    await self._close(websocket)
+                    continue
+                self.ready.append((websocket, time.monotonic()))
+                self.stats["opened"] += 1
+            # Back off while the upstream keeps failing
+            delay = min(self.healthInterval * (2 ** failures), 60)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _prune(self):
+        now = time.monotonic()
+        healthy = []
+        for websocket, opened_at in self.ready:
+            if is_open(websocket) and now - opened_at < self.maxAge:
+                healthy.append((websocket, opened_at))
+            else:
+                self.stats["recycled"] += 1
+                asyncio.ensure_future(self._close(websocket))
+        self.ready = healthy
+
+    def _closeAll(self):
+        for websocket, _ in self.ready:
+            asyncio.ensure_future(self._close(websocket))
+        self.ready.clear()
+
+    async def _close(self, websocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
+pools: Dict[str, UpstreamPool] = {}
+
+metrics.registry.register(metrics.Gauge(
+    "bot_upstream_ready", "Open upstream connections waiting for a session",
+    lambda: {(name,): len(pool.ready) for name, pool in pools.items()}, ("upstream",)
+))
+
+
+def register_pool(name: str, connect: Callable[[Any], Awaitable[Any]], **options) -> UpstreamPool:
+    pools[name] = UpstreamPool(name, connect, **options)
+    return pools[name]
+
+
+def start_pools():
+    for pool in pools.values():
+        pool.start()
+
+
+async def stop_pools():
+    await asyncio.gather(*(pool.stop() for pool in pools.values()))
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.getStats() for name, pool in pools.items()}
@@ -0,0 +1,245 @@
+"""
+Batched VAD for Python
+One Silero model shared by every session of the bot process: chunks pending
+from all sessions are gathered for a few milliseconds and scored in a single
+batched ONNX inference
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, Dict, List, Tuple
+
+import numpy as np
+
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from src.services import metrics
+
+# Milliseconds to wait for other sessions' chunks before running a batch, 0 disables batching
+VAD_BATCH_WINDOW_MS = float(os.getenv("VAD_BATCH_WINDOW_MS", "0"))
+VAD_MAX_BATCH = int(os.getenv("VAD_MAX_BATCH", "256"))
+
+# Seconds after which a session's Silero state is reset (as SileroVADAnalyzer does)
+VAD_RESET_STATES_TIME = 5.0
+
+vad_batch_size = metrics.registry.register(metrics.Histogram(
+    "bot_vad_batch_size", "Sessions scored by one batched VAD inference",
+    (1, 2, 4, 8, 16, 32, 64, 128, 256)
+))
+
+
+def silero_model_path() -> str:
+    """Path of the Silero VAD model shipped with pipecat"""
+    from importlib import resources
+    return str(resources.files("pipecat.audio.vad.data").joinpath("silero_vad.onnx"))
+
+
+def load_silero_session():
+    """Single-threaded CPU onnxruntime session of the Silero model"""
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.inter_op_num_threads = 1
+    options.intra_op_num_threads = 1
+    return onnxruntime.InferenceSession(silero_model_path(), providers=["CPUExecutionProvider"],
+                                        sess_options=options)
+
+
+class _SessionState:
+    def __init__(self, sample_rate: int):
+        self.sampleRate = sample_rate
+        self.reset()
+
+    def reset(self):
+        self.state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.context = np.zeros((1, 64 if self.sampleRate == 16000 else 32), dtype=np.float32)
+        self.resetAt = time.monotonic()
+
+
+class BatchedVADService:
+    """
+    Silero VAD scoring chunks of many sessions in one inference
+
+    Each session keeps its own recurrent state and context; they are
+    stacked along the batch axis for the inference and split back after.
+    Inference runs on a dedicated thread (onnxruntime releases the GIL),
+    callers block on `confidence()` from the transport's executor thread.
+    """
+
+    def __init__(self, window: float = VAD_BATCH_WINDOW_MS, maxBatch: int = VAD_MAX_BATCH):
+        self.window = window  # ms
+        self.maxBatch = maxBatch
+        self._model = None
+        # Registered sessions, their state is created on their first chunk
+        self._sessions: Dict[str, Optional[_SessionState]] = {}
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._ids = itertools.count()
+        # Statistics
+        self.stats = {"batches": 0, "chunks": 0}
+
+    def start(self):
+        if self._thread:
+            return
+        self._model = load_silero_session()
+        self._thread = threading.Thread(target=self._run, name="vad-batching", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(5)
+            self._thread = None
+
+    def register(self) -> str:
+        session = f"vad-{next(self._ids)}"
+        self._sessions[session] = None
+        return session
+
+    def unregister(self, session: str):
+        self._sessions.pop(session, None)
+
+    def submit(self, session: str, audio: bytes, sample_rate: int) -> Future:
+        future: Future = Future()
+        chunk = np.frombuffer(audio, np.int16).astype(np.float32) / 32768.0
+        self._queue.put((session, chunk, sample_rate, future))
+        return future
+
+    def confidence(self, session: str, audio: bytes, sample_rate: int) -> float:
+        return self.submit(session, audio, sample_rate).result()
+
+    def getStats(self) -> Dict[str, float]:
+        batches = self.stats["batches"]
+        return {**self.stats, "sessions": len(self._sessions),
+                "meanBatch": round(self.stats["chunks"] / batches, 2) if batches else 0}
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window / 1000
+            stop = False
+            while len(batch) < self.maxBatch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self.infer(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def infer(self, batch: List[Tuple[str, np.ndarray, int, Future]]):
+        """Score chunks, one inference per sample rate (a session appearing twice waits for the next)"""
+        while batch:
+            groups: Dict[int, list] = {}
+            later = []
+            seen = set()
+            for item in batch:
+                if item[0] in seen:
+                    later.append(item)
+                else:
+                    seen.add(item[0])
+                    groups.setdefault(item[2], []).append(item)
+            for sample_rate, items in groups.items():
+                self._inferGroup(sample_rate, items)
+            batch = later
+
+    def _inferGroup(self, sample_rate: int, items: list):
+        now = time.monotonic()
+        states = []
+        for session, _, _, _ in items:
+            state = self._sessions.get(session)
+            if state is None or state.sampleRate != sample_rate:
+                state = _SessionState(sample_rate)
+                # Not kept for a session unregistered while its chunk was pending
+                if session in self._sessions:
+                    self._sessions[session] = state
+            elif now - state.resetAt >= VAD_RESET_STATES_TIME:
+                state.reset()
+            states.append(state)
+
+        x = np.concatenate([
+            np.concatenate((state.context, chunk[np.newaxis, :]), axis=1)
+            for state, (_, chunk, _, _) in zip(states, items)
+        ])
+        out, new_state = self._model.run(None, {
+            "input": x,
+            "state": np.concatenate([state.state for state in states], axis=1),
+            "sr": np.array(sample_rate, dtype=np.int64),
+        })
+
+        context_size = states[0].context.shape[1]
+        for i, (state, (_, _, _, future)) in enumerate(zip(states, items)):
+            state.state = new_state[:, i:i + 1, :]
+            state.context = x[i:i + 1, -context_size:]
+            future.set_result(float(out[i][0]))
+
+        self.stats["batches"] += 1
+        self.stats["chunks"] += len(items)
+        vad_batch_size.observe(len(items))
+
+
+_service: Optional[BatchedVADService] = None
+
+
+def get_vad_service() -> Optional[BatchedVADService]:
+    """Shared started service, None when batching is disabled"""
+    global _service
+    if _service is None and VAD_BATCH_WINDOW_MS > 0:
+        _service = BatchedVADService()
+        _service.start()
+    return _service
+
+
+def close_vad_service():
+    global _service
+    if _service:
+        _service.stop()
+        _service = None
+
+
+class BatchedSileroVADAnalyzer(VADAnalyzer):
+    """
+    Silero VAD scored by the shared BatchedVADService
+
+    analyze_audio is called from the transport's executor thread, waiting
+    for the batch there does not block the event loop. `close()` frees the
+    session's state.
+    """
+
+    def __init__(self, service: BatchedVADService, *, sample_rate: Optional[int] = None,
+                 params: Optional[VADParams] = None):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self._service = service
+        self._session = service.register()
+
+    def num_frames_required(self) -> int:
+        return 512 if self.sample_rate == 16000 else 256
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            return self._service.confidence(self._session, buffer, self.sample_rate)
+        except Exception as e:
+            print(f"⚠️ Batched VAD failed: {e}")
+            return 0
+
+    def close(self):
+        self._service.unregister(self._session)
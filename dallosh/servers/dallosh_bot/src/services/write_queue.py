@@ -0,0 +1,206 @@
+"""
+Background write queue for Python
+Persists jobs off the voice turn, with retries and a local spill file used
+when the backend is down or the queue is full
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies, use one spill file per process
+    fcntl = None
+
+
+def _lock(file):
+    """Lock an open file against other processes until it is closed"""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+
+class WriteQueue:
+    """
+    Bounded queue of write jobs drained by background workers
+
+    `persist(job)` returns True once the job is stored (or known to be a
+    duplicate) and False when it should be retried. Jobs that still fail
+    after `retries` attempts, or that do not fit in the queue, are appended
+    to `spillPath` (JSON lines) and replayed on start and every
+    `replayInterval` ms. The spill file is locked (flock) while it is
+    appended to or taken, so processes sharing it never lose or duplicate
+    jobs.
+
+    Usage:
+        queue = WriteQueue(persist_job, spillPath='pending_requests.jsonl')
+        await queue.start()
+        queue.submit({'id': ..., ...})
+        ...
+        await queue.stop()
+    """
+
+    def __init__(self, persist: Callable[[Dict[str, Any]], Awaitable[bool]], spillPath: str,
+                 maxSize: int = 1000, workers: int = 2, retries: int = 5,
+                 baseDelay: int = 500, maxDelay: int = 10000, replayInterval: int = 30000,
+                 maxSpills: int = 20):
+        self.persist = persist
+        self.spillPath = spillPath
+        self.maxSize = maxSize
+        self.workers = workers
+        self.retries = retries  # Extra attempts after the first one
+        self.baseDelay = baseDelay  # ms
+        self.maxDelay = maxDelay  # ms
+        self.replayInterval = replayInterval  # ms
+        self.maxSpills = maxSpills  # A job failing this many replays is dropped
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._spillLock = asyncio.Lock()
+        self._spilling: set = set()  # Keeps overflow spill tasks alive
+        # Statistics
+        self.stats = {"submitted": 0, "persisted": 0, "retried": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+
+    async def start(self):
+        """Start the workers and replay jobs spilled by a previous run"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.maxSize)
+        # Workers get an empty context so they never inherit a caller's deadline
+        context = contextvars.Context()
+        for _ in range(self.workers):
+            self._tasks.append(context.run(asyncio.create_task, self._work()))
+        self._tasks.append(context.run(asyncio.create_task, self._replayLoop()))
+
+    async def stop(self):
+        """Stop the workers, spilling the jobs still queued"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        pending = []
+        while self._queue and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._spill(pending)
+
+    def submit(self, job: Dict[str, Any]) -> bool:
+        """Queue a job, returns False when the queue is full and the job is spilled instead"""
+        self.stats["submitted"] += 1
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            task = asyncio.ensure_future(self._spill([job]))
+            self._spilling.add(task)
+            task.add_done_callback(self._spilling.discard)
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def getStats(self) -> Dict[str, int]:
+        return {**self.stats, "pending": self.pending()}
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if not await self._persistWithRetry(job):
+                    await self._spillFailed(job)
+            except asyncio.CancelledError:
+                # Stopping: keep the job being written for the next run
+                await self._spill([job])
+                raise
+            except Exception as error:
+                print(f"❌ Write queue job failed: {error}")
+                await self._spillFailed(job)
+            finally:
+                self._queue.task_done()
+
+    async def _spillFailed(self, job: Dict[str, Any]):
+        """Spill a job that exhausted its retries, unless it keeps failing"""
+        job["spills"] = job.get("spills", 0) + 1
+        if job["spills"] > self.maxSpills:
+            self.stats["dropped"] += 1
+            print(f"❌ Dropping write job after {self.maxSpills} failed replays: {job.get('id')}")
+            return
+        await self._spill([job])
+
+    async def _persistWithRetry(self, job: Dict[str, Any]) -> bool:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retried"] += 1
+                # Full jitter exponential backoff
+                cap = min(self.maxDelay, self.baseDelay * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, cap) / 1000)
+            if await self.persist(job):
+                self.stats["persisted"] += 1
+                return True
+        return False
+
+    async def _spill(self, jobs: List[Dict[str, Any]]):
+        """Append jobs to the spill file"""
+        async with self._spillLock:
+            await asyncio.to_thread(self._appendLines, jobs)
+        self.stats["spilled"] += len(jobs)
+        print(f"💾 Spilled {len(jobs)} write job(s) to {self.spillPath}")
+
+    def _appendLines(self, jobs: List[Dict[str, Any]]):
+        directory = os.path.dirname(self.spillPath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Jobs may carry auth tokens, keep the file private
+        fd = os.open(self.spillPath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'a', encoding='utf-8') as file:
+            _lock(file)
+            for job in jobs:
+                file.write(json.dumps(job) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _takeLines(self) -> List[Dict[str, Any]]:
+        """Read and truncate the spill file"""
+        if not os.path.exists(self.spillPath):
+            return []
+        with open(self.spillPath, 'r+', encoding='utf-8') as file:
+            _lock(file)
+            lines = file.readlines()
+            file.seek(0)
+            file.truncate()
+        jobs = []
+        for line in lines:
+            try:
+                jobs.append(json.loads(line))
+            except ValueError:
+                print(f"⚠️ Skipping corrupted spilled job: {line[:80]}")
+        return jobs
+
+    async def replay(self) -> int:
+        """Queue spilled jobs again, as many as fit; returns how many were queued"""
+        async with self._spillLock:
+            jobs = await asyncio.to_thread(self._takeLines)
+        queued = 0
+        for i, job in enumerate(jobs):
+            try:
+                self._queue.put_nowait(job)
+                queued += 1
+            except asyncio.QueueFull:
+                # Keep what does not fit for the next replay
+                async with self._spillLock:
+                    await asyncio.to_thread(self._appendLines, jobs[i:])
+                break
+        self.stats["replayed"] += queued
+        return queued
+
+    async def _replayLoop(self):
+        while True:
+            try:
+                queued = await self.replay()
+                if queued:
+                    print(f"🔁 Replayed {queued} spilled write job(s)")
+            except Exception as error:
+                print(f"⚠️ Failed to replay spilled write jobs: {error}")
+            await asyncio.sleep(self.replayInterval / 1000)
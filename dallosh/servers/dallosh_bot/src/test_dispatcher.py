@@ -0,0 +1,134 @@
+"""
+Test the multi-process dispatcher
+Forwards offers to stand-in workers (small aiohttp apps) registered in a
+temporary session registry, without starting bot processes
+
+Run from the bot root with::
+
+    python -m src.test_dispatcher
+"""
+
+import asyncio
+import os
+import tempfile
+
+import aiohttp
+import httpx
+from aiohttp import web
+
+from src import dispatcher
+from src.services.session_registry import SessionRegistry
+
+OFFERS = 8
+CAPACITY = 10
+
+
+class StandInWorker:
+    """Answers offers after `delay` seconds with `status`, counting them"""
+
+    def __init__(self, worker_id: str, status: int = 200, delay: float = 0.05):
+        self.workerId = worker_id
+        self.status = status
+        self.delay = delay
+        self.offers = 0
+        self.url = None
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/offer", self._offer)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def _offer(self, request: web.Request):
+        self.offers += 1
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.json_response({"error": "Full"}, status=self.status, headers={"Retry-After": "3"})
+        return web.json_response({"pc_id": f"{self.workerId}-{self.offers}", "sdp": "answer", "type": "answer"})
+
+
+async def run_offers(workers, count: int):
+    """Send `count` concurrent new offers through the dispatcher, returns the responses"""
+    dispatcher.registry = SessionRegistry(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    dispatcher.http_session = aiohttp.ClientSession()
+    dispatcher.pending_offers.clear()
+    for worker in workers:
+        # Sessions stay at 0: no heartbeat comes in while the offers are dispatched
+        dispatcher.registry.heartbeat(worker.workerId, worker.url, 0, CAPACITY)
+    try:
+        transport = httpx.ASGITransport(app=dispatcher.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://dispatcher") as client:
+            return await asyncio.gather(*[
+                client.post("/api/offer", json={"sdp": "offer", "type": "offer"}) for _ in range(count)
+            ])
+    finally:
+        await dispatcher.http_session.close()
+        dispatcher.registry.close()
+
+
+async def test_concurrent_offers_spread():
+    """Offers arriving before the next heartbeat are spread over the workers"""
+    print("🧪 Testing concurrent offers...")
+    workers = [StandInWorker("worker-0"), StandInWorker("worker-1")]
+    for worker in workers:
+        await worker.start()
+    try:
+        responses = await run_offers(workers, OFFERS)
+        assert all(response.status_code == 200 for response in responses), responses
+        assert [worker.offers for worker in workers] == [OFFERS // 2, OFFERS // 2], [w.offers for w in workers]
+        print(f"✅ {OFFERS} concurrent offers split {workers[0].offers}/{workers[1].offers}")
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+async def test_retry_on_next_worker():
+    """A new offer refused (503) or lost (connection error) by a worker is sent to the next best once"""
+    print("🧪 Testing retries of new offers...")
+    for unreachable in (False, True):
+        failing = StandInWorker("worker-0", status=503)
+        healthy = StandInWorker("worker-1")
+        await failing.start()
+        await healthy.start()
+        if unreachable:
+            # Nothing listens on its port anymore
+            await failing.stop()
+        try:
+            responses = await run_offers([failing, healthy], 1)
+            assert responses[0].status_code == 200, responses[0].text
+            assert responses[0].json()["pc_id"].startswith("worker-1"), responses[0].text
+            assert healthy.offers == 1 and failing.offers == (0 if unreachable else 1)
+        finally:
+            await healthy.stop()
+            if not unreachable:
+                await failing.stop()
+
+    # Every worker full: the last refusal is passed on with its Retry-After
+    workers = [StandInWorker("worker-0", status=503), StandInWorker("worker-1", status=503)]
+    for worker in workers:
+        await worker.start()
+    try:
+        response = (await run_offers(workers, 1))[0]
+        assert response.status_code == 503 and response.headers["retry-after"] == "3", response
+        assert [worker.offers for worker in workers] == [1, 1]
+    finally:
+        for worker in workers:
+            await worker.stop()
+    print("✅ Refused and unreachable workers retried once on the other worker")
+
+
+async def main():
+    await test_concurrent_offers_spread()
+    await test_retry_on_next_worker()
+    print("🎉 All dispatcher tests passed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())